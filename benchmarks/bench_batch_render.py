@@ -0,0 +1,87 @@
+"""Batch-rendering benchmark for Wallbox Billing.
+
+Rendert ``--invoices`` Monatsrechnungen (mit Tagesübersicht) über
+``render_invoice_batch`` mit 1, 2, 4, … Prozessen bis zur Kernzahl und gibt
+Durchsatz sowie Speedup gegenüber einem Prozess aus.
+
+    python benchmarks/bench_batch_render.py [--invoices 120] [--runs 3]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import time
+
+from common import print_row, summarize
+
+from custom_components.wallbox_billing.batch_render import render_invoice_batch
+
+
+def make_specs(count: int) -> list[dict]:
+    """``count`` aufeinanderfolgende Monatsrechnungen ab Januar 2016."""
+    specs: list[dict] = []
+    reading = 1000.0
+    period_from = datetime.date(2016, 1, 1)
+    for index in range(count):
+        year, month = divmod(period_from.month, 12)
+        period_to = datetime.date(period_from.year + year, month + 1, 1)
+        daily = []
+        day = period_from
+        while day < period_to:
+            daily.append((day, round(5.0 + (day.toordinal() * 7 % 13) * 0.9, 3)))
+            day += datetime.timedelta(days=1)
+        consumption = sum(kwh for _, kwh in daily)
+        specs.append(
+            {
+                "owner_name": "Benchmark",
+                "meter_number": f"WB-BENCH-{index:04d}",
+                "recipient_email": "buchhaltung@example.invalid",
+                "period_from": period_from,
+                "period_to": period_to,
+                "reading_previous": reading,
+                "reading_current": reading + consumption,
+                "price_per_kwh": 0.30,
+                "daily_data": daily,
+            }
+        )
+        reading += consumption
+        period_from = period_to
+    return specs
+
+
+def worker_counts() -> list[int]:
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    specs = make_specs(args.invoices)
+    baseline: float | None = None
+    for workers in worker_counts():
+        samples: list[float] = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            pdfs = render_invoice_batch(specs, max_workers=workers)
+            samples.append(time.perf_counter() - started)
+        assert len(pdfs) == len(specs) and all(pdf.startswith(b"%PDF") for pdf in pdfs)
+        stats = summarize(samples)
+        median_s = stats["median_ms"] / 1000
+        baseline = baseline or median_s
+        stats["invoices_per_s"] = args.invoices / median_s
+        stats["speedup"] = baseline / median_s
+        print_row(f"render_invoice_batch workers={workers}", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Hot-path benchmarks for Wallbox Billing with baseline comparison.
+
+Gemessen werden (Zeit und Spitzen-Speicher via tracemalloc):
+
+- ``generate_invoice_pdf`` mit 0, 31, 366 und 3650 Tageszeilen,
+- die Differenzschleife in ``_async_fetch_daily_stats`` mit synthetischen
+  Recorder-Statistiken (31, 366, 3650 Tage; Recorder ersetzt),
+- ``_send_email_sync`` gegen einen lokalen SMTP-Sink.
+
+Die Ergebnisse werden mit ``benchmarks/baseline.json`` verglichen; eine
+Verschlechterung über ``--tolerance`` führt zu Exit-Code 1. Die Baseline ist
+maschinenabhängig und wird nicht mitgeliefert – ohne sie wird nur gemessen
+(mit ``--require-baseline`` bricht der Lauf dann mit Exit-Code 2 ab).
+
+    python benchmarks/bench_hotpaths.py                    # messen + vergleichen
+    python benchmarks/bench_hotpaths.py --save-baseline    # Baseline neu schreiben
+    python benchmarks/bench_hotpaths.py --filter pdf_      # nur passende Fälle
+    python benchmarks/bench_hotpaths.py --require-baseline # ohne Baseline: Exit-Code 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+from unittest.mock import patch
+
+from common import SmtpSink, print_row, summarize
+
+from custom_components.wallbox_billing import _async_fetch_daily_stats, _send_email_sync
+from custom_components.wallbox_billing.pdf_generator import generate_invoice_pdf
+from custom_components.wallbox_billing.recipients import Recipients
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+PDF_ROWS = (0, 31, 366, 3650)
+STATS_DAYS = (31, 366, 3650)
+TIME_ZONE = "Europe/Berlin"
+SENSOR = "sensor.wallbox_zahlerstand"
+
+
+def _daily_rows(count: int, start: datetime.date) -> list[tuple[datetime.date, float]]:
+    return [
+        (start + datetime.timedelta(days=i), round(4.0 + (i * 7 % 13) * 0.85, 3))
+        for i in range(count)
+    ]
+
+
+def _pdf_case(rows: int) -> Callable[[], object]:
+    start = datetime.date(2016, 1, 1)
+    daily = _daily_rows(rows, start) if rows else None
+    consumption = sum(kwh for _, kwh in daily or [])
+    period_to = start + datetime.timedelta(days=max(rows, 1))
+
+    def run() -> bytes:
+        return generate_invoice_pdf(
+            "Benchmark",
+            "WB-BENCH-000",
+            "buchhaltung@example.invalid",
+            start,
+            period_to,
+            1000.0,
+            1000.0 + consumption,
+            0.30,
+            None,
+            daily,
+        )
+
+    return run
+
+
+def _stats_case(days: int) -> Callable[[], object]:
+    """Feeds ``_async_fetch_daily_stats`` synthetic daily sums (HA 2023.3+ format)."""
+    from homeassistant.util import dt as dt_util
+
+    tz = dt_util.get_time_zone(TIME_ZONE)
+    end = datetime.date(2026, 1, 31)
+    start = end - datetime.timedelta(days=days - 1)
+    rows = []
+    total = 1000.0
+    for day, kwh in _daily_rows(days + 2, start - datetime.timedelta(days=1)):
+        total += kwh
+        moment = datetime.datetime.combine(day, datetime.time(0, 0), tzinfo=tz)
+        rows.append({"start": moment.timestamp(), "sum": total})
+
+    fake_hass = SimpleNamespace(config=SimpleNamespace(time_zone=TIME_ZONE), data={})
+
+    class _Recorder:
+        async def async_add_executor_job(self, func, *args):
+            return func(*args)
+
+    def _statistics_during_period(*_args, **_kwargs):
+        return {SENSOR: rows}
+
+    loop = asyncio.new_event_loop()
+
+    def run() -> list:
+        with patch(
+            "homeassistant.components.recorder.get_instance", return_value=_Recorder()
+        ), patch(
+            "homeassistant.components.recorder.statistics.statistics_during_period",
+            _statistics_during_period,
+        ), patch(
+            # Sammelfenster des Batchers nicht mitmessen
+            "custom_components.wallbox_billing.stats_batch.BATCH_WINDOW",
+            0,
+        ):
+            return loop.run_until_complete(
+                _async_fetch_daily_stats(fake_hass, SENSOR, start, end)
+            )
+
+    return run
+
+
+def _smtp_case(sink: SmtpSink) -> Callable[[], object]:
+    pdf_bytes = _pdf_case(31)()
+    smtp_cfg = {
+        "host": "127.0.0.1",
+        "port": sink.port,
+        "username": "bench",
+        "password": "bench",
+        "from_email": "wallbox@example.invalid",
+        "use_tls": False,
+        "use_ssl": False,
+    }
+
+    def run() -> None:
+        _send_email_sync(
+            smtp_cfg,
+            Recipients(
+                to=["buchhaltung@example.invalid", "fuhrpark@example.invalid"],
+                bcc=["ich@example.invalid"],
+            ),
+            "Wallbox Ladekosten Benchmark",
+            "<p>Benchmark</p>",
+            pdf_bytes,
+            "Wallbox_Abrechnung_Benchmark.pdf",
+        )
+
+    return run
+
+
+def measure(run: Callable[[], object], runs: int) -> dict[str, float]:
+    run()  # Aufwärmen (Lazy-Imports, Fonts)
+    samples: list[float] = []
+    for _ in range(runs):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    stats = summarize(samples)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        stats["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return stats
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Fälle, deren Median oder Spitzen-Speicher die Baseline um > tolerance übersteigt."""
+    regressions: list[str] = []
+    unmatched = [name for name in results if name not in baseline]
+    if unmatched:
+        print(
+            f"WARNUNG: keine Baseline für {', '.join(unmatched)} – nicht verglichen",
+            file=sys.stderr,
+        )
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in ("median_ms", "peak_kib"):
+            if stats[key] > reference[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {stats[key]:.3f} > {reference[key]:.3f} (+{tolerance:.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    with SmtpSink() as sink:
+        cases: dict[str, Callable[[], Callable[[], object]]] = {
+            **{f"pdf_rows_{rows}": (lambda rows=rows: _pdf_case(rows)) for rows in PDF_ROWS},
+            **{f"stats_days_{days}": (lambda days=days: _stats_case(days)) for days in STATS_DAYS},
+            "smtp_send_31_rows_pdf": lambda: _smtp_case(sink),
+        }
+        for name, factory in cases.items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(factory(), args.runs)
+            print_row(name, results[name])
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for name, stats in results.items():
+            baseline[name] = {key: round(value, 3) for key, value in stats.items()}
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(
+            f"WARNUNG: keine Baseline unter {args.baseline} – es wurde NICHT verglichen.\n"
+            "Auf dem Referenzrechner mit --save-baseline anlegen.",
+            file=sys.stderr,
+        )
+        return 2 if args.require_baseline else 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for line in regressions:
+        print(f"  REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
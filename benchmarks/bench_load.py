@@ -0,0 +1,149 @@
+"""End-to-end load harness for Wallbox Billing.
+
+Startet einen Test-Home-Assistant mit ``--entries`` Config-Entries, leitet
+Recorder-Statistiken auf ``FakeStatistics`` um und versendet an einen lokalen
+SMTP-Sink. Danach werden die Service-Handler aller Entries in ``--rounds``
+Runden gleichzeitig aufgerufen und Durchsatz, Latenz-Perzentile sowie die
+Verzögerung des Event-Loops ausgegeben.
+
+Die Domain-Services sind pro Entry registriert (der zuletzt eingerichtete
+gewinnt); der Harness merkt sich daher beim Setup die echten Handler jedes
+Entries und ruft diese direkt mit einem ``ServiceCall`` auf.
+
+    python benchmarks/bench_load.py [--entries 20] [--rounds 5] [--service send_test_invoice]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import time
+from typing import Awaitable, Callable
+from unittest.mock import patch
+
+from common import (
+    DOMAIN,
+    SmtpSink,
+    async_add_entry,
+    async_hass,
+    entry_data,
+    fake_recorder,
+    print_row,
+    summarize,
+)
+
+SERVICES = ("send_test_invoice", "send_invoice", "send_sample_pdf", "send_annual_report")
+LAG_INTERVAL = 0.01
+
+
+class LoopLagMonitor:
+    """Misst, wie viel später als geplant ein periodischer Sleep zurückkehrt."""
+
+    def __init__(self, interval: float = LAG_INTERVAL) -> None:
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.samples: list[float] = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        assert self._task is not None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def setup_entries(hass, count: int, smtp_port: int, provider) -> dict[str, dict]:
+    """Richtet ``count`` Entries ein und gibt deren Service-Handler zurück."""
+    handlers: dict[str, dict[str, Callable[..., Awaitable]]] = {}
+    registry = type(hass.services)
+    register = registry.async_register
+    current: dict[str, Callable[..., Awaitable]] = {}
+
+    def _capture(self, domain, service, service_func, *args, **kwargs):
+        if domain == DOMAIN:
+            current[service] = service_func
+        return register(self, domain, service, service_func, *args, **kwargs)
+
+    # ServiceRegistry hat __slots__ – daher auf Klassenebene einhängen
+    with patch.object(registry, "async_register", _capture):
+        for index in range(count):
+            sensor = f"sensor.wallbox_bench_{index:03d}"
+            data = entry_data(index, smtp_port=smtp_port, energy_sensor=sensor)
+            # Zählerstand passend zu den synthetischen Recorder-Summen
+            start = datetime.date.fromisoformat(data["initial_date"])
+            reading = data["initial_reading"] + (
+                provider.sum_at_day_start(sensor, datetime.date.today())
+                - provider.sum_at_day_start(sensor, start)
+            )
+            hass.states.async_set(
+                sensor, f"{reading:.3f}", {"unit_of_measurement": "kWh", "device_class": "energy"}
+            )
+            current.clear()
+            entry = await async_add_entry(hass, data)
+            handlers[entry.entry_id] = dict(current)
+    return handlers
+
+
+async def run_load(entries: int, rounds: int, service: str) -> None:
+    from homeassistant.core import ServiceCall
+
+    with SmtpSink() as sink:
+        async with async_hass() as hass:
+            with fake_recorder(hass) as provider:
+                handlers = await setup_entries(hass, entries, sink.port, provider)
+                latencies: list[float] = []
+                failures = 0
+
+                async def _invoke(handler) -> None:
+                    nonlocal failures
+                    started = time.perf_counter()
+                    try:
+                        await handler(ServiceCall(hass, DOMAIN, service, {}))
+                    except Exception:  # noqa: BLE001
+                        failures += 1
+                    latencies.append(time.perf_counter() - started)
+
+                monitor = LoopLagMonitor()
+                monitor.start()
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    await asyncio.gather(
+                        *(_invoke(entry_handlers[service]) for entry_handlers in handlers.values())
+                    )
+                elapsed = time.perf_counter() - started
+                await monitor.stop()
+                await hass.async_block_till_done()
+
+                calls = entries * rounds
+                print(
+                    f"{service}: {calls} Aufrufe in {elapsed:.2f} s → {calls / elapsed:.1f}/s, "
+                    f"{failures} Fehler, {sink.stats['messages']} Mails, "
+                    f"{provider.calls} Recorder-Abfragen ({provider.rows} Zeilen)"
+                )
+                print_row("latency", summarize(latencies))
+                if monitor.samples:
+                    print_row("event loop lag", summarize(monitor.samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--service", choices=SERVICES, default="send_test_invoice")
+    args = parser.parse_args()
+    asyncio.run(run_load(args.entries, args.rounds, args.service))
+
+
+if __name__ == "__main__":
+    main()
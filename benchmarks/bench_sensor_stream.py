@@ -0,0 +1,135 @@
+"""Replay an S0 meter stream into the energy entity and measure sensor.py.
+
+Speist einen synthetischen (``s0_simulator.synthesize``) oder aufgezeichneten
+(``--replay verlauf.csv``) Zählerstrom mit ``--speedup`` facher Echtzeit in
+den Energiesensor eines Test-Home-Assistant und misst:
+
+- Callback-Kosten: Dauer von ``hass.states.async_set`` für den Energiesensor
+  abzüglich derselben Messung für eine nicht beobachtete Entity,
+- Schreibverstärkung: ``async_write_ha_state``-Aufrufe der Integration und
+  daraus entstandene ``state_changed``-Events je Eingangs-Update.
+
+    python benchmarks/bench_sensor_stream.py [--hours 6] [--speedup 100] [--reboots-per-day 2]
+    python benchmarks/bench_sensor_stream.py --replay history.csv --speedup 0
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from common import (
+    DOMAIN,
+    ENERGY_SENSOR,
+    async_add_entry,
+    async_hass,
+    entry_data,
+    print_row,
+    summarize,
+)
+from s0_simulator import S0Firmware, StreamConfig, load_replay, synthesize
+
+UNTRACKED_SENSOR = "sensor.wallbox_bench_untracked"
+ATTRIBUTES = {
+    "unit_of_measurement": "kWh",
+    "device_class": "energy",
+    "state_class": "total_increasing",
+}
+
+
+async def run_stream(events: list[tuple[float, str]], speedup: float) -> None:
+    from homeassistant.const import EVENT_STATE_CHANGED
+    from homeassistant.helpers import entity_registry as er
+    from homeassistant.helpers.entity import Entity
+
+    async with async_hass() as hass:
+        first_state = next(state for _, state in events if state != "unavailable")
+        hass.states.async_set(ENERGY_SENSOR, first_state, ATTRIBUTES)
+        entry = await async_add_entry(hass, entry_data(energy_sensor=ENERGY_SENSOR))
+        own_entities = {
+            item.entity_id
+            for item in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        }
+
+        counts = {"writes": 0, "state_changed": 0}
+        write_state = Entity.async_write_ha_state
+
+        def _counting_write(self) -> None:
+            if self.platform is not None and self.platform.platform_name == DOMAIN:
+                counts["writes"] += 1
+            write_state(self)
+
+        def _on_state_changed(event) -> None:
+            if event.data["entity_id"] in own_entities:
+                counts["state_changed"] += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _on_state_changed)
+        await hass.async_block_till_done()
+
+        tracked: list[float] = []
+        untracked: list[float] = []
+        loop = asyncio.get_running_loop()
+        started_wall = loop.time()
+        with patch.object(Entity, "async_write_ha_state", _counting_write):
+            for second, state in events:
+                if speedup > 0:
+                    delay = started_wall + second / speedup - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                attrs = {} if state == "unavailable" else ATTRIBUTES
+
+                started = time.perf_counter()
+                hass.states.async_set(UNTRACKED_SENSOR, state, attrs)
+                untracked.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                hass.states.async_set(ENERGY_SENSOR, state, attrs)
+                tracked.append(time.perf_counter() - started)
+            await hass.async_block_till_done()
+
+        updates = len(events)
+        writes, changed = counts["writes"], counts["state_changed"]
+        print(
+            f"{updates} Updates, {len(own_entities)} Entities der Integration, "
+            f"{writes} Writes ({writes / updates:.2f}/Update), "
+            f"{changed} state_changed ({changed / updates:.2f}/Update)"
+        )
+        print_row("async_set energy sensor", summarize(tracked))
+        print_row("async_set untracked (Referenz)", summarize(untracked))
+        overhead = sorted(a - b for a, b in zip(tracked, untracked))
+        print(f"Callback-Kosten (Median): {overhead[len(overhead) // 2] * 1e6:.1f} µs/Update")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=6.0)
+    parser.add_argument("--speedup", type=float, default=100.0, help="0 = so schnell wie möglich")
+    parser.add_argument("--reboots-per-day", type=float, default=2.0)
+    parser.add_argument("--raw-resets-per-day", type=float, default=0.5)
+    parser.add_argument("--sessions-per-day", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", help="HA-Verlaufsexport (CSV) statt synthetischem Strom")
+    args = parser.parse_args()
+
+    if args.replay:
+        events = list(load_replay(args.replay))
+    else:
+        firmware = S0Firmware()
+        config = StreamConfig(
+            days=args.hours / 24,
+            sessions_per_day=args.sessions_per_day,
+            reboots_per_day=args.reboots_per_day,
+            raw_resets_per_day=args.raw_resets_per_day,
+            seed=args.seed,
+        )
+        events = list(synthesize(config, firmware))
+        print(
+            f"Simuliert: {args.hours:g} h, {firmware.reboots} Neustarts, "
+            f"{firmware.lost_pulses} verlorene Impulse"
+        )
+    asyncio.run(run_stream(events, args.speedup))
+
+
+if __name__ == "__main__":
+    main()
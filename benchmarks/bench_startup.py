@@ -0,0 +1,90 @@
+"""Startup benchmark for Wallbox Billing.
+
+Misst
+- die Importzeit des Integrationspakets in einem frischen Interpreter
+  (Home-Assistant-Module sind vorab geladen, gemessen wird nur der Eigenanteil)
+  und prüft, dass Mail-Stack und fpdf2 dabei nicht geladen werden,
+- die Wall-Time von ``async_setup_entry`` (inkl. Plattformen) gegen einen
+  Test-Home-Assistant.
+
+    python benchmarks/bench_startup.py [--runs 20]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from common import (
+    ENERGY_SENSOR,
+    REPO_ROOT,
+    async_add_entry,
+    async_hass,
+    entry_data,
+    print_row,
+    summarize,
+)
+
+LAZY_MODULES = ("smtplib", "email.mime.multipart", "fpdf")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+import voluptuous, homeassistant.core, homeassistant.config_entries
+import homeassistant.helpers.config_validation, homeassistant.helpers.event
+import homeassistant.helpers.storage, homeassistant.helpers.dispatcher
+started = time.perf_counter()
+import custom_components.wallbox_billing
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def bench_import(runs: int) -> None:
+    samples: list[float] = []
+    eager: set[str] = set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["elapsed"])
+        eager.update(result["loaded"])
+    print_row("import custom_components.wallbox_billing", summarize(samples))
+    if eager:
+        print(f"  WARNUNG: beim Import geladen: {', '.join(sorted(eager))}")
+
+
+async def bench_setup(runs: int) -> None:
+    samples: list[float] = []
+    async with async_hass() as hass:
+        hass.states.async_set(
+            ENERGY_SENSOR, "1234.567", {"unit_of_measurement": "kWh", "device_class": "energy"}
+        )
+        for index in range(runs):
+            entry = await async_add_entry(hass, entry_data(index), setup=False)
+            started = time.perf_counter()
+            await hass.config_entries.async_setup(entry.entry_id)
+            samples.append(time.perf_counter() - started)
+            await hass.config_entries.async_unload(entry.entry_id)
+            await hass.config_entries.async_remove(entry.entry_id)
+            await hass.async_block_till_done()
+    print_row("async_setup_entry (incl. platforms)", summarize(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    bench_import(args.runs)
+    asyncio.run(bench_setup(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Shared helpers for the Wallbox Billing benchmarks.
+
+Die Benchmarks laufen offline gegen einen echten Home-Assistant-Kern aus
+``pytest-homeassistant-custom-component`` (siehe ``requirements.txt``):
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_startup.py
+"""
+from __future__ import annotations
+
+import datetime
+import random
+import socket
+import socketserver
+import statistics
+import sys
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DOMAIN = "wallbox_billing"
+ENERGY_SENSOR = "sensor.wallbox_zahlerstand"
+
+
+def free_port() -> int:
+    """Return a free TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def entry_data(
+    index: int = 0,
+    smtp_port: int = 2525,
+    energy_sensor: str = ENERGY_SENSOR,
+) -> dict:
+    """Config entry data as produced by the config flow."""
+    return {
+        "energy_sensor": energy_sensor,
+        "owner_name": f"Benchmark {index}",
+        "meter_number": f"WB-BENCH-{index:03d}",
+        "price_per_kwh": 0.30,
+        "initial_reading": 1000.0,
+        "initial_date": "2026-01-01",
+        "recipient_email": "buchhaltung@example.invalid",
+        "smtp_host": "127.0.0.1",
+        "smtp_port": smtp_port,
+        "smtp_from_email": "wallbox@example.invalid",
+        "smtp_username": "",
+        "smtp_password": "",
+        "smtp_use_tls": False,
+        "smtp_use_ssl": False,
+        "include_daily_stats": True,
+    }
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, QUIT."""
+
+    def _reply(self, line: bytes) -> None:
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self) -> None:
+        sink: SmtpSink = self.server.sink  # type: ignore[attr-defined]
+        sink.count("connections")
+        self._reply(b"220 sink ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self._reply(b"250-sink")
+                self._reply(b"250-8BITMIME")
+                self._reply(b"250 AUTH PLAIN")
+            elif command == b"AUTH":
+                self._reply(b"235 2.7.0 Authentication successful")
+            elif command == b"DATA":
+                self._reply(b"354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                    size += len(data_line)
+                sink.count("messages")
+                sink.count("bytes", size)
+                self._reply(b"250 2.0.0 OK")
+            elif command == b"QUIT":
+                self._reply(b"221 Bye")
+                return
+            else:
+                self._reply(b"250 OK")
+
+
+class SmtpSink:
+    """Local SMTP server that accepts and discards every message.
+
+        with SmtpSink() as sink:
+            ...  # smtp_port=sink.port
+            print(sink.stats)
+    """
+
+    def __init__(self) -> None:
+        self.stats = {"connections": 0, "messages": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._server: socketserver.ThreadingTCPServer | None = None
+        self.port = 0
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    def __enter__(self) -> SmtpSink:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+        server.daemon_threads = True
+        server.sink = self  # type: ignore[attr-defined]
+        self._server = server
+        self.port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, name="smtp_sink", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        assert self._server is not None
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeStatistics:
+    """Deterministic stand-in for ``statistics_during_period``.
+
+    Liefert kumulative ``sum``-Werte wie der Recorder (``start`` als
+    UTC-Timestamp). An gut der Hälfte der Tage wird 8–30 kWh geladen,
+    verteilt auf 18–22 Uhr Ortszeit; die Werte hängen nur von Sensor-ID und
+    Datum ab und sind damit über Läufe reproduzierbar.
+    """
+
+    ORIGIN = datetime.date(2020, 1, 1)
+    CHARGING_HOURS = range(18, 22)
+
+    def __init__(self, time_zone: datetime.tzinfo) -> None:
+        self._tz = time_zone
+        self._cumulative: dict[str, list[float]] = {}
+        self.calls = 0
+        self.rows = 0
+
+    def day_kwh(self, statistic_id: str, day: datetime.date) -> float:
+        rnd = random.Random(f"{statistic_id}:{day.toordinal()}")
+        return round(rnd.uniform(8.0, 30.0), 3) if rnd.random() < 0.55 else 0.0
+
+    def sum_at_day_start(self, statistic_id: str, day: datetime.date) -> float:
+        sums = self._cumulative.setdefault(statistic_id, [0.0])
+        index = (day - self.ORIGIN).days
+        while len(sums) <= index:
+            previous = self.ORIGIN + datetime.timedelta(days=len(sums) - 1)
+            sums.append(sums[-1] + self.day_kwh(statistic_id, previous))
+        return sums[max(index, 0)]
+
+    def sum_at(self, statistic_id: str, moment: datetime.datetime) -> float:
+        local = moment.astimezone(self._tz)
+        total = self.sum_at_day_start(statistic_id, local.date())
+        charged_hours = sum(1 for hour in self.CHARGING_HOURS if hour < local.hour)
+        return total + self.day_kwh(statistic_id, local.date()) * charged_hours / len(
+            self.CHARGING_HOURS
+        )
+
+    def __call__(
+        self, hass, start_time, end_time, statistic_ids, period, units=None, types=None
+    ) -> dict[str, list[dict]]:
+        self.calls += 1
+        result: dict[str, list[dict]] = {}
+        for statistic_id in statistic_ids:
+            rows: list[dict] = []
+            moment = start_time.astimezone(self._tz)
+            if period == "day":
+                moment = datetime.datetime.combine(moment.date(), datetime.time(0), self._tz)
+            while moment < end_time:
+                rows.append(
+                    {
+                        "start": moment.timestamp(),
+                        "sum": round(self.sum_at(statistic_id, moment), 3),
+                    }
+                )
+                if period == "day":
+                    next_day = moment.date() + datetime.timedelta(days=1)
+                    moment = datetime.datetime.combine(next_day, datetime.time(0), self._tz)
+                else:
+                    moment = (
+                        moment.astimezone(datetime.timezone.utc) + datetime.timedelta(hours=1)
+                    ).astimezone(self._tz)
+            self.rows += len(rows)
+            result[statistic_id] = rows
+        return result
+
+
+class _FakeRecorder:
+    def __init__(self, hass) -> None:
+        self._hass = hass
+
+    def async_add_executor_job(self, target, *args):
+        return self._hass.async_add_executor_job(target, *args)
+
+
+@contextmanager
+def fake_recorder(hass) -> Iterator[FakeStatistics]:
+    """Route the integration's recorder statistics queries to ``FakeStatistics``."""
+    from homeassistant.util import dt as dt_util
+
+    provider = FakeStatistics(dt_util.get_time_zone(hass.config.time_zone))
+    with patch(
+        "homeassistant.components.recorder.get_instance", return_value=_FakeRecorder(hass)
+    ), patch(
+        "homeassistant.components.recorder.statistics.statistics_during_period", provider
+    ):
+        yield provider
+
+
+@asynccontextmanager
+async def async_hass() -> AsyncIterator:
+    """Boot a test Home Assistant core with custom integrations enabled."""
+    from homeassistant import loader
+    from homeassistant.setup import async_setup_component
+    from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+        await async_setup_component(
+            hass,
+            "http",
+            {"http": {"server_host": "127.0.0.1", "server_port": free_port()}},
+        )
+        yield hass
+
+
+async def async_add_entry(hass, data: dict, setup: bool = True):
+    """Add (and optionally set up) a Wallbox Billing config entry."""
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    entry = MockConfigEntry(domain=DOMAIN, data=data, title=data["owner_name"])
+    entry.add_to_hass(hass)
+    if setup:
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    return entry
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Median/p95/min/max of a list of durations (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def print_row(name: str, stats: dict[str, float]) -> None:
+    cells = "  ".join(f"{key}={value:9.3f}" for key, value in stats.items())
+    print(f"{name:<40} {cells}")
@@ -0,0 +1,153 @@
+"""Synthetic S0 pulse stream modelled on ``esphome/wallbox.yaml``.
+
+Die Firmware zählt S0-Impulse (1000 imp/kWh) über den Hardware-Zähler
+``wallbox_raw_pulses_boot``, übernimmt alle 10 s das Delta in
+``wallbox_pulses_runtime`` und schreibt nur alle 50 Impulse einen Checkpoint
+in den Flash. ``S0Firmware`` bildet das inklusive ``float``-Rundung nach:
+
+- ``reboot()``: Stromausfall/Neustart – nicht gesicherte Impulse (< 50) gehen
+  verloren, der Zählerstand springt zurück; ``wallbox_last_raw_pulses`` = 0.
+- ``reset_raw_counter()``: Hardware-Zähler beginnt ohne Neustart bei 0
+  (Zweig ``raw_now < last_raw_pulses`` im Intervall-Lambda).
+
+``synthesize`` erzeugt daraus einen Strom von (Sekunde, Zustand) mit
+Ladevorgängen, Neustarts und Ausfallzeiten; ``load_replay`` liest einen
+CSV-Verlaufsexport aus Home Assistant (``entity_id,state,last_changed``).
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+import random
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+IMPULSES_PER_KWH = 1000
+INTERVAL_SECONDS = 10
+CHECKPOINT_PULSES = 50
+UNAVAILABLE = "unavailable"
+
+
+def _f32(value: float) -> float:
+    """Rundet wie ``float`` (32 Bit) auf dem ESP32."""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class S0Firmware:
+    """Python model of the pulse bookkeeping in ``esphome/wallbox.yaml``."""
+
+    def __init__(self, base_kwh: float = 0.0, pulses: int = 2_775_010) -> None:
+        self.base_kwh = _f32(base_kwh)
+        self.pulses_runtime = pulses
+        self.pulses_persisted = pulses
+        self.unsaved_pulses = 0
+        self.last_raw_pulses = 0
+        self.raw_pulses_boot = 0
+        self.reboots = 0
+        self.lost_pulses = 0
+
+    def pulse(self, count: int) -> None:
+        """Impulse am GPIO (Hardware-Zähler seit Boot)."""
+        self.raw_pulses_boot += count
+
+    def tick(self) -> None:
+        """Intervall-Lambda (alle 10 s)."""
+        raw_now = self.raw_pulses_boot
+        if raw_now >= self.last_raw_pulses:
+            delta = raw_now - self.last_raw_pulses
+        else:
+            delta = raw_now
+        self.last_raw_pulses = raw_now
+        if delta == 0:
+            return
+        self.pulses_runtime += delta
+        self.unsaved_pulses += delta
+        if self.unsaved_pulses >= CHECKPOINT_PULSES:
+            self.pulses_persisted = self.pulses_runtime
+            self.unsaved_pulses = 0
+
+    def reboot(self) -> None:
+        """Neustart: Laufzeitwerte weg, ``on_boot`` stellt den Checkpoint her."""
+        self.lost_pulses += self.pulses_runtime - self.pulses_persisted
+        self.pulses_runtime = self.pulses_persisted
+        self.unsaved_pulses = 0
+        self.last_raw_pulses = 0
+        self.raw_pulses_boot = 0
+        self.reboots += 1
+
+    def reset_raw_counter(self) -> None:
+        self.raw_pulses_boot = 0
+
+    @property
+    def total_kwh(self) -> float:
+        return _f32(self.base_kwh + _f32(_f32(float(self.pulses_runtime)) / 1000.0))
+
+    @property
+    def state(self) -> str:
+        return f"{self.total_kwh:.3f}"
+
+
+@dataclass
+class StreamConfig:
+    days: float = 7.0
+    charge_power_w: float = 11000.0
+    sessions_per_day: float = 0.8
+    session_hours: tuple[float, float] = (1.0, 4.0)
+    reboots_per_day: float = 0.3
+    downtime_seconds: tuple[int, int] = (20, 600)
+    raw_resets_per_day: float = 0.0
+    seed: int = 1
+
+
+def synthesize(
+    config: StreamConfig, firmware: S0Firmware | None = None
+) -> Iterator[tuple[int, str]]:
+    """Yield (Sekunde seit Start, Zustand) alle 10 s – wie die Firmware publiziert.
+
+    Während einer Ausfallzeit wird einmal ``unavailable`` gemeldet.
+    """
+    rnd = random.Random(config.seed)
+    firmware = firmware or S0Firmware()
+    ticks_per_day = 86400 // INTERVAL_SECONDS
+    total_ticks = int(config.days * ticks_per_day)
+    # W → Impulse je Intervall: kWh/Intervall * imp/kWh
+    pulses_per_tick = config.charge_power_w * INTERVAL_SECONDS / 3_600_000 * IMPULSES_PER_KWH
+
+    charging_until = -1
+    down_until = -1
+    fraction = 0.0
+    for tick in range(total_ticks):
+        second = tick * INTERVAL_SECONDS
+        if tick < down_until:
+            continue
+        if tick == down_until:
+            firmware.reboot()
+
+        if tick > charging_until and rnd.random() < config.sessions_per_day / ticks_per_day:
+            hours = rnd.uniform(*config.session_hours)
+            charging_until = tick + int(hours * 3600 / INTERVAL_SECONDS)
+        if tick <= charging_until:
+            fraction += pulses_per_tick
+            whole = int(fraction)
+            fraction -= whole
+            firmware.pulse(whole)
+
+        if rnd.random() < config.raw_resets_per_day / ticks_per_day:
+            firmware.reset_raw_counter()
+        firmware.tick()
+        yield second, firmware.state
+
+        if rnd.random() < config.reboots_per_day / ticks_per_day:
+            down_until = tick + 1 + rnd.randint(*config.downtime_seconds) // INTERVAL_SECONDS
+            yield second + 1, UNAVAILABLE
+
+
+def load_replay(path: str) -> Iterator[tuple[float, str]]:
+    """Liest einen HA-Verlaufsexport (CSV: ``entity_id,state,last_changed``)."""
+    with open(path, encoding="utf-8", newline="") as fp:
+        start: datetime.datetime | None = None
+        for row in csv.DictReader(fp):
+            moment = datetime.datetime.fromisoformat(row["last_changed"].replace("Z", "+00:00"))
+            start = start or moment
+            yield (moment - start).total_seconds(), row["state"]
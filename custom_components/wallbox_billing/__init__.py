@@ -1,22 +1,41 @@
 """Wallbox Billing – Home Assistant custom integration."""
 from __future__ import annotations
 
+import asyncio
 import datetime
 import logging
 import random
-import smtplib
-from email.mime.application import MIMEApplication
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import time
+from dataclasses import dataclass, field
 
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.storage import Store
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_state_change_event, async_track_time_change
 from homeassistant.util import dt as dt_util
 
+from .archive import ARCHIVE_DIR, InvoiceArchive
 from .const import (
+    CONF_ADDITIONAL_METERS,
+    ATTR_END_DATE,
+    ATTR_FORMAT,
+    ATTR_LOCALE,
+    ATTR_PERIOD,
+    ATTR_RESOLUTION,
+    ATTR_START_DATE,
+    ATTR_YEAR,
+    CONF_ARCHIVE_RETENTION_MONTHS,
+    CONF_BILLING_DAY,
+    CONF_BILLING_TIME,
     CONF_DAILY_STATS_HOUR,
     CONF_ENERGY_SENSOR,
     CONF_INCLUDE_DAILY_STATS,
@@ -24,9 +43,12 @@ from .const import (
     CONF_INITIAL_DATE,
     CONF_INITIAL_READING,
     CONF_METER_NUMBER,
+    CONF_MAIL_LANGUAGE,
     CONF_OWNER_NAME,
     CONF_PRICE_PER_KWH,
-    CONF_RECIPIENT_EMAIL,
+    CONF_RENDER_MODE,
+    CONF_RENDER_WORKERS,
+    CONF_SCHEDULE_ENABLED,
     CONF_SMTP_FROM_EMAIL,
     CONF_SMTP_HOST,
     CONF_SMTP_PASSWORD,
@@ -34,35 +56,144 @@ from .const import (
     CONF_SMTP_USE_SSL,
     CONF_SMTP_USE_TLS,
     CONF_SMTP_USERNAME,
+    DEFAULT_ARCHIVE_RETENTION_MONTHS,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_BILLING_TIME,
     DEFAULT_DAILY_STATS_HOUR,
     DEFAULT_INCLUDE_DAILY_STATS,
+    DEFAULT_MAIL_LANGUAGE,
+    DEFAULT_RENDER_MODE,
+    DEFAULT_RENDER_WORKERS,
+    DEFAULT_SCHEDULE_ENABLED,
     DOMAIN,
+    ROLLUP_NIGHTLY_HOUR,
+    ROLLUP_NIGHTLY_MINUTE,
+    SERVICE_EXPORT_CONSUMPTION,
+    SERVICE_PREVIEW_INVOICE,
+    SERVICE_REGENERATE_ARCHIVE,
+    SERVICE_RESEND_INVOICE,
+    SERVICE_SEND_ANNUAL_REPORT,
     SERVICE_SEND_INVOICE,
     SERVICE_SEND_SAMPLE_PDF,
     SERVICE_SEND_TEST_INVOICE,
-    STORAGE_KEY,
-    STORAGE_VERSION,
+    SIGNAL_READING_UPDATED,
+    SIGNAL_STORED_LOADED,
+    SIGNAL_TIMINGS_UPDATED,
+)
+from .anomalies import flag_days
+from .daily_ledger import STORED_LEDGER_KEY, DailyLedger
+from .external_stats import IMPORT_MINUTE, STORED_STATS_KEY, ExternalStatisticsImporter
+from .forecast import STORED_FORECAST_KEY, WeekdayProfile
+from .mail_templates import MailTemplates, RenderedMail, get_mail_templates
+from .meters import STORED_METER_READINGS_KEY, parse_additional_meters
+from .recipients import Recipients, recipients_from_config
+from .meter_guard import (
+    SAVE_DELAY as GUARD_SAVE_DELAY,
+    STORED_GUARD_KEY,
+    MeterGuard,
+)
+from .render_pool import RenderPool
+from .stats_batch import get_batcher
+from .storage import BillingStore
+from .timing import (
+    STAGE_MIME_BUILD,
+    STAGE_RENDER,
+    STAGE_SMTP_AUTH,
+    STAGE_SMTP_CONNECT,
+    STAGE_SMTP_SEND,
+    STAGE_STATE_READ,
+    STAGE_STATS_FETCH,
+    STAGE_STORE_SAVE,
+    PerfCounters,
+    StageTimings,
+)
+from .rollups import (
+    STORED_ROLLUPS_KEY,
+    merge_daily_into_rollups,
+    missing_months,
+    month_bounds,
+    yearly_summary,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor", "button"]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Register the invoice download view once per HA instance."""
+    from .views import WallboxInvoiceView  # noqa: PLC0415
+
+    hass.http.register_view(WallboxInvoiceView())
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Wallbox Billing from a config entry."""
+    setup_started = time.perf_counter()
     hass.data.setdefault(DOMAIN, {})
 
-    store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry.entry_id}")
-    stored = await store.async_load() or {}
+    counters = PerfCounters()
+    store = BillingStore(hass, entry.entry_id, counters)
 
-    hass.data[DOMAIN][entry.entry_id] = {
-        "config": {**entry.data, **entry.options},
+    # "stored" wird erst nach dem Laden befüllt; bis dahin melden sich die
+    # Sensoren als nicht verfügbar (siehe "stored_loaded").
+    config = {**entry.data, **entry.options}
+    data = hass.data[DOMAIN][entry.entry_id] = {
+        "config": config,
         "store": store,
-        "stored": stored,
+        "stored": store.data,
+        "stored_loaded": False,
+        "archive": InvoiceArchive(
+            hass.config.path(ARCHIVE_DIR, entry.entry_id),
+            int(config.get(CONF_ARCHIVE_RETENTION_MONTHS, DEFAULT_ARCHIVE_RETENTION_MONTHS)),
+        ),
+        # Eigener Pool, damit PDF-Rendering nicht den HA-Executor belegt
+        "render_pool": RenderPool(
+            config.get(CONF_RENDER_MODE, DEFAULT_RENDER_MODE),
+            int(config.get(CONF_RENDER_WORKERS, DEFAULT_RENDER_WORKERS)),
+        ),
+        "timings": StageTimings(),
+        "counters": counters,
+        "additional_meters": _additional_meters(config),
     }
 
+    # Storage laden und Plattformen parallel einrichten
+    load_task = hass.async_create_task(store.async_load())
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    await load_task
+
+    # Zählerstrom prüfen (Rücksprünge nach Neustart, Resets, Ausfälle)
+    data["meter_guard"] = MeterGuard(data["stored"].setdefault(STORED_GUARD_KEY, {}))
+    data["forecast"] = WeekdayProfile(data["stored"].setdefault(STORED_FORECAST_KEY, {}))
+    data["daily_ledger"] = DailyLedger(data["stored"].setdefault(STORED_LEDGER_KEY, {}))
+    # Tageswechsel während HA aus war → Lücke in der Tagesliste
+    data["daily_ledger"].resume(dt_util.now().date())
+    data["external_stats"] = ExternalStatisticsImporter(
+        hass, entry.entry_id, entry.title, data["stored"].setdefault(STORED_STATS_KEY, {})
+    )
+    _async_check_reading(hass, entry.entry_id, hass.states.get(config[CONF_ENERGY_SENSOR]))
+
+    @callback
+    def _handle_meter_update(event) -> None:
+        if event.data["entity_id"] == config[CONF_ENERGY_SENSOR]:
+            _async_check_reading(hass, entry.entry_id, event.data.get("new_state"))
+        else:
+            _async_observe_total(hass, data)
+        async_dispatcher_send(hass, SIGNAL_READING_UPDATED.format(entry_id=entry.entry_id))
+
+    entry.async_on_unload(
+        async_track_state_change_event(
+            hass,
+            [config[CONF_ENERGY_SENSOR], *(m["sensor"] for m in data["additional_meters"])],
+            _handle_meter_update,
+        )
+    )
+    data["stored_loaded"] = True
+    async_dispatcher_send(hass, SIGNAL_STORED_LOADED.format(entry_id=entry.entry_id))
+
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     async def _handle_send_invoice(call: ServiceCall) -> None:
@@ -74,6 +205,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async def _handle_send_sample_pdf(call: ServiceCall) -> None:
         await _async_send_sample_pdf(hass, entry, call)
 
+    async def _handle_send_annual_report(call: ServiceCall) -> None:
+        await _async_send_annual_report(hass, entry, call)
+
+    async def _handle_resend_invoice(call: ServiceCall) -> None:
+        await _async_resend_invoice(hass, entry, call)
+
+    async def _handle_regenerate_archive(call: ServiceCall) -> ServiceResponse:
+        return await _async_regenerate_archive(hass, entry, call)
+
+    async def _handle_export_consumption(call: ServiceCall) -> ServiceResponse:
+        return await _async_export_consumption(hass, entry, call)
+
+    async def _handle_preview_invoice(call: ServiceCall) -> ServiceResponse:
+        return await _async_preview_invoice(hass, entry)
+
+    async def _handle_nightly_rollup(now: datetime.datetime) -> None:
+        # Vortag auch ohne Zählerupdate ins Wochentagsprofil und die Tagesliste übernehmen
+        data["forecast"].roll(dt_util.as_local(now).date())
+        data["daily_ledger"].roll(dt_util.as_local(now).date())
+        async_dispatcher_send(hass, SIGNAL_READING_UPDATED.format(entry_id=entry.entry_id))
+        await _async_update_rollups(hass, entry)
+        # Aufbewahrungsfrist auch ohne neue Rechnung anwenden (z. B. nach Verkürzung)
+        try:
+            await hass.async_add_executor_job(data["archive"].evict)
+        except OSError as exc:
+            _LOGGER.warning("Archiv-Bereinigung fehlgeschlagen: %s", exc)
+
     hass.services.async_register(
         DOMAIN, SERVICE_SEND_INVOICE, _handle_send_invoice, schema=vol.Schema({})
     )
@@ -83,7 +241,94 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.services.async_register(
         DOMAIN, SERVICE_SEND_SAMPLE_PDF, _handle_send_sample_pdf, schema=vol.Schema({})
     )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_ANNUAL_REPORT,
+        _handle_send_annual_report,
+        schema=vol.Schema(
+            {vol.Optional(ATTR_YEAR): vol.All(vol.Coerce(int), vol.Range(min=2000, max=2100))}
+        ),
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESEND_INVOICE,
+        _handle_resend_invoice,
+        schema=vol.Schema({vol.Optional(ATTR_PERIOD): vol.Match(r"^\d{4}(-\d{2})?$")}),
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REGENERATE_ARCHIVE,
+        _handle_regenerate_archive,
+        schema=vol.Schema({vol.Optional(ATTR_PERIOD): vol.Match(r"^\d{4}(-\d{2})?$")}),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_CONSUMPTION,
+        _handle_export_consumption,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_START_DATE): cv.date,
+                vol.Optional(ATTR_END_DATE): cv.date,
+                vol.Optional(ATTR_RESOLUTION, default="day"): vol.In(
+                    ["day", "hour", "session"]
+                ),
+                vol.Optional(ATTR_FORMAT, default="csv"): vol.In(["csv", "json"]),
+                vol.Optional(ATTR_LOCALE): vol.In(["de", "en"]),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PREVIEW_INVOICE,
+        _handle_preview_invoice,
+        schema=vol.Schema({}),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    # Monats-Rollups nächtlich fortschreiben (Vortag ist dann im Recorder komplett)
+    entry.async_on_unload(
+        async_track_time_change(
+            hass,
+            _handle_nightly_rollup,
+            hour=ROLLUP_NIGHTLY_HOUR,
+            minute=ROLLUP_NIGHTLY_MINUTE,
+            second=0,
+        )
+    )
+
+    async def _handle_statistics_import(now: datetime.datetime) -> None:
+        await _async_import_statistics(hass, entry)
+
+    # Stündlich Verbrauch und Kosten als externe Statistik nachtragen
+    entry.async_on_unload(
+        async_track_time_change(
+            hass, _handle_statistics_import, minute=IMPORT_MINUTE, second=0
+        )
+    )
+
+    if config.get(CONF_SCHEDULE_ENABLED, DEFAULT_SCHEDULE_ENABLED):
+        from .scheduler import BillingScheduler  # noqa: PLC0415
 
+        scheduler = BillingScheduler(
+            hass,
+            data,
+            int(config.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)),
+            datetime.time.fromisoformat(config.get(CONF_BILLING_TIME, DEFAULT_BILLING_TIME)),
+            lambda: _async_prepare_invoice(hass, entry),
+            lambda draft: _async_finalize_scheduled_invoice(hass, entry, draft),
+        )
+        entry.async_on_unload(scheduler.async_start())
+        data["scheduler"] = scheduler
+
+    _LOGGER.debug(
+        "Setup %s in %.1f ms", entry.entry_id, (time.perf_counter() - setup_started) * 1000
+    )
     return True
 
 
@@ -91,7 +336,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data is not None:
+            data["render_pool"].shutdown()
+            # Gebündelte Änderungen nicht bis zum HA-Stopp liegen lassen
+            await data["store"].async_flush()
     return unloaded
 
 
@@ -101,12 +350,49 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+def _additional_meters(cfg: dict) -> list[dict]:
+    """Weitere Zähler aus den Optionen (ungültige Angaben → keine, mit Fehler-Log)."""
+    try:
+        return parse_additional_meters(cfg.get(CONF_ADDITIONAL_METERS))
+    except ValueError as exc:
+        _LOGGER.error("Weitere Zähler ignoriert: %s", exc)
+        return []
+
+
+def _smtp_config(cfg: dict) -> dict:
+    """SMTP-Parameter für _send_email_sync aus der Entry-Konfiguration."""
+    return {
+        "host": cfg[CONF_SMTP_HOST],
+        "port": int(cfg[CONF_SMTP_PORT]),
+        "username": cfg.get(CONF_SMTP_USERNAME, ""),
+        "password": cfg.get(CONF_SMTP_PASSWORD, ""),
+        "from_email": cfg[CONF_SMTP_FROM_EMAIL],
+        "use_tls": cfg.get(CONF_SMTP_USE_TLS, True),
+        "use_ssl": cfg.get(CONF_SMTP_USE_SSL, False),
+    }
+
+
+def _mail_templates(data: dict) -> MailTemplates:
+    """Kompilierte E-Mail-Vorlagen in der konfigurierten Sprache."""
+    cfg = data["config"]
+    return get_mail_templates(
+        data, cfg.get(CONF_MAIL_LANGUAGE, DEFAULT_MAIL_LANGUAGE), cfg[CONF_OWNER_NAME]
+    )
+
+
+def _stats_sensor_id(cfg: dict) -> str:
+    """Optionaler separater Statistik-Sensor; Fallback auf Haupt-Energiesensor."""
+    return cfg.get(CONF_STATS_SENSOR) or cfg[CONF_ENERGY_SENSOR]
+
+
 async def _async_fetch_daily_stats(
     hass: HomeAssistant,
     sensor_id: str,
     start_date: datetime.date,
     end_date: datetime.date,
     hour: int = 0,  # reserviert für Kompatibilität, wird bei period="day" nicht genutzt
+    counters: PerfCounters | None = None,
+    missing: set[datetime.date] | None = None,
 ) -> list[tuple[datetime.date, float]]:
     """Tagesverbrauch aus HA Recorder-Statistiken (Tagesauflösung).
 
@@ -115,17 +401,9 @@ async def _async_fetch_daily_stats(
     zurück – kein datetime-Objekt. Beide Formate werden korrekt behandelt.
 
     Gibt für jeden Kalendertag von start_date bis end_date ein (date, kwh)-Tupel zurück.
-    Fehlen Datenpunkte für einen Tag, wird 0.0 verwendet.
+    Fehlen Datenpunkte für einen Tag, wird 0.0 verwendet und der Tag – falls
+    übergeben – in ``missing`` eingetragen.
     """
-    try:
-        from homeassistant.components.recorder import get_instance  # noqa: PLC0415
-        from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
-            statistics_during_period,
-        )
-    except ImportError:
-        _LOGGER.warning("Recorder nicht verfügbar – Tagesübersicht übersprungen")
-        return []
-
     local_tz = dt_util.get_time_zone(hass.config.time_zone)
 
     # Einen Tag vor start_date benötigen wir, um die Differenz für start_date zu berechnen
@@ -141,22 +419,20 @@ async def _async_fetch_daily_stats(
     )
 
     try:
-        recorder = get_instance(hass)
-        stats = await recorder.async_add_executor_job(
-            statistics_during_period,
-            hass,
-            query_start,
-            query_end,
-            {sensor_id},
-            "day",
-            None,   # keine Einheitenumrechnung – Sensor liefert bereits kWh
-            {"sum"},
-        )
+        # Gleichzeitige Abrufe (weitere Zähler, andere Entries) teilen sich eine Abfrage
+        rows, owner = await get_batcher(hass).async_fetch(sensor_id, query_start, query_end)
+    except ImportError:
+        _LOGGER.warning("Recorder nicht verfügbar – Tagesübersicht übersprungen")
+        return []
     except Exception as exc:  # noqa: BLE001
         _LOGGER.warning("Recorder-Abfrage fehlgeschlagen: %s", exc)
         return []
 
-    if not stats or sensor_id not in stats:
+    if counters is not None:
+        counters.increment("recorder_queries" if owner else "recorder_queries_coalesced")
+        counters.sample("recorder_rows", len(rows))
+
+    if not rows:
         _LOGGER.debug("Keine Statistiken für Sensor %s gefunden", sensor_id)
         return []
 
@@ -164,7 +440,7 @@ async def _async_fetch_daily_stats(
     # HA 2023.3+: entry["start"] ist float (Unix-Timestamp)
     # ältere HA:  entry["start"] ist datetime-Objekt
     sum_by_date: dict[datetime.date, float] = {}
-    for entry in stats[sensor_id]:
+    for entry in rows:
         # Attributzugriff funktioniert sowohl für dict als auch für TypedDict/dataclass
         ts_raw = entry.get("start") if isinstance(entry, dict) else getattr(entry, "start", None)
         val = entry.get("sum") if isinstance(entry, dict) else getattr(entry, "sum", None)
@@ -204,6 +480,8 @@ async def _async_fetch_daily_stats(
         else:
             _LOGGER.debug("Keine Recorder-Daten für %s (prev=%s, curr=%s)", current, sum_prev, sum_curr)
             consumption = 0.0
+            if missing is not None:
+                missing.add(current)
 
         result.append((current, consumption))
         prev_date = current
@@ -212,33 +490,160 @@ async def _async_fetch_daily_stats(
     return result
 
 
-async def _async_send_invoice(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    call: ServiceCall,
-    *,
-    test_mode: bool = False,
-) -> None:
-    """Generate PDF invoice and send via SMTP.
+@dataclass
+class _MeterSection:
+    """Weiterer Zähler derselben Rechnung (ohne MeterGuard-Korrektur)."""
+
+    sensor_id: str
+    meter_number: str
+    last_reading: float
+    current_reading: float
+
+    @property
+    def consumption(self) -> float:
+        return self.current_reading - self.last_reading
+
+
+@dataclass
+class _InvoiceDraft:
+    """Vorbereitete Abrechnung: alle Eingaben für PDF und Mail plus gerendertes PDF."""
+
+    last_reading: float
+    current_reading: float
+    last_date: datetime.date
+    today: datetime.date
+    start_datetime: datetime.datetime
+    price_per_kwh: float
+    daily_data: list[tuple[datetime.date, float]] | None
+    pdf_bytes: bytes = b""
+    # Tage ohne Recorder-Daten (in daily_data als 0,0 kWh, siehe anomalies.py)
+    missing_days: set[datetime.date] = field(default_factory=set)
+    # Dauer je Pipeline-Stufe in Sekunden (siehe timing.py)
+    timings: dict[str, float] = field(default_factory=dict)
+    # Zählerereignisse im Abrechnungszeitraum (siehe meter_guard.py)
+    meter_events: list[dict] = field(default_factory=list)
+    # Weitere Zähler (siehe meters.py); Verbrauch und Betrag sind die Summe
+    meters: list[_MeterSection] = field(default_factory=list)
+
+    @property
+    def consumption(self) -> float:
+        return self.current_reading - self.last_reading + sum(
+            meter.consumption for meter in self.meters
+        )
+
+    @property
+    def total_cost(self) -> float:
+        return self.consumption * self.price_per_kwh
 
-    Im test_mode werden KEINE gespeicherten Werte (last_reading, last_datetime etc.)
-    verändert und kein Event gefeuert.
-    """
-    data = hass.data[DOMAIN][entry.entry_id]
-    cfg = data["config"]
-    stored = data["stored"]
 
-    sensor_id = cfg[CONF_ENERGY_SENSOR]
+def _parse_reading(state) -> float | None:
+    """Rohwert eines Zustands oder None (nicht verfügbar / ungültig)."""
+    if state is None or state.state in ("unknown", "unavailable"):
+        return None
+    try:
+        return float(state.state)
+    except ValueError:
+        return None
+
+
+@callback
+def _async_check_reading(hass: HomeAssistant, entry_id: str, state) -> None:
+    """Leitet ein Sensor-Update durch MeterGuard und Wochentagsprofil und speichert beide."""
+    data = hass.data[DOMAIN][entry_id]
+    raw = _parse_reading(state)
+    new_events = data["meter_guard"].update(raw, dt_util.utcnow())
+    _async_observe_total(hass, data)
+    _async_report_meter_events(hass, entry_id, new_events)
+    # Ereignisse sofort, den laufenden Rohwert gebündelt speichern
+    data["store"].async_schedule_save(1 if new_events else GUARD_SAVE_DELAY)
+
+
+@callback
+def _async_report_meter_events(hass: HomeAssistant, entry_id: str, events: list[dict]) -> None:
+    """Protokolliert neue Zählerereignisse und feuert je eines als Event."""
+    data = hass.data[DOMAIN][entry_id]
+    for event in events:
+        _LOGGER.warning(
+            "Zählerereignis %s (%s – %s): %.3f kWh, Korrektur-Offset jetzt %.3f kWh",
+            event["kind"],
+            event["start"],
+            event["end"],
+            event["kwh"],
+            data["meter_guard"].offset,
+        )
+        hass.bus.async_fire(f"{DOMAIN}_meter_event", {"entry_id": entry_id, **event})
+
+
+@callback
+def _async_observe_total(hass: HomeAssistant, data: dict) -> None:
+    """Schreibt Wochentagsprofil und Tagesliste mit der Summe aller Zählerstände fort."""
+    raw = _parse_reading(hass.states.get(data["config"][CONF_ENERGY_SENSOR]))
+    if raw is None:
+        data["daily_ledger"].interrupt()
+        return
+    total = data["meter_guard"].corrected(raw)
+    for meter in data["additional_meters"]:
+        reading = _parse_reading(hass.states.get(meter["sensor"]))
+        if reading is None:
+            # Ohne alle Zähler wäre die Summe zu klein
+            data["daily_ledger"].interrupt()
+            return
+        total += reading
+    today = dt_util.now().date()
+    data["forecast"].observe(total, today)
+    data["daily_ledger"].observe(total, today)
+
+
+def _read_sensor_reading(hass: HomeAssistant, sensor_id: str) -> float | None:
+    """Rohwert eines Energiesensors oder None (mit Fehler-Log)."""
     state = hass.states.get(sensor_id)
     if state is None or state.state in ("unknown", "unavailable"):
         _LOGGER.error("Sensor %s nicht verfügbar – Abrechnung abgebrochen", sensor_id)
-        return
+        return None
 
     try:
-        current_reading = float(state.state)
+        return float(state.state)
     except ValueError:
         _LOGGER.error("Ungültiger Sensorwert: %s", state.state)
-        return
+        return None
+
+
+def _read_current_reading(hass: HomeAssistant, entry_id: str) -> float | None:
+    """Aktueller (korrigierter) Zählerstand des Energiesensors oder None (mit Fehler-Log)."""
+    data = hass.data[DOMAIN][entry_id]
+    raw = _read_sensor_reading(hass, data["config"][CONF_ENERGY_SENSOR])
+    guard: MeterGuard | None = data.get("meter_guard")
+    if raw is None or guard is None:
+        return raw
+    # Idempotent, falls das Update schon verarbeitet wurde; erkennt erst dieser
+    # Aufruf einen Rücksprung, wird er wie beim Sensor-Update gemeldet
+    new_events = guard.update(raw, dt_util.utcnow())
+    if new_events:
+        _async_report_meter_events(hass, entry_id, new_events)
+        data["store"].async_schedule_save(1)
+    return guard.corrected(raw)
+
+
+async def _async_prepare_invoice(
+    hass: HomeAssistant, entry: ConfigEntry, render: bool = True
+) -> _InvoiceDraft | None:
+    """Liest Zählerstände, holt die Tagesstatistiken und rendert das PDF.
+
+    Verändert keine gespeicherten Werte – das passiert erst beim Versand.
+    Mit ``render=False`` (Vorschau) wird kein PDF erzeugt.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    stored = data["stored"]
+    timings: StageTimings = data["timings"]
+    run: dict[str, float] = {}
+
+    with timings.span(STAGE_STATE_READ, run):
+        current_reading = _read_current_reading(hass, entry.entry_id)
+        meters = _read_meter_sections(hass, data)
+    if current_reading is None or meters is None:
+        _async_finish_timings(hass, entry.entry_id, run)
+        return None
 
     # Letzten Abrechnungsstand aus Speicher laden
     last_reading = stored.get("last_reading")
@@ -246,7 +651,6 @@ async def _async_send_invoice(
     last_datetime_str = stored.get("last_datetime")
 
     today = datetime.date.today()
-    now = datetime.datetime.now()
 
     if last_reading is None:
         # Erste Abrechnung: Startwerte aus Konfiguration
@@ -274,100 +678,369 @@ async def _async_send_invoice(
         else:
             start_datetime = datetime.datetime.combine(last_date, datetime.time(0, 0))
 
-    owner_name = cfg[CONF_OWNER_NAME]
-    meter_number = cfg[CONF_METER_NUMBER]
-    recipient_email = cfg[CONF_RECIPIENT_EMAIL]
-    price_per_kwh = float(cfg[CONF_PRICE_PER_KWH])
-
-    # Tagesstatistiken aus Recorder holen (wenn Option aktiv)
-    # Optionaler separater Statistik-Sensor; Fallback auf Haupt-Energiesensor
+    # Tagesstatistiken (wenn Option aktiv): aus der live geführten Tagesliste,
+    # sonst aus dem Recorder – optional von einem separaten Statistik-Sensor
     daily_data = None
+    missing_days: set[datetime.date] = set()
     if cfg.get(CONF_INCLUDE_DAILY_STATS, DEFAULT_INCLUDE_DAILY_STATS):
-        stats_sensor_id = cfg.get(CONF_STATS_SENSOR) or sensor_id
-        stats_hour = int(cfg.get(CONF_DAILY_STATS_HOUR, DEFAULT_DAILY_STATS_HOUR))
-        daily_data = await _async_fetch_daily_stats(
-            hass, stats_sensor_id, last_date, today, stats_hour
+        daily_data = _ledger_daily_data(data, last_date, today)
+        if daily_data is None:
+            stats_sensor_id = _stats_sensor_id(cfg)
+            stats_hour = int(cfg.get(CONF_DAILY_STATS_HOUR, DEFAULT_DAILY_STATS_HOUR))
+            with timings.span(STAGE_STATS_FETCH, run):
+                daily_data = await _async_fetch_combined_daily_stats(
+                    hass,
+                    data,
+                    [stats_sensor_id, *(m.sensor_id for m in meters)],
+                    last_date,
+                    today,
+                    stats_hour,
+                    missing=missing_days,
+                )
+
+    draft = _InvoiceDraft(
+        last_reading=last_reading,
+        current_reading=current_reading,
+        last_date=last_date,
+        today=today,
+        start_datetime=start_datetime,
+        price_per_kwh=float(cfg[CONF_PRICE_PER_KWH]),
+        daily_data=daily_data,
+        timings=run,
+        meters=meters,
+        missing_days=missing_days,
+    )
+    guard: MeterGuard | None = data.get("meter_guard")
+    if guard is not None:
+        start_utc = dt_util.as_utc(
+            start_datetime
+            if start_datetime.tzinfo
+            else start_datetime.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
         )
+        draft.meter_events = guard.events_between(start_utc, dt_util.utcnow())
+    if render:
+        await _async_render_invoice(hass, entry.entry_id, draft)
+    return draft
+
 
+async def _async_render_invoice(
+    hass: HomeAssistant, entry_id: str, draft: _InvoiceDraft
+) -> None:
+    """Rendert das PDF für einen Entwurf (ohne Recorder-Abfrage)."""
     # Lazy import (fpdf2 wird erst beim ersten Start installiert)
     from .pdf_generator import generate_invoice_pdf  # noqa: PLC0415
 
-    pdf_bytes = await hass.async_add_executor_job(
-        generate_invoice_pdf,
-        owner_name,
-        meter_number,
-        recipient_email,
-        last_date,
-        today,
-        last_reading,
-        current_reading,
-        price_per_kwh,
-        start_datetime,
-        daily_data,
+    data = hass.data[DOMAIN][entry_id]
+    cfg = data["config"]
+    with data["timings"].span(STAGE_RENDER, draft.timings):
+        draft.pdf_bytes = await data["render_pool"].async_run(
+            generate_invoice_pdf,
+            cfg[CONF_OWNER_NAME],
+            cfg[CONF_METER_NUMBER],
+            ", ".join(recipients_from_config(cfg).to),
+            draft.last_date,
+            draft.today,
+            draft.last_reading,
+            draft.current_reading,
+            draft.price_per_kwh,
+            draft.start_datetime,
+            draft.daily_data,
+            [_meter_event_row(event) for event in draft.meter_events],
+            [(m.meter_number, m.last_reading, m.current_reading) for m in draft.meters],
+            sorted(draft.missing_days),
+        )
+    data["counters"].sample("pdf_bytes_invoice", len(draft.pdf_bytes))
+
+
+def _ledger_daily_data(
+    data: dict, start: datetime.date, end: datetime.date
+) -> list[tuple[datetime.date, float]] | None:
+    """Tageswerte aus der Tagesliste; None, wenn sie den Zeitraum nicht abdeckt.
+
+    Mit separatem Statistik-Sensor bleibt der Recorder maßgeblich.
+    """
+    ledger: DailyLedger | None = data.get("daily_ledger")
+    if data["config"].get(CONF_STATS_SENSOR) or ledger is None or not ledger.covers(start, end):
+        return None
+    data["counters"].increment("daily_from_ledger")
+    return ledger.daily_data(start, end)
+
+
+def _read_meter_sections(hass: HomeAssistant, data: dict) -> list[_MeterSection] | None:
+    """Stände der weiteren Zähler; None, wenn einer nicht verfügbar ist."""
+    last_readings = data["stored"].get(STORED_METER_READINGS_KEY, {})
+    sections: list[_MeterSection] = []
+    for meter in data["additional_meters"]:
+        reading = _read_sensor_reading(hass, meter["sensor"])
+        if reading is None:
+            return None
+        sections.append(
+            _MeterSection(
+                sensor_id=meter["sensor"],
+                meter_number=meter["meter_number"],
+                last_reading=float(last_readings.get(meter["sensor"], meter["initial_reading"])),
+                current_reading=reading,
+            )
+        )
+    return sections
+
+
+async def _async_fetch_combined_daily_stats(
+    hass: HomeAssistant,
+    data: dict,
+    sensor_ids: list[str] | None,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    hour: int = 0,
+    missing: set[datetime.date] | None = None,
+) -> list[tuple[datetime.date, float]]:
+    """Tageswerte aller Zähler, je Tag summiert.
+
+    Alle Zähler werden gleichzeitig abgefragt (eine gemeinsame Recorder-Abfrage,
+    siehe stats_batch.py). Ohne ``sensor_ids`` der Statistik-Sensor plus alle
+    weiteren Zähler aus den Optionen.
+    """
+    if sensor_ids is None:
+        sensor_ids = [
+            _stats_sensor_id(data["config"]),
+            *(m["sensor"] for m in data["additional_meters"]),
+        ]
+    per_meter = await asyncio.gather(
+        *(
+            _async_fetch_daily_stats(
+                hass,
+                sensor_id,
+                start_date,
+                end_date,
+                hour,
+                counters=data["counters"],
+                missing=missing,
+            )
+            for sensor_id in sensor_ids
+        )
     )
+    return _combine_daily(per_meter)
+
+
+def _combine_daily(
+    per_meter: list[list[tuple[datetime.date, float]]],
+) -> list[tuple[datetime.date, float]]:
+    """Summiert die Tageswerte mehrerer Zähler (alle decken denselben Zeitraum ab).
+
+    Fehlen die Werte eines Zählers, fehlt die Tagesübersicht insgesamt.
+    """
+    if len(per_meter) == 1:
+        return per_meter[0]
+    if not all(per_meter):
+        return []
+    return [(days[0][0], sum(kwh for _, kwh in days)) for days in zip(*per_meter)]
+
+
+def _meter_event_row(event: dict) -> tuple[datetime.datetime, datetime.datetime, str, float]:
+    """Zählerereignis für das PDF: (Beginn lokal, Ende lokal, Art, kWh)."""
+    return (
+        dt_util.as_local(datetime.datetime.fromisoformat(event["start"])),
+        dt_util.as_local(datetime.datetime.fromisoformat(event["end"])),
+        event["kind"],
+        float(event["kwh"]),
+    )
+
+
+async def _async_send_invoice(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    call: ServiceCall,
+    *,
+    test_mode: bool = False,
+) -> None:
+    """Generate PDF invoice and send via SMTP.
+
+    Im test_mode werden KEINE gespeicherten Werte (last_reading, last_datetime etc.)
+    verändert und kein Event gefeuert.
+    """
+    draft = await _async_prepare_invoice(hass, entry)
+    if draft is None:
+        return
+    await _async_deliver_invoice(hass, entry, draft, test_mode=test_mode)
+
+
+async def _async_finalize_scheduled_invoice(
+    hass: HomeAssistant, entry: ConfigEntry, draft: _InvoiceDraft
+) -> bool:
+    """Prüft zum Termin nur den Zählerstand eines vorbereiteten Entwurfs und sendet.
+
+    Hat sich der Zählerstand seit dem Vorab-Rendering geändert, wird mit den
+    bereits geholten bzw. aus der Tagesliste aktualisierten Tageswerten neu
+    gerendert (keine Recorder-Abfrage).
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    current_reading = _read_current_reading(hass, entry.entry_id)
+    meters = _read_meter_sections(hass, data)
+    if current_reading is None or meters is None:
+        return False
+
+    meters_changed = [m.current_reading for m in meters] != [
+        m.current_reading for m in draft.meters
+    ]
+    unchanged = draft.today == datetime.date.today() and not meters_changed and (
+        abs(current_reading - draft.current_reading) < 0.0005
+    )
+    data["counters"].hit("prerendered_invoice", unchanged)
+    if draft.today != datetime.date.today():
+        # Vorab-Rendering stammt vom Vortag – Zeitraum stimmt nicht mehr
+        draft = await _async_prepare_invoice(hass, entry)
+        if draft is None:
+            return False
+    elif not unchanged:
+        _LOGGER.debug(
+            "Zählerstand seit Vorab-Rendering geändert (%.3f → %.3f kWh) – rendere neu",
+            draft.current_reading,
+            current_reading,
+        )
+        draft.current_reading = current_reading
+        draft.meters = meters
+        if draft.daily_data is not None:
+            ledger_daily = _ledger_daily_data(data, draft.last_date, draft.today)
+            if ledger_daily is not None:
+                draft.daily_data = ledger_daily
+                draft.missing_days = set()
+        await _async_render_invoice(hass, entry.entry_id, draft)
+
+    return await _async_deliver_invoice(hass, entry, draft)
+
+
+async def _async_deliver_invoice(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    draft: _InvoiceDraft,
+    *,
+    test_mode: bool = False,
+) -> bool:
+    """Sendet einen vorbereiteten Entwurf und speichert den neuen Abrechnungsstand.
+
+    Gibt True zurück, wenn die E-Mail versendet wurde.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    stored = data["stored"]
+
+    recipients = recipients_from_config(cfg)
+    last_date = draft.last_date
+    today = draft.today
+    price_per_kwh = draft.price_per_kwh
+    pdf_bytes = draft.pdf_bytes
+    now = datetime.datetime.now()
 
     period_label = last_date.strftime("%Y-%m")
     filename = f"Wallbox_Abrechnung_{period_label}.pdf"
 
-    smtp_cfg = {
-        "host": cfg[CONF_SMTP_HOST],
-        "port": int(cfg[CONF_SMTP_PORT]),
-        "username": cfg.get(CONF_SMTP_USERNAME, ""),
-        "password": cfg.get(CONF_SMTP_PASSWORD, ""),
-        "from_email": cfg[CONF_SMTP_FROM_EMAIL],
-        "use_tls": cfg.get(CONF_SMTP_USE_TLS, True),
-        "use_ssl": cfg.get(CONF_SMTP_USE_SSL, False),
-    }
+    smtp_cfg = _smtp_config(cfg)
 
-    consumption = current_reading - last_reading
-    total_cost = consumption * price_per_kwh
-    test_prefix = "TEST: " if test_mode else ""
-    subject = (
-        f"{test_prefix}Wallbox Ladekosten {last_date.strftime('%B %Y')} – "
-        f"{total_cost:.2f} €"
-    )
-    body = (
-        f"<p>Guten Tag,</p>"
-        f"{('<p><strong style=\"color:#cc0000\">[TEST-E-Mail – keine Werte wurden gespeichert]</strong></p>' if test_mode else '')}"
-        f"<p>anbei finden Sie die Erstattungsanforderung für die Ladekosten "
-        f"des Dienstfahrzeuges an der privaten Wallbox.</p>"
-        f"<table style='border-collapse:collapse;font-family:sans-serif'>"
-        f"<tr><td style='padding:4px 12px'>Zeitraum:</td>"
-        f"<td style='padding:4px 12px'>{last_date.strftime('%d.%m.%Y')} – "
-        f"{today.strftime('%d.%m.%Y')}</td></tr>"
-        f"<tr><td style='padding:4px 12px'>Verbrauch:</td>"
-        f"<td style='padding:4px 12px'>{consumption:.3f} kWh</td></tr>"
-        f"<tr><td style='padding:4px 12px'>Preis/kWh:</td>"
-        f"<td style='padding:4px 12px'>{price_per_kwh:.4f} €</td></tr>"
-        f"<tr><td style='padding:4px 12px'><strong>Gesamtbetrag:</strong></td>"
-        f"<td style='padding:4px 12px'><strong>{total_cost:.2f} €</strong></td></tr>"
-        f"</table>"
-        f"<p>Die Abrechnung ist als PDF-Anhang beigefügt.</p>"
-        f"<p>Mit freundlichen Grüßen,<br/>{owner_name}</p>"
+    consumption = draft.consumption
+    total_cost = draft.total_cost
+    mail = _mail_templates(data).invoice(
+        last_date,
+        today,
+        consumption,
+        price_per_kwh,
+        total_cost,
+        meters=[
+            (cfg[CONF_METER_NUMBER], draft.current_reading - draft.last_reading),
+            *((m.meter_number, m.consumption) for m in draft.meters),
+        ]
+        if draft.meters
+        else None,
+        test_mode=test_mode,
     )
 
+    timings: StageTimings = data["timings"]
+    smtp_timings: dict[str, float] = {}
     try:
-        await hass.async_add_executor_job(
-            _send_email_sync, smtp_cfg, recipient_email, subject, body, pdf_bytes, filename
+        await _async_send_email(
+            hass,
+            data,
+            smtp_cfg,
+            recipients,
+            mail,
+            pdf_bytes,
+            filename,
+            smtp_timings,
         )
     except Exception as exc:  # noqa: BLE001
         _LOGGER.error("E-Mail-Versand fehlgeschlagen: %s", exc)
-        return
+        timings.record_many(smtp_timings, draft.timings)
+        _async_finish_timings(hass, entry.entry_id, draft.timings)
+        return False
+    timings.record_many(smtp_timings, draft.timings)
+
+    if not test_mode:
+        await _async_archive_pdf(
+            hass,
+            data,
+            pdf_bytes,
+            {
+                "period": period_label,
+                "kind": "invoice",
+                "filename": filename,
+                "subject": mail.subject,
+                "period_from": last_date.isoformat(),
+                "period_to": today.isoformat(),
+                # Rohwerte, damit die Rechnung neu gerendert werden kann
+                "reading_previous": draft.last_reading,
+                "reading_current": draft.current_reading,
+                "price_per_kwh": price_per_kwh,
+                "consumption": round(consumption, 3),
+                "total_cost": round(total_cost, 2),
+                "meter_events": len(draft.meter_events),
+                "meters": [
+                    {
+                        "meter_number": m.meter_number,
+                        "reading_previous": m.last_reading,
+                        "reading_current": m.current_reading,
+                    }
+                    for m in draft.meters
+                ],
+            },
+        )
 
     if test_mode:
+        _async_finish_timings(hass, entry.entry_id, draft.timings)
         _LOGGER.info(
             "Test-Abrechnung gesendet (keine Werte geändert): %.3f kWh, %.2f €",
             consumption,
             total_cost,
         )
-        return
-
-    # Persistenten Zustand nur bei echter Abrechnung speichern
-    stored["last_reading"] = current_reading
-    stored["last_date"] = today.isoformat()
-    stored["last_datetime"] = now.isoformat()
-    data["stored"] = stored
-    await data["store"].async_save(stored)
+        return True
+
+    # Persistenten Zustand nur bei echter Abrechnung fortschreiben
+    changes = {
+        "last_reading": draft.current_reading,
+        STORED_METER_READINGS_KEY: {
+            **stored.get(STORED_METER_READINGS_KEY, {}),
+            **{m.sensor_id: m.current_reading for m in draft.meters},
+        },
+        "last_date": today.isoformat(),
+        "last_datetime": now.isoformat(),
+    }
+    if "daily_ledger" in data:
+        # Tagesliste beginnt mit dem neuen Zeitraum
+        data["daily_ledger"].start_period(today)
+        changes[STORED_LEDGER_KEY] = stored[STORED_LEDGER_KEY]
+    if "meter_guard" in data:
+        # Ausgewiesene Zählerereignisse sind abgerechnet
+        data["meter_guard"].prune(dt_util.utcnow())
+    if draft.daily_data:
+        # Abgeschlossene Tage gleich als Monats-Rollups materialisieren
+        merge_daily_into_rollups(
+            stored.setdefault(STORED_ROLLUPS_KEY, {}),
+            [(day, kwh) for day, kwh in draft.daily_data if day < today],
+            price_per_kwh,
+        )
+    # Abrechnungsstand sofort ins Journal, der übrige Zustand folgt gebündelt
+    with timings.span(STAGE_STORE_SAVE, draft.timings):
+        await data["store"].async_commit(changes)
+    _async_finish_timings(hass, entry.entry_id, draft.timings)
 
     hass.bus.async_fire(f"{DOMAIN}_invoice_sent", {"entry_id": entry.entry_id})
     _LOGGER.info(
@@ -375,6 +1048,15 @@ async def _async_send_invoice(
         consumption,
         total_cost,
     )
+    return True
+
+
+@callback
+def _async_finish_timings(hass: HomeAssistant, entry_id: str, run: dict[str, float]) -> None:
+    """Schließt die Zeitmessung eines Laufs ab: Debug-Log und Sensor-Update."""
+    summary = hass.data[DOMAIN][entry_id]["timings"].finish_run(run)
+    _LOGGER.debug("Abrechnung Stufen-Dauer: %s", summary)
+    async_dispatcher_send(hass, SIGNAL_TIMINGS_UPDATED.format(entry_id=entry_id))
 
 
 async def _async_send_sample_pdf(
@@ -412,11 +1094,12 @@ async def _async_send_sample_pdf(
 
     from .pdf_generator import generate_invoice_pdf  # noqa: PLC0415
 
-    pdf_bytes = await hass.async_add_executor_job(
+    recipients = recipients_from_config(cfg)
+    pdf_bytes = await data["render_pool"].async_run(
         generate_invoice_pdf,
         owner_name,
         meter_number,
-        cfg[CONF_RECIPIENT_EMAIL],
+        ", ".join(recipients.to),
         period_from,
         today,
         reading_prev,
@@ -426,75 +1109,487 @@ async def _async_send_sample_pdf(
         daily_data,
     )
 
-    recipient_email = cfg[CONF_RECIPIENT_EMAIL]
     filename = f"Wallbox_Beispiel_{today.strftime('%Y-%m')}.pdf"
-    smtp_cfg = {
-        "host": cfg[CONF_SMTP_HOST],
-        "port": int(cfg[CONF_SMTP_PORT]),
-        "username": cfg.get(CONF_SMTP_USERNAME, ""),
-        "password": cfg.get(CONF_SMTP_PASSWORD, ""),
-        "from_email": cfg[CONF_SMTP_FROM_EMAIL],
-        "use_tls": cfg.get(CONF_SMTP_USE_TLS, True),
-        "use_ssl": cfg.get(CONF_SMTP_USE_SSL, False),
-    }
+    smtp_cfg = _smtp_config(cfg)
     consumption = reading_curr - reading_prev
     total_cost = consumption * price_per_kwh
-    subject = f"Wallbox Abrechnung – Beispiel-PDF ({today.strftime('%B %Y')})"
-    body = (
-        f"<p>Guten Tag,</p>"
-        f"<p><strong>[BEISPIEL-PDF – enthält keine echten Werte]</strong></p>"
-        f"<p>Anbei finden Sie eine Beispiel-Abrechnung zur Ansicht der PDF-Vorlage.</p>"
-        f"<table style='border-collapse:collapse;font-family:sans-serif'>"
-        f"<tr><td style='padding:4px 12px'>Zeitraum:</td>"
-        f"<td style='padding:4px 12px'>{period_from.strftime('%d.%m.%Y')} – {today.strftime('%d.%m.%Y')}</td></tr>"
-        f"<tr><td style='padding:4px 12px'>Verbrauch (Beispiel):</td>"
-        f"<td style='padding:4px 12px'>{consumption:.3f} kWh</td></tr>"
-        f"<tr><td style='padding:4px 12px'><strong>Betrag (Beispiel):</strong></td>"
-        f"<td style='padding:4px 12px'><strong>{total_cost:.2f} €</strong></td></tr>"
-        f"</table>"
-        f"<p>Mit freundlichen Grüßen,<br/>{owner_name}</p>"
-    )
+    mail = _mail_templates(data).sample(period_from, today, consumption, total_cost)
 
     try:
-        await hass.async_add_executor_job(
-            _send_email_sync, smtp_cfg, recipient_email, subject, body, pdf_bytes, filename
+        await _async_send_email(
+            hass, data, smtp_cfg, recipients, mail, pdf_bytes, filename
         )
     except Exception as exc:  # noqa: BLE001
         _LOGGER.error("Beispiel-PDF-Versand fehlgeschlagen: %s", exc)
         return
 
-    _LOGGER.info("Beispiel-PDF erfolgreich gesendet an %s", recipient_email)
+    _LOGGER.info("Beispiel-PDF erfolgreich gesendet an %s", recipients)
+
+
+async def _async_update_rollups(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Schreibt den Monats-Rollup des Vortages aus dem Recorder fort (nächtlich)."""
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is None:
+        return
+    cfg = data["config"]
+    stored = data["stored"]
+
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    # Summe aller Zähler – wie die bei der Abrechnung geschriebenen Rollups
+    daily_data = await _async_fetch_combined_daily_stats(
+        hass, data, None, yesterday.replace(day=1), yesterday
+    )
+    if not daily_data:
+        return
+
+    changed = merge_daily_into_rollups(
+        stored.setdefault(STORED_ROLLUPS_KEY, {}),
+        daily_data,
+        float(cfg[CONF_PRICE_PER_KWH]),
+    )
+    if changed:
+        data["store"].async_schedule_save()
+        _LOGGER.debug("Monats-Rollups aktualisiert: %s", ", ".join(changed))
+
+
+async def _async_import_statistics(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Importiert die Stunden seit dem Wasserstand als externe Statistik (stündlich)."""
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is None:
+        return
+    cfg = data["config"]
+    initial_date = cfg.get(CONF_INITIAL_DATE)
+    try:
+        imported = await data["external_stats"].async_import(
+            _stats_sensor_id(cfg),
+            float(cfg[CONF_PRICE_PER_KWH]),
+            datetime.date.fromisoformat(initial_date) if initial_date else datetime.date.today(),
+        )
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.warning("Import der externen Statistik fehlgeschlagen: %s", exc)
+        return
+    if imported:
+        data["counters"].increment("statistics_hours_imported", imported)
+        data["store"].async_schedule_save()
+
+
+async def _async_send_annual_report(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    call: ServiceCall,
+) -> None:
+    """Erstellt die Jahresübersicht aus den Monats-Rollups und sendet sie per E-Mail.
+
+    Nur Monate ohne (vollständigen) Rollup werden – in einer einzigen
+    Abfrage über die betroffene Spanne – aus dem Recorder nachgeladen.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    stored = data["stored"]
+
+    today = datetime.date.today()
+    year = int(call.data.get(ATTR_YEAR, today.year - 1))
+    rollups = stored.setdefault(STORED_ROLLUPS_KEY, {})
+
+    missing = missing_months(rollups, year, today)
+    counters: PerfCounters = data["counters"]
+    # Monate, die aus Rollups kommen (Treffer) bzw. nachgeladen werden müssen
+    considered = sum(1 for month in range(1, 13) if datetime.date(year, month, 1) <= today)
+    counters.hit("monthly_rollups", True, considered - len(missing))
+    counters.hit("monthly_rollups", False, len(missing))
+    if missing:
+        span_start = month_bounds(*missing[0])[0]
+        span_end = min(month_bounds(*missing[-1])[1], today - datetime.timedelta(days=1))
+        _LOGGER.debug(
+            "Jahresübersicht %s: %d Monate fehlen – Recorder-Abfrage %s bis %s",
+            year,
+            len(missing),
+            span_start,
+            span_end,
+        )
+        if span_start <= span_end:
+            daily_data = await _async_fetch_combined_daily_stats(
+                hass, data, None, span_start, span_end
+            )
+            if merge_daily_into_rollups(rollups, daily_data, float(cfg[CONF_PRICE_PER_KWH])):
+                data["store"].async_schedule_save()
+
+    months = yearly_summary(rollups, year)
+    if not months:
+        _LOGGER.error("Keine Verbrauchsdaten für %s vorhanden – Jahresübersicht abgebrochen", year)
+        return
+
+    from .pdf_generator import generate_annual_summary_pdf  # noqa: PLC0415
+
+    owner_name = cfg[CONF_OWNER_NAME]
+    pdf_bytes = await data["render_pool"].async_run(
+        generate_annual_summary_pdf,
+        owner_name,
+        cfg[CONF_METER_NUMBER],
+        year,
+        months,
+        # Die Monatswerte enthalten alle Zähler (siehe _async_fetch_combined_daily_stats)
+        [m["meter_number"] for m in data["additional_meters"]],
+    )
+    counters.sample("pdf_bytes_annual", len(pdf_bytes))
+
+    total_kwh = sum(kwh for _, kwh, _ in months)
+    total_cost = sum(cost for _, _, cost in months)
+    recipients = recipients_from_config(cfg)
+    filename = f"Wallbox_Jahresuebersicht_{year}.pdf"
+    mail = _mail_templates(data).annual(year, total_kwh, total_cost)
+
+    try:
+        await _async_send_email(
+            hass, data, _smtp_config(cfg), recipients, mail, pdf_bytes, filename
+        )
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.error("Versand der Jahresübersicht fehlgeschlagen: %s", exc)
+        return
+
+    await _async_archive_pdf(
+        hass,
+        data,
+        pdf_bytes,
+        {
+            "period": str(year),
+            "kind": "annual",
+            "filename": filename,
+            "subject": mail.subject,
+            "consumption": round(total_kwh, 3),
+            "total_cost": round(total_cost, 2),
+        },
+    )
+    _LOGGER.info("Jahresübersicht %s gesendet: %.3f kWh, %.2f €", year, total_kwh, total_cost)
+
+
+async def _async_archive_pdf(
+    hass: HomeAssistant, data: dict, pdf_bytes: bytes, record: dict
+) -> None:
+    """Legt ein versendetes PDF im Archiv ab; Fehler brechen den Versand nicht ab."""
+    try:
+        await hass.async_add_executor_job(data["archive"].add, pdf_bytes, record)
+    except OSError as exc:
+        _LOGGER.warning("PDF konnte nicht archiviert werden: %s", exc)
+
+
+async def _async_resend_invoice(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    call: ServiceCall,
+) -> None:
+    """Sendet eine archivierte Rechnung erneut – ohne Recorder-Abfrage und Rendering."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    archive: InvoiceArchive = data["archive"]
+
+    period = call.data.get(ATTR_PERIOD)
+    if period:
+        record = await hass.async_add_executor_job(archive.get, period)
+    else:
+        record = await hass.async_add_executor_job(archive.latest)
+    if record is None:
+        _LOGGER.error("Keine archivierte Rechnung für %s gefunden", period or "letzte Periode")
+        return
+
+    try:
+        pdf_bytes = await hass.async_add_executor_job(archive.read_pdf, record)
+    except OSError as exc:
+        _LOGGER.error("Archivierte Rechnung %s nicht lesbar: %s", record["period"], exc)
+        return
+
+    recipients = recipients_from_config(cfg)
+    mail = _mail_templates(data).resend(
+        record["subject"],
+        record["filename"],
+        datetime.date.fromisoformat(record["created"][:10]),
+    )
+
+    try:
+        await _async_send_email(
+            hass,
+            data,
+            _smtp_config(cfg),
+            recipients,
+            mail,
+            pdf_bytes,
+            record["filename"],
+        )
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.error("Erneuter Versand fehlgeschlagen: %s", exc)
+        return
+
+    _LOGGER.info("Archivierte Rechnung %s erneut gesendet", record["period"])
+
+
+async def _async_regenerate_archive(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Rendert archivierte Rechnungen mit dem aktuellen Layout neu (z. B. nach einem Update).
+
+    Die neuen PDFs werden zusätzlich archiviert und ersetzen im Index die
+    bisherigen Einträge ihrer Periode; versendet wird nichts.
+    """
+    from .batch_render import async_render_invoice_batch, spec_from_record  # noqa: PLC0415
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    archive: InvoiceArchive = data["archive"]
+
+    period = call.data.get(ATTR_PERIOD, "")
+    records = [
+        record
+        for record in await hass.async_add_executor_job(archive.records)
+        # Nur Rechnungen mit archivierten Rohwerten lassen sich neu rendern
+        if record.get("kind", "invoice") == "invoice"
+        and "reading_previous" in record
+        and record["period"].startswith(period)
+    ]
+    # Je Periode nur der neueste Eintrag
+    latest = list({record["period"]: record for record in records}.values())
+    if not latest:
+        _LOGGER.warning(
+            "Keine archivierten Rechnungen für %s vorhanden", period or "alle Perioden"
+        )
+        return {"regenerated": 0}
+
+    specs = [
+        spec_from_record(
+            record,
+            cfg[CONF_OWNER_NAME],
+            cfg[CONF_METER_NUMBER],
+            ", ".join(recipients_from_config(cfg).to),
+        )
+        for record in latest
+    ]
+    try:
+        pdfs = await async_render_invoice_batch(hass, specs)
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.error("Neu-Rendern des Archivs fehlgeschlagen: %s", exc)
+        return {"regenerated": 0}
+
+    def _archive_all() -> None:
+        for record, pdf_bytes in zip(latest, pdfs):
+            base = {
+                key: value
+                for key, value in record.items()
+                if key not in ("sha256", "size", "created")
+            }
+            archive.add(pdf_bytes, {**base, "regenerated": True})
+
+    try:
+        await hass.async_add_executor_job(_archive_all)
+    except OSError as exc:
+        _LOGGER.error("Neu gerenderte Rechnungen konnten nicht archiviert werden: %s", exc)
+        return {"regenerated": 0}
+
+    _LOGGER.info("%d archivierte Rechnung(en) neu gerendert", len(pdfs))
+    return {"regenerated": len(pdfs), "periods": [record["period"] for record in latest]}
+
+
+async def _async_preview_invoice(hass: HomeAssistant, entry: ConfigEntry) -> ServiceResponse:
+    """Werte der nächsten Rechnung inkl. markierter Tage – ohne PDF und Versand."""
+    draft = await _async_prepare_invoice(hass, entry, render=False)
+    if draft is None:
+        return {}
+
+    days: list[dict] = []
+    anomalies: dict[str, int] = {}
+    for day, kwh, flags in flag_days(draft.daily_data or [], draft.missing_days):
+        days.append(
+            {
+                "date": day.isoformat(),
+                "kwh": round(kwh, 3),
+                "cost": round(kwh * draft.price_per_kwh, 2),
+                "flags": list(flags),
+            }
+        )
+        for flag in flags:
+            anomalies[flag] = anomalies.get(flag, 0) + 1
+    return {
+        "period_from": draft.last_date.isoformat(),
+        "period_to": draft.today.isoformat(),
+        "consumption_kwh": round(draft.consumption, 3),
+        "price_per_kwh": draft.price_per_kwh,
+        "total_cost": round(draft.total_cost, 2),
+        "meter_events": len(draft.meter_events),
+        "days": days,
+        "anomalies": anomalies,
+    }
+
+
+async def _async_export_consumption(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Exportiert Verbrauch/Kosten als CSV oder JSON in das Konfigurationsverzeichnis.
+
+    Standardzeitraum ist der laufende Abrechnungszeitraum bis heute.
+    """
+    from .export import EXPORT_DIR, async_export_consumption  # noqa: PLC0415
+    from .formatting import normalize_locale  # noqa: PLC0415
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    cfg = data["config"]
+    stored = data["stored"]
+
+    today = datetime.date.today()
+    default_start = stored.get("last_date") or cfg.get(CONF_INITIAL_DATE)
+    start_date = call.data.get(ATTR_START_DATE) or (
+        datetime.date.fromisoformat(default_start) if default_start else today.replace(day=1)
+    )
+    end_date = call.data.get(ATTR_END_DATE) or today
+    if end_date < start_date:
+        _LOGGER.error("Export: Enddatum %s liegt vor Startdatum %s", end_date, start_date)
+        return {}
+
+    resolution = call.data.get(ATTR_RESOLUTION, "day")
+    fmt = call.data.get(ATTR_FORMAT, "csv")
+    locale = call.data.get(ATTR_LOCALE) or normalize_locale(hass.config.language)
+    path = hass.config.path(
+        EXPORT_DIR,
+        f"wallbox_{entry.entry_id}_{start_date.isoformat()}_{end_date.isoformat()}_{resolution}.{fmt}",
+    )
+
+    try:
+        rows = await async_export_consumption(
+            hass,
+            _stats_sensor_id(cfg),
+            start_date,
+            end_date,
+            resolution,
+            fmt,
+            locale,
+            float(cfg[CONF_PRICE_PER_KWH]),
+            path,
+        )
+    except ImportError:
+        _LOGGER.warning("Recorder nicht verfügbar – Export übersprungen")
+        return {}
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.error("Export fehlgeschlagen: %s", exc)
+        return {}
+
+    result = {"path": path, "rows": rows}
+    hass.bus.async_fire(f"{DOMAIN}_export_done", {"entry_id": entry.entry_id, **result})
+    _LOGGER.info("Export gespeichert: %s (%d Zeilen)", path, rows)
+    return result
+
+
+async def _async_send_email(
+    hass: HomeAssistant,
+    data: dict,
+    smtp_cfg: dict,
+    recipients: Recipients,
+    mail: RenderedMail,
+    pdf_bytes: bytes,
+    filename: str,
+    timings: dict[str, float] | None = None,
+) -> None:
+    """Versendet über ``_send_email_sync`` im Executor und zählt SMTP-Verbindungen."""
+    if timings is None:
+        timings = {}
+    counters: PerfCounters = data["counters"]
+    try:
+        refused = await hass.async_add_executor_job(
+            _send_email_sync,
+            smtp_cfg,
+            recipients,
+            mail.subject,
+            mail.html,
+            pdf_bytes,
+            filename,
+            timings,
+            mail.text,
+        )
+    finally:
+        if STAGE_SMTP_CONNECT in timings:
+            counters.increment("smtp_connections")
+        if STAGE_SMTP_SEND in timings:
+            counters.increment("smtp_messages")
+        else:
+            counters.increment("smtp_failures")
+    if refused:
+        # Teilweise abgelehnt – die übrigen Empfänger haben die E-Mail erhalten
+        _LOGGER.warning(
+            "E-Mail an %s vom Server abgelehnt: %s",
+            ", ".join(refused),
+            "; ".join(f"{code} {reply!r}" for code, reply in refused.values()),
+        )
+    counters.increment("smtp_recipients", len(recipients.envelope) - len(refused))
 
 
 def _send_email_sync(
     smtp_cfg: dict,
-    to_email: str,
+    recipients: Recipients,
     subject: str,
     body_html: str,
     pdf_bytes: bytes,
     filename: str,
-) -> None:
-    """Blocking SMTP send – runs in executor."""
+    timings: dict[str, float] | None = None,
+    body_text: str | None = None,
+) -> dict[str, tuple[int, bytes]]:
+    """Blocking SMTP send – runs in executor.
+
+    Der Mail-Stack wird erst hier importiert, da er nur beim Versand gebraucht
+    wird und sonst die Startzeit von Home Assistant verlängert. Ist ``timings``
+    gesetzt, werden dort die Dauern von MIME-Aufbau, Verbindung, Login und
+    Versand eingetragen. Mit ``body_text`` wird zusätzlich eine
+    Nur-Text-Fassung als multipart/alternative beigelegt.
+
+    Alle Empfänger (To, CC, BCC) werden in einer Transaktion beliefert.
+    Gibt die vom Server abgelehnten Adressen zurück; lehnt er alle ab,
+    wird ``SMTPRecipientsRefused`` ausgelöst.
+    """
+    import smtplib  # noqa: PLC0415
+    from email.mime.application import MIMEApplication  # noqa: PLC0415
+    from email.mime.multipart import MIMEMultipart  # noqa: PLC0415
+    from email.mime.text import MIMEText  # noqa: PLC0415
+
+    if timings is None:
+        timings = {}
+    started = time.perf_counter()
+
     msg = MIMEMultipart("mixed")
     msg["From"] = smtp_cfg["from_email"]
-    msg["To"] = to_email
+    msg["To"] = ", ".join(recipients.to)
+    if recipients.cc:
+        msg["Cc"] = ", ".join(recipients.cc)
     msg["Subject"] = subject
 
-    msg.attach(MIMEText(body_html, "html", "utf-8"))
+    if body_text is None:
+        msg.attach(MIMEText(body_html, "html", "utf-8"))
+    else:
+        body = MIMEMultipart("alternative")
+        body.attach(MIMEText(body_text, "plain", "utf-8"))
+        body.attach(MIMEText(body_html, "html", "utf-8"))
+        msg.attach(body)
 
     attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
     attachment.add_header("Content-Disposition", "attachment", filename=filename)
     msg.attach(attachment)
+    timings[STAGE_MIME_BUILD] = time.perf_counter() - started
 
+    started = time.perf_counter()
     if smtp_cfg["use_ssl"]:
         server = smtplib.SMTP_SSL(smtp_cfg["host"], smtp_cfg["port"], timeout=30)
     else:
         server = smtplib.SMTP(smtp_cfg["host"], smtp_cfg["port"], timeout=30)
         if smtp_cfg["use_tls"]:
             server.starttls()
+    timings[STAGE_SMTP_CONNECT] = time.perf_counter() - started
 
     if smtp_cfg["username"]:
+        started = time.perf_counter()
         server.login(smtp_cfg["username"], smtp_cfg["password"])
+        timings[STAGE_SMTP_AUTH] = time.perf_counter() - started
 
-    server.send_message(msg)
+    started = time.perf_counter()
+    # Ein DATA für alle RCPT; BCC steht nur im Umschlag
+    refused = server.send_message(msg, to_addrs=recipients.envelope)
     server.quit()
+    timings[STAGE_SMTP_SEND] = time.perf_counter() - started
+    return refused
@@ -0,0 +1,95 @@
+"""Per-day anomaly flags for the daily breakdown of an invoice.
+
+Die Tageswerte werden in einem Durchlauf geprüft; gehalten werden nur die
+letzten ``SPIKE_WINDOW`` Ladetage und ``ZERO_RADIUS`` Tage Vorschau – der
+Speicher ist also unabhängig von der Länge des Zeitraums:
+
+- ``missing``: für den Tag fehlen Recorder-Daten (als 0,0 kWh ausgewiesen),
+- ``zero``: kein Verbrauch, obwohl fast alle Nachbartage Ladetage sind
+  (z. B. Sensor hing, Impulse verloren),
+- ``spike``: Verbrauch deutlich über dem rollierenden Perzentil der
+  vorangegangenen Ladetage.
+"""
+from __future__ import annotations
+
+import bisect
+import datetime
+import math
+from collections import deque
+from collections.abc import Container, Iterable, Iterator
+
+FLAG_MISSING = "missing"
+FLAG_ZERO = "zero"
+FLAG_SPIKE = "spike"
+
+# Unterhalb gilt ein Tag als ohne Verbrauch
+ACTIVE_KWH = 0.1
+# Nachbartage je Seite für die Prüfung auf Nulltage
+ZERO_RADIUS = 3
+# Anteil der bekannten Nachbartage, die Ladetage sein müssen
+ZERO_ACTIVE_SHARE = 0.8
+# Vorangegangene Ladetage für das rollierende Perzentil
+SPIKE_WINDOW = 14
+SPIKE_MIN_HISTORY = 5
+SPIKE_PERCENTILE = 0.9
+# Spitze erst ab diesem Vielfachen des Perzentils
+SPIKE_FACTOR = 1.5
+
+_Day = tuple[datetime.date, float, bool]
+
+
+def flag_days(
+    daily_data: Iterable[tuple[datetime.date, float]],
+    missing: Container[datetime.date] = (),
+) -> Iterator[tuple[datetime.date, float, tuple[str, ...]]]:
+    """Liefert (Tag, kWh, Flags) in Eingabereihenfolge.
+
+    ``missing`` enthält die Tage ohne Recorder-Daten.
+    """
+    history: deque[float] = deque()
+    ranked: list[float] = []
+    # Tage, deren Nulltag-Prüfung noch auf die Folgetage wartet
+    pending: deque[tuple[_Day, tuple[str, ...]]] = deque()
+    # Bereits ausgegebene Tage als Vorgänger für die Nulltag-Prüfung
+    before: deque[_Day] = deque(maxlen=ZERO_RADIUS)
+
+    for day, kwh in daily_data:
+        is_missing = day in missing
+        flags: tuple[str, ...] = (FLAG_MISSING,) if is_missing else ()
+        if not is_missing and kwh >= ACTIVE_KWH:
+            if len(ranked) >= SPIKE_MIN_HISTORY and kwh > SPIKE_FACTOR * _percentile(ranked):
+                flags += (FLAG_SPIKE,)
+            history.append(kwh)
+            bisect.insort(ranked, kwh)
+            if len(history) > SPIKE_WINDOW:
+                ranked.pop(bisect.bisect_left(ranked, history.popleft()))
+
+        pending.append(((day, kwh, is_missing), flags))
+        if len(pending) > ZERO_RADIUS:
+            yield _emit(pending, before)
+    while pending:
+        yield _emit(pending, before)
+
+
+def _emit(
+    pending: deque[tuple[_Day, tuple[str, ...]]], before: deque[_Day]
+) -> tuple[datetime.date, float, tuple[str, ...]]:
+    """Gibt den ältesten wartenden Tag mit abgeschlossener Nulltag-Prüfung aus."""
+    current, flags = pending.popleft()
+    day, kwh, is_missing = current
+    if not is_missing and kwh < ACTIVE_KWH:
+        neighbours = [
+            value
+            for _, value, gap in (*before, *(entry for entry, _ in pending))
+            if not gap
+        ]
+        active = sum(1 for value in neighbours if value >= ACTIVE_KWH)
+        if len(neighbours) > ZERO_RADIUS and active >= ZERO_ACTIVE_SHARE * len(neighbours):
+            flags += (FLAG_ZERO,)
+    before.append(current)
+    return day, kwh, flags
+
+
+def _percentile(ranked: list[float]) -> float:
+    """Perzentil nach dem Nearest-Rank-Verfahren einer sortierten Liste."""
+    return ranked[max(0, math.ceil(SPIKE_PERCENTILE * len(ranked)) - 1)]
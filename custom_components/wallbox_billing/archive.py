@@ -0,0 +1,183 @@
+"""On-disk invoice archive for Wallbox Billing.
+
+Gerenderte PDFs werden inhaltsadressiert (SHA-256) im HA-Konfigurations-
+verzeichnis abgelegt, zusammen mit einer kleinen ``index.json``:
+
+    <config>/wallbox_billing_archive/<entry_id>/
+        index.json
+        3f2a…e1.pdf
+
+Identische PDFs werden nur einmal gespeichert. Alle Methoden sind blockierend
+und müssen über ``hass.async_add_executor_job`` aufgerufen werden.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+ARCHIVE_DIR = "wallbox_billing_archive"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+
+class InvoiceArchive:
+    """Content-addressed PDF store with a JSON index and retention."""
+
+    def __init__(self, path: str, retention_months: int = 0) -> None:
+        self.path = path
+        self.retention_months = retention_months
+        self._lock = threading.Lock()
+        self._records: list[dict] = []
+        self._by_period: dict[str, dict] = {}
+        self._latest: dict[str, dict] = {}
+        self._loaded = False
+        # Für die Diagnose: geschriebene vs. deduplizierte PDFs
+        self.written = 0
+        self.deduplicated = 0
+
+    # ── Index ────────────────────────────────────────────────────────────────
+
+    def _index_path(self) -> str:
+        return os.path.join(self.path, INDEX_FILE)
+
+    def _pdf_path(self, sha256: str) -> str:
+        return os.path.join(self.path, f"{sha256}.pdf")
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(self._index_path(), encoding="utf-8") as fp:
+                raw = json.load(fp)
+        except FileNotFoundError:
+            raw = {}
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Archiv-Index %s unlesbar, wird neu aufgebaut: %s", self.path, exc)
+            raw = {}
+        self._records = list(raw.get("invoices", []))
+        self._reindex()
+        self._loaded = True
+
+    def _reindex(self) -> None:
+        # Records sind chronologisch sortiert – der letzte Eintrag je Periode gewinnt
+        self._by_period = {record["period"]: record for record in self._records}
+        self._latest = {record.get("kind", "invoice"): record for record in self._records}
+
+    def _write_index(self) -> None:
+        tmp = f"{self._index_path()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump({"version": INDEX_VERSION, "invoices": self._records}, fp, indent=1)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self._index_path())
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def add(self, pdf_bytes: bytes, record: dict) -> dict:
+        """Speichert ein PDF (dedupliziert) und hängt ``record`` an den Index an.
+
+        ``record`` muss mindestens ``period`` ("YYYY-MM") enthalten; ``sha256``,
+        ``size`` und ``created`` werden ergänzt.
+        """
+        sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        with self._lock:
+            self._ensure_loaded()
+            target = self._pdf_path(sha256)
+            if not os.path.exists(target):
+                tmp = f"{target}.tmp"
+                with open(tmp, "wb") as fp:
+                    fp.write(pdf_bytes)
+                    fp.flush()
+                    os.fsync(fp.fileno())
+                os.replace(tmp, target)
+                self.written += 1
+            else:
+                _LOGGER.debug("PDF %s bereits im Archiv – nur Index-Eintrag", sha256[:12])
+                self.deduplicated += 1
+
+            record = {
+                **record,
+                "sha256": sha256,
+                "size": len(pdf_bytes),
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            self._records.append(record)
+            self._evict_locked()
+            self._reindex()
+            self._write_index()
+        return record
+
+    def get(self, period: str) -> dict | None:
+        """Letzter Index-Eintrag für eine Periode ("YYYY-MM") oder None."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_period.get(period)
+
+    def latest(self, kind: str = "invoice") -> dict | None:
+        """Zuletzt archivierter Eintrag einer Art (Standard: Rechnung) oder None."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._latest.get(kind)
+
+    def records(self) -> list[dict]:
+        """Kopie aller Index-Einträge (chronologisch)."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._records)
+
+    def file_path(self, record: dict) -> str:
+        """Absoluter Pfad der PDF-Datei zu einem Index-Eintrag."""
+        return self._pdf_path(record["sha256"])
+
+    def read_pdf(self, record: dict) -> bytes:
+        """Liest ein archiviertes PDF ein (der E-Mail-Anhang braucht ohnehin die Bytes)."""
+        with open(self.file_path(record), "rb") as fp:
+            return fp.read()
+
+    def evict(self) -> int:
+        """Wendet die Aufbewahrungsfrist an; gibt die Zahl entfernter Einträge zurück."""
+        with self._lock:
+            self._ensure_loaded()
+            removed = self._evict_locked()
+            if removed:
+                self._reindex()
+                self._write_index()
+        return removed
+
+    # ── Retention ────────────────────────────────────────────────────────────
+
+    def _evict_locked(self) -> int:
+        if self.retention_months <= 0:
+            return 0
+        today = datetime.date.today()
+        total_months = today.year * 12 + today.month - 1 - self.retention_months
+        cutoff = f"{total_months // 12:04d}-{total_months % 12 + 1:02d}"
+
+        keep = [record for record in self._records if _end_month(record["period"]) >= cutoff]
+        removed = len(self._records) - len(keep)
+        if not removed:
+            return 0
+
+        orphaned = {record["sha256"] for record in self._records} - {
+            record["sha256"] for record in keep
+        }
+        for sha256 in orphaned:
+            try:
+                os.remove(self._pdf_path(sha256))
+            except FileNotFoundError:
+                pass
+        self._records = keep
+        _LOGGER.info("Archiv: %d Rechnung(en) vor %s entfernt", removed, cutoff)
+        return removed
+
+
+def _end_month(period: str) -> str:
+    """Letzter Monat ("YYYY-MM") einer Periode; Jahresübersichten ("YYYY") enden im Dezember."""
+    return f"{period}-12" if len(period) == 4 else period
@@ -0,0 +1,140 @@
+"""Batch rendering of many invoices, e.g. to regenerate the archive.
+
+Nach einer Layout-Änderung müssen u. U. Jahre an Rechnungen neu erzeugt
+werden. ``render_invoice_batch`` verteilt die Aufträge (je ein Dict mit den
+Keyword-Argumenten von ``generate_invoice_pdf``) in Blöcken auf einen
+Prozess-Pool, sodass fpdf2 alle Kerne nutzt. Die Ergebnisse kommen in der
+Reihenfolge der Eingabe zurück; über ein ``threading.Event`` kann der Lauf
+abgebrochen werden.
+
+Die Funktion blockiert und muss im Executor laufen – oder man nutzt
+``async_render_invoice_batch``.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import math
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, wait
+from typing import Callable, Sequence
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Blöcke je Worker – klein genug für gleichmäßige Auslastung, groß genug,
+# damit der Pickle-Overhead pro Rechnung nicht ins Gewicht fällt
+CHUNKS_PER_WORKER = 4
+# Intervall (s), in dem der Abbruch-Event geprüft wird
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def spec_from_record(
+    record: dict, owner_name: str, meter_number: str, recipient_email: str
+) -> dict:
+    """Baut aus einem Archiv-Eintrag die Argumente für ``generate_invoice_pdf``.
+
+    Tageswerte sind nicht archiviert; neu erzeugte Rechnungen enthalten daher
+    nur Seite 1.
+    """
+    return {
+        "owner_name": owner_name,
+        "meter_number": meter_number,
+        "recipient_email": recipient_email,
+        "period_from": datetime.date.fromisoformat(record["period_from"]),
+        "period_to": datetime.date.fromisoformat(record["period_to"]),
+        "reading_previous": float(record["reading_previous"]),
+        "reading_current": float(record["reading_current"]),
+        "price_per_kwh": float(record["price_per_kwh"]),
+        "additional_meters": [
+            (meter["meter_number"], float(meter["reading_previous"]), float(meter["reading_current"]))
+            for meter in record.get("meters", [])
+        ],
+    }
+
+
+def _render_chunk(specs: list[dict]) -> list[bytes]:
+    """Worker-Seite: rendert einen Block von Rechnungen."""
+    from .pdf_generator import generate_invoice_pdf  # noqa: PLC0415
+
+    return [generate_invoice_pdf(**spec) for spec in specs]
+
+
+def render_invoice_batch(
+    specs: Sequence[dict],
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    cancel_event: threading.Event | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[bytes]:
+    """Rendert alle ``specs`` parallel und gibt die PDFs in Eingabereihenfolge zurück.
+
+    ``max_workers`` – Anzahl Prozesse (Standard: Anzahl Kerne).
+    ``chunk_size`` – Rechnungen je Auftrag (Standard: ~4 Blöcke je Worker).
+    ``cancel_event`` – wird er gesetzt, werden offene Blöcke verworfen und
+    ``concurrent.futures.CancelledError`` ausgelöst.
+    ``progress`` – wird nach jedem Block mit (fertig, gesamt) aufgerufen.
+    """
+    import multiprocessing  # noqa: PLC0415
+
+    total = len(specs)
+    if not total:
+        return []
+    workers = max(1, min(max_workers or os.cpu_count() or 1, total))
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(total / (workers * CHUNKS_PER_WORKER)))
+
+    results: list[bytes | None] = [None] * total
+    done_count = 0
+    # "spawn" statt fork: der HA-Prozess hat viele Threads
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        pending: dict[Future, int] = {
+            executor.submit(_render_chunk, list(specs[offset : offset + chunk_size])): offset
+            for offset in range(0, total, chunk_size)
+        }
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledError(f"Batch-Rendering abgebrochen ({done_count}/{total})")
+            finished, _ = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                offset = pending.pop(future)
+                chunk = future.result()
+                results[offset : offset + len(chunk)] = chunk
+                done_count += len(chunk)
+                if progress is not None:
+                    progress(done_count, total)
+    finally:
+        # Bei Abbruch oder Fehler noch nicht gestartete Blöcke verwerfen und
+        # nicht auf laufende warten – deren Ergebnis wird nicht mehr gebraucht
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    _LOGGER.debug(
+        "Batch-Rendering: %d Rechnungen mit %d Prozessen (Blockgröße %d)",
+        total,
+        workers,
+        chunk_size,
+    )
+    return results  # type: ignore[return-value]
+
+
+async def async_render_invoice_batch(
+    hass: HomeAssistant,
+    specs: Sequence[dict],
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+) -> list[bytes]:
+    """Async wrapper; cancelling the awaiting task cancels the batch."""
+    cancel_event = threading.Event()
+    try:
+        return await hass.async_add_executor_job(
+            render_invoice_batch, specs, max_workers, chunk_size, cancel_event
+        )
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
@@ -1,28 +1,40 @@
 """Config flow for Wallbox Billing."""
 from __future__ import annotations
 
+import asyncio
 import datetime
+from functools import partial
 from typing import Any
 
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.components.sensor import SensorDeviceClass
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import selector
 
 from .const import (
+    CONF_ADDITIONAL_METERS,
+    CONF_ARCHIVE_RETENTION_MONTHS,
+    CONF_BCC_EMAIL,
+    CONF_BILLING_DAY,
+    CONF_BILLING_TIME,
+    CONF_CC_EMAIL,
     CONF_DAILY_STATS_HOUR,
     CONF_ENERGY_SENSOR,
     CONF_INCLUDE_DAILY_STATS,
     CONF_STATS_SENSOR,
     CONF_INITIAL_DATE,
     CONF_INITIAL_READING,
+    CONF_MAIL_LANGUAGE,
     CONF_METER_NUMBER,
     CONF_OWNER_NAME,
     CONF_PRICE_PER_KWH,
     CONF_RECIPIENT_EMAIL,
+    CONF_RENDER_MODE,
+    CONF_RENDER_WORKERS,
+    CONF_SCHEDULE_ENABLED,
     CONF_SMTP_FROM_EMAIL,
     CONF_SMTP_HOST,
     CONF_SMTP_PASSWORD,
@@ -30,14 +42,156 @@ from .const import (
     CONF_SMTP_USE_SSL,
     CONF_SMTP_USE_TLS,
     CONF_SMTP_USERNAME,
+    DEFAULT_ARCHIVE_RETENTION_MONTHS,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_BILLING_TIME,
     DEFAULT_DAILY_STATS_HOUR,
     DEFAULT_INCLUDE_DAILY_STATS,
+    DEFAULT_MAIL_LANGUAGE,
     DEFAULT_PRICE_PER_KWH,
+    DEFAULT_RENDER_MODE,
+    DEFAULT_RENDER_WORKERS,
+    DEFAULT_SCHEDULE_ENABLED,
     DEFAULT_SMTP_PORT,
     DEFAULT_SMTP_USE_SSL,
     DEFAULT_SMTP_USE_TLS,
     DOMAIN,
 )
+from .formatting import LOCALE_DE, LOCALE_EN
+from .meters import parse_additional_meters
+from .recipients import parse_addresses
+
+# Kurzer Timeout, damit das Formular nicht hängt
+PROBE_TIMEOUT = 10
+# Diese Fehler können durch erneutes Absenden bestätigt werden (Server kurz
+# nicht erreichbar, Statistiken entstehen erst mit der nächsten Stunde)
+_CONFIRMABLE_ERRORS = frozenset({"cannot_connect", "no_statistics"})
+
+
+def _probe_smtp(smtp_cfg: dict) -> str | None:
+    """Blocking: Verbindung, STARTTLS und Login testen, ohne zu senden.
+
+    Gibt den Fehler-Key für das Formular oder None zurück.
+    """
+    import smtplib  # noqa: PLC0415
+
+    try:
+        if smtp_cfg["use_ssl"]:
+            server = smtplib.SMTP_SSL(smtp_cfg["host"], smtp_cfg["port"], timeout=PROBE_TIMEOUT)
+        else:
+            server = smtplib.SMTP(smtp_cfg["host"], smtp_cfg["port"], timeout=PROBE_TIMEOUT)
+    except (OSError, smtplib.SMTPException):
+        return "cannot_connect"
+    try:
+        if not smtp_cfg["use_ssl"] and smtp_cfg["use_tls"]:
+            server.starttls()
+        if smtp_cfg["username"]:
+            server.login(smtp_cfg["username"], smtp_cfg["password"])
+    except smtplib.SMTPAuthenticationError:
+        return "invalid_auth"
+    except (OSError, smtplib.SMTPException):
+        return "cannot_connect"
+    finally:
+        try:
+            server.quit()
+        except (OSError, smtplib.SMTPException):
+            server.close()
+    return None
+
+
+async def _async_probe_statistics(hass: HomeAssistant, sensor_id: str) -> str | None:
+    """Prüft, ob der Recorder Langzeitstatistiken für den Sensor hat oder anlegen wird."""
+    state = hass.states.get(sensor_id)
+    try:
+        from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+        from homeassistant.components.recorder.statistics import get_metadata  # noqa: PLC0415
+
+        recorder = get_instance(hass)
+    except (ImportError, KeyError):
+        return "no_statistics"
+    metadata = await recorder.async_add_executor_job(
+        partial(get_metadata, hass, statistic_ids={sensor_id})
+    )
+    if sensor_id in metadata:
+        return None
+    if state is not None and state.attributes.get("state_class") in ("total", "total_increasing"):
+        # Neuer Sensor: Statistik entsteht mit der nächsten vollen Stunde
+        return None
+    return "no_statistics"
+
+
+class _ProbeMixin:
+    """Connectivity probes with a per-flow cache shared by config and options flow."""
+
+    hass: HomeAssistant
+
+    def _init_probes(self) -> None:
+        self._smtp_results: dict[tuple, str | None] = {}
+        self._stats_results: dict[str, str | None] = {}
+        self._shown_errors: set[tuple] = set()
+
+    async def _async_probe_smtp(self, smtp_cfg: dict) -> str | None:
+        key = tuple(sorted(smtp_cfg.items()))
+        if key not in self._smtp_results:
+            self._smtp_results[key] = await self.hass.async_add_executor_job(_probe_smtp, smtp_cfg)
+        return self._confirm(("smtp", key), self._smtp_results[key])
+
+    async def _async_probe_stats(self, sensor_id: str) -> str | None:
+        if sensor_id not in self._stats_results:
+            self._stats_results[sensor_id] = await _async_probe_statistics(self.hass, sensor_id)
+        return self._confirm(("stats", sensor_id), self._stats_results[sensor_id])
+
+    async def _async_validate(
+        self, smtp_cfg: dict | None, stats_sensor: str | None, stats_field: str
+    ) -> dict[str, str]:
+        """Führt SMTP- und Statistik-Prüfung gleichzeitig aus; gibt Formularfehler zurück."""
+        smtp_error, stats_error = await asyncio.gather(
+            self._async_probe_smtp(smtp_cfg) if smtp_cfg else _none(),
+            self._async_probe_stats(stats_sensor) if stats_sensor else _none(),
+        )
+        errors: dict[str, str] = {}
+        if smtp_error:
+            errors["base"] = smtp_error
+        if stats_error:
+            errors[stats_field] = stats_error
+        return errors
+
+    def _confirm(self, key: tuple, error: str | None) -> str | None:
+        """Bestätigbare Fehler nur beim ersten Absenden derselben Angaben melden."""
+        if error in _CONFIRMABLE_ERRORS:
+            if key in self._shown_errors:
+                return None
+            self._shown_errors.add(key)
+        return error
+
+
+async def _none() -> None:
+    return None
+
+
+def _validate_recipients(user_input: dict) -> dict[str, str]:
+    """Formularfehler für Empfänger-, CC- und BCC-Listen."""
+    errors: dict[str, str] = {}
+    for key in (CONF_RECIPIENT_EMAIL, CONF_CC_EMAIL, CONF_BCC_EMAIL):
+        try:
+            addresses = parse_addresses(user_input.get(key))
+        except ValueError:
+            errors[key] = "invalid_recipients"
+        else:
+            if key == CONF_RECIPIENT_EMAIL and not addresses:
+                errors[key] = "invalid_recipients"
+    return errors
+
+
+def _smtp_probe_config(cfg: dict) -> dict:
+    return {
+        "host": cfg[CONF_SMTP_HOST],
+        "port": int(cfg[CONF_SMTP_PORT]),
+        "username": cfg.get(CONF_SMTP_USERNAME, ""),
+        "password": cfg.get(CONF_SMTP_PASSWORD, ""),
+        "use_tls": cfg.get(CONF_SMTP_USE_TLS, DEFAULT_SMTP_USE_TLS),
+        "use_ssl": cfg.get(CONF_SMTP_USE_SSL, DEFAULT_SMTP_USE_SSL),
+    }
 
 _STEP1_SCHEMA = vol.Schema(
     {
@@ -78,9 +232,7 @@ _STEP1_SCHEMA = vol.Schema(
 
 _STEP2_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_RECIPIENT_EMAIL): selector.TextSelector(
-            selector.TextSelectorConfig(type=selector.TextSelectorType.EMAIL)
-        ),
+        vol.Required(CONF_RECIPIENT_EMAIL): selector.TextSelector(),
         vol.Required(CONF_SMTP_HOST): selector.TextSelector(),
         vol.Required(CONF_SMTP_PORT, default=DEFAULT_SMTP_PORT): selector.NumberSelector(
             selector.NumberSelectorConfig(
@@ -103,13 +255,14 @@ _STEP2_SCHEMA = vol.Schema(
 )
 
 
-class WallboxBillingConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+class WallboxBillingConfigFlow(_ProbeMixin, config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Wallbox Billing."""
 
     VERSION = 1
 
     def __init__(self) -> None:
         self._step1_data: dict[str, Any] = {}
+        self._init_probes()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -118,12 +271,16 @@ class WallboxBillingConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            self._step1_data = user_input
-            return await self.async_step_smtp()
+            errors = await self._async_validate(
+                None, user_input[CONF_ENERGY_SENSOR], CONF_ENERGY_SENSOR
+            )
+            if not errors:
+                self._step1_data = user_input
+                return await self.async_step_smtp()
 
         return self.async_show_form(
             step_id="user",
-            data_schema=_STEP1_SCHEMA,
+            data_schema=self.add_suggested_values_to_schema(_STEP1_SCHEMA, user_input or {}),
             errors=errors,
             description_placeholders={
                 "hint": (
@@ -140,16 +297,22 @@ class WallboxBillingConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            all_data = {**self._step1_data, **user_input}
-            # Store initial billing state in persistent store via __init__ after setup
-            return self.async_create_entry(
-                title=f"Wallbox Abrechnung – {self._step1_data[CONF_OWNER_NAME]}",
-                data=all_data,
-            )
+            errors = _validate_recipients(user_input)
+            if not errors:
+                errors = await self._async_validate(
+                    _smtp_probe_config(user_input), None, CONF_ENERGY_SENSOR
+                )
+            if not errors:
+                all_data = {**self._step1_data, **user_input}
+                # Store initial billing state in persistent store via __init__ after setup
+                return self.async_create_entry(
+                    title=f"Wallbox Abrechnung – {self._step1_data[CONF_OWNER_NAME]}",
+                    data=all_data,
+                )
 
         return self.async_show_form(
             step_id="smtp",
-            data_schema=_STEP2_SCHEMA,
+            data_schema=self.add_suggested_values_to_schema(_STEP2_SCHEMA, user_input or {}),
             errors=errors,
         )
 
@@ -159,9 +322,49 @@ class WallboxBillingConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return WallboxBillingOptionsFlow()
 
 
-class WallboxBillingOptionsFlow(config_entries.OptionsFlow):
+def _options_suggestions(cfg: dict[str, Any]) -> dict[str, Any]:
+    """Gespeicherte Werte (mit Standardwerten ergänzt) als Vorbelegung des Options-Dialogs."""
+    return {
+        CONF_PRICE_PER_KWH: float(cfg.get(CONF_PRICE_PER_KWH, DEFAULT_PRICE_PER_KWH)),
+        CONF_MAIL_LANGUAGE: cfg.get(CONF_MAIL_LANGUAGE, DEFAULT_MAIL_LANGUAGE),
+        CONF_SMTP_PORT: int(cfg.get(CONF_SMTP_PORT, DEFAULT_SMTP_PORT)),
+        CONF_SMTP_USE_TLS: cfg.get(CONF_SMTP_USE_TLS, DEFAULT_SMTP_USE_TLS),
+        CONF_SMTP_USE_SSL: cfg.get(CONF_SMTP_USE_SSL, DEFAULT_SMTP_USE_SSL),
+        CONF_INCLUDE_DAILY_STATS: cfg.get(CONF_INCLUDE_DAILY_STATS, DEFAULT_INCLUDE_DAILY_STATS),
+        CONF_DAILY_STATS_HOUR: int(cfg.get(CONF_DAILY_STATS_HOUR, DEFAULT_DAILY_STATS_HOUR)),
+        CONF_ARCHIVE_RETENTION_MONTHS: int(
+            cfg.get(CONF_ARCHIVE_RETENTION_MONTHS, DEFAULT_ARCHIVE_RETENTION_MONTHS)
+        ),
+        CONF_SCHEDULE_ENABLED: cfg.get(CONF_SCHEDULE_ENABLED, DEFAULT_SCHEDULE_ENABLED),
+        CONF_BILLING_DAY: int(cfg.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)),
+        CONF_BILLING_TIME: cfg.get(CONF_BILLING_TIME, DEFAULT_BILLING_TIME),
+        CONF_RENDER_MODE: cfg.get(CONF_RENDER_MODE, DEFAULT_RENDER_MODE),
+        CONF_RENDER_WORKERS: int(cfg.get(CONF_RENDER_WORKERS, DEFAULT_RENDER_WORKERS)),
+        **{
+            key: cfg.get(key, "")
+            for key in (
+                CONF_RECIPIENT_EMAIL,
+                CONF_CC_EMAIL,
+                CONF_BCC_EMAIL,
+                CONF_OWNER_NAME,
+                CONF_METER_NUMBER,
+                CONF_ADDITIONAL_METERS,
+                CONF_SMTP_HOST,
+                CONF_SMTP_FROM_EMAIL,
+                CONF_SMTP_USERNAME,
+                CONF_SMTP_PASSWORD,
+                CONF_STATS_SENSOR,
+            )
+        },
+    }
+
+
+class WallboxBillingOptionsFlow(_ProbeMixin, config_entries.OptionsFlow):
     """Options flow to update settings after initial setup."""
 
+    def __init__(self) -> None:
+        self._init_probes()
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -170,13 +373,31 @@ class WallboxBillingOptionsFlow(config_entries.OptionsFlow):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            errors = _validate_recipients(user_input)
+            try:
+                meters = parse_additional_meters(user_input.get(CONF_ADDITIONAL_METERS))
+            except ValueError:
+                errors[CONF_ADDITIONAL_METERS] = "invalid_meters"
+            else:
+                if any(m["sensor"] == cfg[CONF_ENERGY_SENSOR] for m in meters):
+                    errors[CONF_ADDITIONAL_METERS] = "invalid_meters"
+            if not errors:
+                # Nur geänderte SMTP-Daten prüfen; beide Prüfungen laufen gleichzeitig
+                smtp_cfg = _smtp_probe_config(user_input)
+                stats_sensor = None
+                if user_input.get(CONF_INCLUDE_DAILY_STATS, DEFAULT_INCLUDE_DAILY_STATS):
+                    stats_sensor = user_input.get(CONF_STATS_SENSOR) or cfg[CONF_ENERGY_SENSOR]
+                errors = await self._async_validate(
+                    smtp_cfg if smtp_cfg != _smtp_probe_config(cfg) else None,
+                    stats_sensor,
+                    CONF_STATS_SENSOR,
+                )
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         schema = vol.Schema(
             {
-                vol.Required(
-                    CONF_PRICE_PER_KWH, default=float(cfg.get(CONF_PRICE_PER_KWH, DEFAULT_PRICE_PER_KWH))
-                ): selector.NumberSelector(
+                vol.Required(CONF_PRICE_PER_KWH): selector.NumberSelector(
                     selector.NumberSelectorConfig(
                         min=0.0,
                         max=10.0,
@@ -185,65 +406,43 @@ class WallboxBillingOptionsFlow(config_entries.OptionsFlow):
                         unit_of_measurement="€/kWh",
                     )
                 ),
-                vol.Required(
-                    CONF_RECIPIENT_EMAIL, default=cfg.get(CONF_RECIPIENT_EMAIL, "")
-                ): selector.TextSelector(
-                    selector.TextSelectorConfig(type=selector.TextSelectorType.EMAIL)
+                vol.Required(CONF_RECIPIENT_EMAIL): selector.TextSelector(),
+                vol.Optional(CONF_CC_EMAIL, default=""): selector.TextSelector(),
+                vol.Optional(CONF_BCC_EMAIL, default=""): selector.TextSelector(),
+                vol.Required(CONF_MAIL_LANGUAGE): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[LOCALE_DE, LOCALE_EN],
+                        translation_key=CONF_MAIL_LANGUAGE,
+                    )
+                ),
+                vol.Required(CONF_OWNER_NAME): selector.TextSelector(),
+                vol.Required(CONF_METER_NUMBER): selector.TextSelector(),
+                vol.Optional(CONF_ADDITIONAL_METERS, default=""): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
                 ),
-                vol.Required(
-                    CONF_OWNER_NAME, default=cfg.get(CONF_OWNER_NAME, "")
-                ): selector.TextSelector(),
-                vol.Required(
-                    CONF_METER_NUMBER, default=cfg.get(CONF_METER_NUMBER, "")
-                ): selector.TextSelector(),
-                vol.Required(
-                    CONF_SMTP_HOST, default=cfg.get(CONF_SMTP_HOST, "")
-                ): selector.TextSelector(),
-                vol.Required(
-                    CONF_SMTP_PORT, default=int(cfg.get(CONF_SMTP_PORT, DEFAULT_SMTP_PORT))
-                ): selector.NumberSelector(
+                vol.Required(CONF_SMTP_HOST): selector.TextSelector(),
+                vol.Required(CONF_SMTP_PORT): selector.NumberSelector(
                     selector.NumberSelectorConfig(
                         min=1, max=65535, step=1, mode=selector.NumberSelectorMode.BOX
                     )
                 ),
-                vol.Required(
-                    CONF_SMTP_FROM_EMAIL, default=cfg.get(CONF_SMTP_FROM_EMAIL, "")
-                ): selector.TextSelector(
+                vol.Required(CONF_SMTP_FROM_EMAIL): selector.TextSelector(
                     selector.TextSelectorConfig(type=selector.TextSelectorType.EMAIL)
                 ),
-                vol.Optional(
-                    CONF_SMTP_USERNAME, default=cfg.get(CONF_SMTP_USERNAME, "")
-                ): selector.TextSelector(),
-                vol.Optional(
-                    CONF_SMTP_PASSWORD, default=cfg.get(CONF_SMTP_PASSWORD, "")
-                ): selector.TextSelector(
+                vol.Optional(CONF_SMTP_USERNAME, default=""): selector.TextSelector(),
+                vol.Optional(CONF_SMTP_PASSWORD, default=""): selector.TextSelector(
                     selector.TextSelectorConfig(type=selector.TextSelectorType.PASSWORD)
                 ),
-                vol.Required(
-                    CONF_SMTP_USE_TLS,
-                    default=cfg.get(CONF_SMTP_USE_TLS, DEFAULT_SMTP_USE_TLS),
-                ): selector.BooleanSelector(),
-                vol.Required(
-                    CONF_SMTP_USE_SSL,
-                    default=cfg.get(CONF_SMTP_USE_SSL, DEFAULT_SMTP_USE_SSL),
-                ): selector.BooleanSelector(),
-                vol.Required(
-                    CONF_INCLUDE_DAILY_STATS,
-                    default=cfg.get(CONF_INCLUDE_DAILY_STATS, DEFAULT_INCLUDE_DAILY_STATS),
-                ): selector.BooleanSelector(),
-                vol.Optional(
-                    CONF_STATS_SENSOR,
-                    default=cfg.get(CONF_STATS_SENSOR, ""),
-                ): selector.EntitySelector(
+                vol.Required(CONF_SMTP_USE_TLS): selector.BooleanSelector(),
+                vol.Required(CONF_SMTP_USE_SSL): selector.BooleanSelector(),
+                vol.Required(CONF_INCLUDE_DAILY_STATS): selector.BooleanSelector(),
+                vol.Optional(CONF_STATS_SENSOR, default=""): selector.EntitySelector(
                     selector.EntitySelectorConfig(
                         domain="sensor",
                         device_class=SensorDeviceClass.ENERGY,
                     )
                 ),
-                vol.Required(
-                    CONF_DAILY_STATS_HOUR,
-                    default=int(cfg.get(CONF_DAILY_STATS_HOUR, DEFAULT_DAILY_STATS_HOUR)),
-                ): selector.NumberSelector(
+                vol.Required(CONF_DAILY_STATS_HOUR): selector.NumberSelector(
                     selector.NumberSelectorConfig(
                         min=0,
                         max=23,
@@ -251,11 +450,47 @@ class WallboxBillingOptionsFlow(config_entries.OptionsFlow):
                         mode=selector.NumberSelectorMode.BOX,
                     )
                 ),
+                vol.Required(CONF_ARCHIVE_RETENTION_MONTHS): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0,
+                        max=600,
+                        step=1,
+                        mode=selector.NumberSelectorMode.BOX,
+                        unit_of_measurement="Monate",
+                    )
+                ),
+                vol.Required(CONF_SCHEDULE_ENABLED): selector.BooleanSelector(),
+                vol.Required(CONF_BILLING_DAY): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=1,
+                        max=31,
+                        step=1,
+                        mode=selector.NumberSelectorMode.BOX,
+                    )
+                ),
+                vol.Required(CONF_BILLING_TIME): selector.TimeSelector(),
+                vol.Required(CONF_RENDER_MODE): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=["thread", "process"],
+                        translation_key=CONF_RENDER_MODE,
+                    )
+                ),
+                vol.Required(CONF_RENDER_WORKERS): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=1,
+                        max=8,
+                        step=1,
+                        mode=selector.NumberSelectorMode.BOX,
+                    )
+                ),
             }
         )
 
+        # Bei Fehlern die Eingaben des Nutzers erneut anzeigen, sonst den gespeicherten Stand
         return self.async_show_form(
             step_id="init",
-            data_schema=schema,
+            data_schema=self.add_suggested_values_to_schema(
+                schema, user_input or _options_suggestions(cfg)
+            ),
             errors=errors,
         )
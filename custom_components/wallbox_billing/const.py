@@ -6,6 +6,8 @@ DOMAIN = "wallbox_billing"
 CONF_ENERGY_SENSOR = "energy_sensor"
 CONF_PRICE_PER_KWH = "price_per_kwh"
 CONF_RECIPIENT_EMAIL = "recipient_email"
+CONF_CC_EMAIL = "cc_email"
+CONF_BCC_EMAIL = "bcc_email"
 CONF_OWNER_NAME = "owner_name"
 CONF_METER_NUMBER = "meter_number"
 CONF_INITIAL_READING = "initial_reading"
@@ -37,6 +39,11 @@ ENTITY_CONSUMPTION = "consumption_since_last_billing"
 ENTITY_COST = "cost_since_last_billing"
 ENTITY_LAST_BILLING_DATE = "last_billing_date"
 ENTITY_LAST_BILLING_READING = "last_billing_reading"
+ENTITY_PIPELINE_DURATION = "pipeline_duration"
+ENTITY_POWER = "charging_power"
+ENTITY_AVERAGE_POWER_24H = "average_power_24h"
+ENTITY_AVERAGE_POWER_7D = "average_power_7d"
+ENTITY_COST_FORECAST = "cost_forecast"
 ENTITY_SEND_INVOICE = "send_invoice"
 ENTITY_TEST_INVOICE = "test_invoice"
 ENTITY_SAMPLE_PDF = "sample_pdf"
@@ -51,3 +58,54 @@ DEFAULT_DAILY_STATS_HOUR = 0
 # Additional services
 SERVICE_SEND_TEST_INVOICE = "send_test_invoice"
 SERVICE_SEND_SAMPLE_PDF = "send_sample_pdf"
+
+# Monthly/yearly rollups
+SERVICE_SEND_ANNUAL_REPORT = "send_annual_report"
+ATTR_YEAR = "year"
+ROLLUP_NIGHTLY_HOUR = 0
+ROLLUP_NIGHTLY_MINUTE = 30
+
+# Invoice archive
+CONF_ARCHIVE_RETENTION_MONTHS = "archive_retention_months"
+DEFAULT_ARCHIVE_RETENTION_MONTHS = 120   # 10 Jahre Aufbewahrung, 0 = unbegrenzt
+SERVICE_RESEND_INVOICE = "resend_invoice"
+SERVICE_REGENERATE_ARCHIVE = "regenerate_archive"
+ATTR_PERIOD = "period"
+
+# Consumption export
+SERVICE_EXPORT_CONSUMPTION = "export_consumption"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+ATTR_RESOLUTION = "resolution"
+ATTR_FORMAT = "format"
+ATTR_LOCALE = "locale"
+
+# Invoice preview with per-day anomaly flags (siehe anomalies.py)
+SERVICE_PREVIEW_INVOICE = "preview_invoice"
+
+# Dispatcher signals
+SIGNAL_STORED_LOADED = "wallbox_billing_stored_loaded_{entry_id}"
+SIGNAL_TIMINGS_UPDATED = "wallbox_billing_timings_updated_{entry_id}"
+SIGNAL_READING_UPDATED = "wallbox_billing_reading_updated_{entry_id}"
+SIGNAL_POWER_UPDATED = "wallbox_billing_power_updated_{entry_id}"
+
+# Built-in billing scheduler
+CONF_SCHEDULE_ENABLED = "schedule_enabled"
+CONF_BILLING_DAY = "billing_day"
+CONF_BILLING_TIME = "billing_time"
+DEFAULT_SCHEDULE_ENABLED = False
+DEFAULT_BILLING_DAY = 1
+DEFAULT_BILLING_TIME = "08:00:00"
+
+# PDF render pool
+CONF_RENDER_MODE = "render_mode"
+CONF_RENDER_WORKERS = "render_workers"
+DEFAULT_RENDER_MODE = "thread"
+DEFAULT_RENDER_WORKERS = 1
+
+# Weitere Zähler auf derselben Rechnung (siehe meters.py)
+CONF_ADDITIONAL_METERS = "additional_meters"
+
+# Sprache der E-Mails (siehe mail_templates.py)
+CONF_MAIL_LANGUAGE = "mail_language"
+DEFAULT_MAIL_LANGUAGE = "de"
@@ -0,0 +1,147 @@
+"""Per-day consumption of the running billing period, kept up to date live.
+
+Jedes Zählerupdate addiert die Differenz zum vorigen (korrigierten,
+über alle Zähler summierten) Stand auf den offenen Tag. Beim ersten Update
+eines neuen Tages – oder nachts ohne Update – wird der offene Tag
+eingefroren; Tage ohne Update dazwischen zählen 0 kWh. So liegt die
+Tagesübersicht des laufenden Zeitraums ohne Recorder-Abfrage vor, und die
+Rechnung kann sie direkt übernehmen. Mit jeder versendeten Rechnung beginnt
+die Liste neu. Der Zustand liegt im Store unter ``daily_ledger``.
+
+War HA aus oder der Zählerstand nicht lesbar, während ein Tageswechsel lag,
+landet der Verbrauch der Lücke auf dem Tag des nächsten Updates. Solche Tage
+werden als Lücke vermerkt; die Liste gilt für Zeiträume mit Lücken als
+unvollständig, und die Rechnung nimmt die Tageswerte aus dem Recorder.
+"""
+from __future__ import annotations
+
+import datetime
+
+STORED_LEDGER_KEY = "daily_ledger"
+
+# Obergrenze für eingefrorene Tage (über ein Jahr ohne Abrechnung)
+MAX_DAYS = 400
+
+
+class DailyLedger:
+    """Frozen closed days plus the running total of the open day.
+
+    ``state`` ist das Dict aus dem Store und wird direkt fortgeschrieben:
+    ``since`` (Tag, ab dem mitgeschrieben wird), ``days``
+    (ISO-Datum → kWh, abgeschlossen), ``open_day``/``open_kwh``,
+    ``last_reading``, ``gaps`` (ISO-Daten mit unzuverlässigem Wert) und
+    ``interrupted`` (seit dem letzten Update war der Stand nicht lesbar).
+    """
+
+    def __init__(self, state: dict) -> None:
+        self._state = state
+        state.setdefault("since", None)
+        state.setdefault("days", {})
+        state.setdefault("open_day", None)
+        state.setdefault("open_kwh", 0.0)
+        state.setdefault("last_reading", None)
+        state.setdefault("gaps", [])
+        state.setdefault("interrupted", False)
+
+    @property
+    def since(self) -> datetime.date | None:
+        since = self._state["since"]
+        return datetime.date.fromisoformat(since) if since else None
+
+    def observe(self, reading: float, today: datetime.date) -> None:
+        """Verarbeitet einen (korrigierten) Gesamtzählerstand."""
+        state = self._state
+        if state["since"] is None:
+            # Erst ab dem nächsten vollen Tag vollständig
+            state["since"] = (today + datetime.timedelta(days=1)).isoformat()
+        self.roll(today)
+        if state["open_day"] is None:
+            state["open_day"] = today.isoformat()
+        last = state["last_reading"]
+        if last is not None and reading > last:
+            state["open_kwh"] = round(state["open_kwh"] + reading - last, 3)
+        state["last_reading"] = reading
+        state["interrupted"] = False
+
+    def interrupt(self) -> None:
+        """Der Gesamtstand ist gerade nicht lesbar (Sensor nicht verfügbar)."""
+        self._state["interrupted"] = True
+
+    def resume(self, today: datetime.date) -> None:
+        """Nach dem Start: lag seit dem letzten Update ein Tageswechsel, war HA aus."""
+        open_day = self._state["open_day"]
+        if open_day is not None and open_day < today.isoformat():
+            self._state["interrupted"] = True
+
+    def roll(self, today: datetime.date) -> None:
+        """Friert alle Tage vor ``today`` ein."""
+        state = self._state
+        if state["open_day"] is None:
+            return
+        day = datetime.date.fromisoformat(state["open_day"])
+        if day >= today:
+            return
+        days: dict[str, float] = state["days"]
+        closed = [day]
+        days[day.isoformat()] = state["open_kwh"]
+        day += datetime.timedelta(days=1)
+        while day < today:
+            days[day.isoformat()] = 0.0
+            closed.append(day)
+            day += datetime.timedelta(days=1)
+        if state["interrupted"]:
+            # Verbrauch der Unterbrechung landet auf dem Tag des nächsten Updates
+            gaps = set(state["gaps"])
+            gaps.update(gap.isoformat() for gap in (*closed, today))
+            state["gaps"] = sorted(gaps)
+        if len(days) > MAX_DAYS:
+            for key in sorted(days)[: len(days) - MAX_DAYS]:
+                del days[key]
+            state["since"] = min(days)
+            state["gaps"] = [gap for gap in state["gaps"] if gap >= state["since"]]
+        state["open_day"] = today.isoformat()
+        state["open_kwh"] = 0.0
+
+    def start_period(self, today: datetime.date) -> None:
+        """Neuer Abrechnungszeitraum ab jetzt (nach dem Versand einer Rechnung)."""
+        state = self._state
+        state["days"] = {}
+        state["gaps"] = [gap for gap in state["gaps"] if gap >= today.isoformat()]
+        state["open_day"] = today.isoformat()
+        state["open_kwh"] = 0.0
+        if state["last_reading"] is not None:
+            state["since"] = today.isoformat()
+
+    def covers(self, start: datetime.date, end: datetime.date) -> bool:
+        """Ob die Liste von ``start`` bis ``end`` lückenlos mitgeschrieben wurde."""
+        since = self.since
+        if since is None or since > start or self._state["open_day"] is None:
+            return False
+        first, last = start.isoformat(), end.isoformat()
+        return not any(first <= gap <= last for gap in self._state["gaps"])
+
+    def daily_data(
+        self, start: datetime.date, end: datetime.date
+    ) -> list[tuple[datetime.date, float]]:
+        """(Tag, kWh) für jeden Tag von ``start`` bis ``end`` inklusive offenem Tag."""
+        state = self._state
+        days: dict[str, float] = state["days"]
+        open_day = state["open_day"]
+        result: list[tuple[datetime.date, float]] = []
+        day = start
+        while day <= end:
+            key = day.isoformat()
+            if key == open_day:
+                result.append((day, state["open_kwh"]))
+            else:
+                result.append((day, days.get(key, 0.0)))
+            day += datetime.timedelta(days=1)
+        return result
+
+    def as_attribute(self) -> dict[str, float]:
+        """ISO-Datum → kWh aller Tage des Zeitraums (für Dashboards)."""
+        state = self._state
+        breakdown = dict(state["days"])
+        if state["open_day"] is not None:
+            breakdown[state["open_day"]] = state["open_kwh"]
+        return breakdown
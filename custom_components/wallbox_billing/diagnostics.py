@@ -0,0 +1,91 @@
+"""Diagnostics support for Wallbox Billing.
+
+Liefert neben der (geschwärzten) Konfiguration und dem gespeicherten
+Abrechnungsstand die Laufzeit- und Zählerwerte aus ``timing.py``, damit
+Performance-Probleme mit echten Zahlen gemeldet werden können.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_ADDITIONAL_METERS,
+    CONF_BCC_EMAIL,
+    CONF_CC_EMAIL,
+    CONF_METER_NUMBER,
+    CONF_OWNER_NAME,
+    CONF_RECIPIENT_EMAIL,
+    CONF_SMTP_FROM_EMAIL,
+    CONF_SMTP_HOST,
+    CONF_SMTP_PASSWORD,
+    CONF_SMTP_USERNAME,
+    DOMAIN,
+)
+
+TO_REDACT = {
+    CONF_ADDITIONAL_METERS,
+    CONF_BCC_EMAIL,
+    CONF_CC_EMAIL,
+    CONF_METER_NUMBER,
+    CONF_OWNER_NAME,
+    CONF_RECIPIENT_EMAIL,
+    CONF_SMTP_FROM_EMAIL,
+    CONF_SMTP_HOST,
+    CONF_SMTP_PASSWORD,
+    CONF_SMTP_USERNAME,
+    "title",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    archive = data["archive"]
+    records = await hass.async_add_executor_job(archive.records)
+
+    counters = data["counters"].as_dict()
+    counts = counters["counts"]
+    # Jede Mail öffnet derzeit eine eigene Verbindung – Wiederverwendung = Mails - Verbindungen
+    counters["smtp"] = {
+        "connections": counts.get("smtp_connections", 0),
+        "messages": counts.get("smtp_messages", 0),
+        "failures": counts.get("smtp_failures", 0),
+        "reused": max(0, counts.get("smtp_messages", 0) - counts.get("smtp_connections", 0)),
+    }
+    lookups = archive.written + archive.deduplicated
+    counters["caches"]["archive_dedupe"] = {
+        "hits": archive.deduplicated,
+        "misses": archive.written,
+        "hit_rate": round(archive.deduplicated / lookups, 3) if lookups else None,
+    }
+
+    scheduler = data.get("scheduler")
+    sizes = [int(record.get("size", 0)) for record in records]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "stored": async_redact_data(dict(data["stored"]), TO_REDACT),
+        "stored_loaded": data.get("stored_loaded", True),
+        "timings": {
+            "last_run_ms": {
+                stage: round(seconds * 1000, 1)
+                for stage, seconds in data["timings"].last_run.items()
+            },
+            "stages": data["timings"].summary(),
+        },
+        "render_pool": data["render_pool"].metrics(),
+        "counters": counters,
+        "archive": {
+            "records": len(records),
+            "unique_pdfs": len({record["sha256"] for record in records}),
+            "total_bytes": sum(sizes),
+            "max_bytes": max(sizes, default=0),
+            "retention_months": archive.retention_months,
+        },
+        "scheduler": {"next_run": scheduler.next_run.isoformat()} if scheduler else None,
+    }
@@ -0,0 +1,279 @@
+"""Streaming CSV/JSON export of wallbox consumption for Wallbox Billing.
+
+Der Export ist eine Generator-Pipeline:
+
+    Recorder-Abfrage je Block  →  (Zeitpunkt, kWh)  →  [Ladevorgänge]  →  Datei
+
+Der Recorder wird in Blöcken (``CHUNK_DAYS``) abgefragt und jede Zeile wird
+sofort in die Datei geschrieben; der Speicherbedarf bleibt damit auch für
+mehrjährige Stundenexporte konstant.
+
+Perioden ohne Recorder-Summe (oder ohne Summe der Vorperiode) werden wie in
+der Tagesübersicht der Rechnung nicht geschätzt: In CSV bleiben kWh und EUR
+leer, in JSON stehen ``null`` – der Verbrauch der Lücke wird also nicht der
+nächsten Periode mit Daten zugeschlagen.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import os
+from typing import AsyncIterator, TextIO
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .formatting import LOCALE_DE, format_date, format_datetime, format_number
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_DIR = "wallbox_billing_export"
+
+RESOLUTION_DAY = "day"
+RESOLUTION_HOUR = "hour"
+RESOLUTION_SESSION = "session"
+RESOLUTIONS = (RESOLUTION_DAY, RESOLUTION_HOUR, RESOLUTION_SESSION)
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"
+FORMATS = (FORMAT_CSV, FORMAT_JSON)
+
+# Tage je Recorder-Abfrage (Tagesauflösung ≈ 92 Zeilen, Stundenauflösung ≈ 168 Zeilen)
+CHUNK_DAYS = {"day": 92, "hour": 7}
+
+# Eine Stunde mit weniger Verbrauch beendet einen Ladevorgang
+SESSION_MIN_KWH = 0.05
+
+
+async def async_iter_consumption(
+    hass: HomeAssistant,
+    sensor_id: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    period: str,
+) -> AsyncIterator[tuple[datetime.datetime, float | None]]:
+    """Yield (lokaler Periodenbeginn, kWh) für jede Tages-/Stundenperiode.
+
+    Wie ``_async_fetch_daily_stats`` wird der Verbrauch aus der Differenz der
+    Recorder-Summen benachbarter Perioden gebildet; die letzte Summe eines
+    Blocks wird in den nächsten übernommen. Fehlt eine der beiden Summen,
+    ergibt die Periode None.
+    """
+    from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+    from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+        statistics_during_period,
+    )
+
+    local_tz = dt_util.get_time_zone(hass.config.time_zone)
+    step = datetime.timedelta(days=1) if period == RESOLUTION_DAY else datetime.timedelta(hours=1)
+    recorder = get_instance(hass)
+
+    cursor = datetime.datetime.combine(start_date, datetime.time(0, 0), tzinfo=local_tz)
+    stop = datetime.datetime.combine(
+        end_date + datetime.timedelta(days=1), datetime.time(0, 0), tzinfo=local_tz
+    )
+    prev_sum: float | None = None
+    first_chunk = True
+
+    while cursor < stop:
+        chunk_end = min(cursor + datetime.timedelta(days=CHUNK_DAYS[period]), stop)
+        # Im ersten Block eine Periode davor mitlesen, um die erste Differenz zu bilden
+        query_start = cursor - step if first_chunk else cursor
+        stats = await recorder.async_add_executor_job(
+            statistics_during_period,
+            hass,
+            query_start,
+            chunk_end,
+            {sensor_id},
+            period,
+            None,
+            {"sum"},
+        )
+
+        sum_by_start: dict[datetime.datetime, float] = {}
+        for row in (stats or {}).get(sensor_id, []):
+            ts_raw = row.get("start") if isinstance(row, dict) else getattr(row, "start", None)
+            val = row.get("sum") if isinstance(row, dict) else getattr(row, "sum", None)
+            if ts_raw is None or val is None:
+                continue
+            if isinstance(ts_raw, (int, float)):
+                moment = datetime.datetime.fromtimestamp(float(ts_raw), tz=local_tz)
+            elif isinstance(ts_raw, datetime.datetime):
+                tz = ts_raw.tzinfo or datetime.timezone.utc
+                moment = ts_raw.replace(tzinfo=tz).astimezone(local_tz)
+            else:
+                continue
+            sum_by_start[moment] = float(val)
+        del stats
+
+        if first_chunk:
+            prev_sum = sum_by_start.get(cursor - step)
+            first_chunk = False
+
+        moment = cursor
+        while moment < chunk_end:
+            current_sum = sum_by_start.get(moment)
+            if prev_sum is not None and current_sum is not None:
+                yield moment, max(0.0, current_sum - prev_sum)
+            else:
+                yield moment, None
+            prev_sum = current_sum
+            moment = _advance(moment, step, local_tz)
+        cursor = chunk_end
+
+
+def _advance(
+    moment: datetime.datetime, step: datetime.timedelta, local_tz: datetime.tzinfo
+) -> datetime.datetime:
+    """Nächster Periodenbeginn – Tage in lokaler Zeit (DST-sicher), Stunden in UTC."""
+    if step >= datetime.timedelta(days=1):
+        next_day = moment.date() + datetime.timedelta(days=1)
+        return datetime.datetime.combine(next_day, datetime.time(0, 0), tzinfo=local_tz)
+    utc = moment.astimezone(datetime.timezone.utc) + step
+    return utc.astimezone(local_tz)
+
+
+async def async_iter_sessions(
+    hourly: AsyncIterator[tuple[datetime.datetime, float | None]],
+    min_kwh: float = SESSION_MIN_KWH,
+) -> AsyncIterator[tuple[datetime.datetime, datetime.datetime, float]]:
+    """Fasst zusammenhängende Stunden mit Verbrauch zu Ladevorgängen zusammen.
+
+    Yield (Beginn, Ende, kWh); es wird nur der laufende Vorgang gehalten.
+    Stunden ohne Daten beenden einen Vorgang.
+    """
+    session_start: datetime.datetime | None = None
+    session_end: datetime.datetime | None = None
+    session_kwh = 0.0
+    async for moment, kwh in hourly:
+        if kwh is not None and kwh >= min_kwh:
+            if session_start is None:
+                session_start = moment
+                session_kwh = 0.0
+            session_kwh += kwh
+            session_end = moment + datetime.timedelta(hours=1)
+        elif session_start is not None:
+            yield session_start, session_end, session_kwh
+            session_start = None
+    if session_start is not None:
+        yield session_start, session_end, session_kwh
+
+
+class _RowWriter:
+    """Formatiert Zeilen als CSV oder JSON-Array und puffert bis zum Flush."""
+
+    def __init__(self, fp: TextIO, fmt: str, resolution: str, locale: str) -> None:
+        self._fp = fp
+        self._fmt = fmt
+        self._resolution = resolution
+        self._locale = locale
+        self._buffer: list[str] = []
+        self._first = True
+        self.rows = 0
+        self._delimiter = ";" if locale == LOCALE_DE else ","
+
+    def header(self) -> None:
+        if self._fmt == FORMAT_JSON:
+            self._buffer.append("[")
+            return
+        if self._resolution == RESOLUTION_SESSION:
+            columns = ["start", "end", "kwh", "eur"]
+        else:
+            columns = ["period", "kwh", "eur"]
+        self._buffer.append(self._delimiter.join(columns) + "\n")
+
+    def row(self, period: tuple, kwh: float | None, eur: float | None) -> None:
+        """Eine Zeile; ``kwh``/``eur`` None für Perioden ohne Recorder-Daten."""
+        self.rows += 1
+        if self._fmt == FORMAT_JSON:
+            if len(period) == 1:
+                obj = {"period": period[0].isoformat()}
+            else:
+                obj = {"start": period[0].isoformat(), "end": period[1].isoformat()}
+            obj["kwh"] = None if kwh is None else round(kwh, 3)
+            obj["eur"] = None if eur is None else round(eur, 2)
+            self._buffer.append(("\n" if self._first else ",\n") + json.dumps(obj))
+            self._first = False
+            return
+        cells = [self._fmt_period(p) for p in period]
+        if kwh is None or eur is None:
+            cells += ["", ""]
+        else:
+            cells.append(format_number(kwh, 3, self._locale, grouping=False))
+            cells.append(format_number(eur, 2, self._locale, grouping=False))
+        self._buffer.append(self._delimiter.join(cells) + "\n")
+
+    def footer(self) -> None:
+        if self._fmt == FORMAT_JSON:
+            self._buffer.append("\n]\n")
+
+    def flush(self) -> None:
+        """Blocking write of buffered lines – runs in executor."""
+        if self._buffer:
+            self._fp.write("".join(self._buffer))
+            self._buffer.clear()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _fmt_period(self, value: datetime.datetime) -> str:
+        if self._resolution == RESOLUTION_DAY:
+            return format_date(value.date(), self._locale)
+        return format_datetime(value, self._locale)
+
+
+async def async_export_consumption(
+    hass: HomeAssistant,
+    sensor_id: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    resolution: str,
+    fmt: str,
+    locale: str,
+    price_per_kwh: float,
+    path: str,
+    flush_rows: int = 500,
+) -> int:
+    """Streamt den Export nach ``path``; gibt die Anzahl geschriebener Zeilen zurück."""
+    period = RESOLUTION_DAY if resolution == RESOLUTION_DAY else RESOLUTION_HOUR
+    rows = async_iter_consumption(hass, sensor_id, start_date, end_date, period)
+
+    def _open() -> TextIO:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(f"{path}.tmp", "w", encoding="utf-8", newline="")
+
+    fp = await hass.async_add_executor_job(_open)
+    writer = _RowWriter(fp, fmt, resolution, locale)
+    completed = False
+    try:
+        writer.header()
+        if resolution == RESOLUTION_SESSION:
+            async for start, end, kwh in async_iter_sessions(rows):
+                writer.row((start, end), kwh, kwh * price_per_kwh)
+                if writer.pending >= flush_rows:
+                    await hass.async_add_executor_job(writer.flush)
+        else:
+            async for moment, kwh in rows:
+                writer.row((moment,), kwh, None if kwh is None else kwh * price_per_kwh)
+                if writer.pending >= flush_rows:
+                    await hass.async_add_executor_job(writer.flush)
+        writer.footer()
+        await hass.async_add_executor_job(writer.flush)
+        completed = True
+    finally:
+        await hass.async_add_executor_job(fp.close)
+        if not completed:
+            await hass.async_add_executor_job(_remove_quietly, f"{path}.tmp")
+
+    await hass.async_add_executor_job(os.replace, f"{path}.tmp", path)
+    _LOGGER.debug("Export %s: %d Zeilen", path, writer.rows)
+    return writer.rows
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
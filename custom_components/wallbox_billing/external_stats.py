@@ -0,0 +1,198 @@
+"""Hourly consumption and cost as external long-term statistics.
+
+Aus den Stunden-Statistiken des Energiesensors werden zwei externe
+Statistiken mit laufender Summe erzeugt:
+
+- ``wallbox_billing:<entry_id>_energy`` (kWh),
+- ``wallbox_billing:<entry_id>_cost`` (EUR, zum jeweils gültigen Preis).
+
+Importiert werden nur Stunden nach dem Wasserstand im Store
+(``external_statistics``); bereits importierte Stunden werden bei einer
+Preisänderung nicht neu bewertet. Dashboards lesen die Zeilen fertig
+aggregiert, statt die Kosten aus dem Rohsensor nachzurechnen.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORED_STATS_KEY = "external_statistics"
+
+HOUR = datetime.timedelta(hours=1)
+# Stunden je Recorder-Abfrage beim Nachholen (wie CHUNK_DAYS["hour"] im Export)
+CHUNK = datetime.timedelta(days=7)
+# Minute, zu der stündlich importiert wird (Recorder hat die Vorstunde dann kompiliert)
+IMPORT_MINUTE = 15
+
+
+def statistic_ids(entry_id: str) -> tuple[str, str]:
+    """(Energie-, Kosten-)Statistik-ID eines Entries."""
+    object_id = entry_id.lower()
+    return f"{DOMAIN}:{object_id}_energy", f"{DOMAIN}:{object_id}_cost"
+
+
+def _metadata(statistic_id: str, name: str, unit: str) -> dict:
+    metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": name,
+        "source": DOMAIN,
+        "statistic_id": statistic_id,
+        "unit_of_measurement": unit,
+    }
+    try:
+        from homeassistant.components.recorder.models import (  # noqa: PLC0415
+            StatisticMeanType,
+        )
+    except ImportError:
+        return metadata
+    # Ab HA 2025.4 ersetzt mean_type das Feld has_mean
+    metadata["mean_type"] = StatisticMeanType.NONE
+    metadata["unit_class"] = "energy" if unit == "kWh" else None
+    return metadata
+
+
+class ExternalStatisticsImporter:
+    """Imports complete hours since the stored watermark.
+
+    ``state`` ist das Dict aus dem Store: ``last_hour`` (UTC-Beginn der
+    zuletzt importierten Stunde), die Recorder-Summe des Quellsensors zu
+    dieser Stunde (``source_sum``) sowie die laufenden Summen.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, name: str, state: dict
+    ) -> None:
+        self._hass = hass
+        self._state = state
+        state.setdefault("last_hour", None)
+        state.setdefault("source_sum", None)
+        state.setdefault("energy_sum", 0.0)
+        state.setdefault("cost_sum", 0.0)
+        energy_id, cost_id = statistic_ids(entry_id)
+        self._energy_meta = _metadata(energy_id, f"{name} Verbrauch", "kWh")
+        self._cost_meta = _metadata(cost_id, f"{name} Kosten", "EUR")
+        self._lock = asyncio.Lock()
+        self.imported_hours = 0
+
+    async def async_import(
+        self, sensor_id: str, price_per_kwh: float, first_day: datetime.date
+    ) -> int:
+        """Importiert alle abgeschlossenen Stunden seit dem Wasserstand.
+
+        ``first_day`` ist der Beginn beim allerersten Import. Gibt die Zahl
+        der importierten Stunden zurück; nur dann wurde ``state`` geändert.
+        """
+        from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+        from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+            async_add_external_statistics,
+            statistics_during_period,
+        )
+
+        if self._lock.locked():
+            return 0
+        async with self._lock:
+            state = self._state
+            local_tz = dt_util.get_time_zone(self._hass.config.time_zone)
+            if state["last_hour"] is None:
+                # Vor der ersten Stunde: Summe der Vorstunde als Bezug
+                cursor = dt_util.as_utc(
+                    datetime.datetime.combine(first_day, datetime.time(0, 0), tzinfo=local_tz)
+                ) - HOUR
+            else:
+                cursor = datetime.datetime.fromisoformat(state["last_hour"])
+            # Laufende Stunde ist noch nicht kompiliert
+            stop = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+
+            recorder = get_instance(self._hass)
+            imported = 0
+            while cursor + HOUR < stop:
+                chunk_end = min(cursor + CHUNK, stop)
+                stats = await recorder.async_add_executor_job(
+                    statistics_during_period,
+                    self._hass,
+                    cursor,
+                    chunk_end,
+                    {sensor_id},
+                    "hour",
+                    None,
+                    {"sum"},
+                )
+                sums = _sums_by_hour(stats, sensor_id)
+                del stats
+                last = max(sums, default=cursor)
+                if last <= cursor:
+                    if chunk_end < stop:
+                        # Lücke im Recorder (HA war aus) – im nächsten Block weitersuchen
+                        cursor = chunk_end
+                        continue
+                    # Vorstunde noch nicht kompiliert
+                    break
+
+                prev_sum = state["source_sum"]
+                if prev_sum is None:
+                    prev_sum = sums.get(cursor)
+                energy_rows: list[dict] = []
+                cost_rows: list[dict] = []
+                hour = cursor + HOUR
+                while hour <= last:
+                    current = sums.get(hour)
+                    kwh = (
+                        max(0.0, current - prev_sum)
+                        if current is not None and prev_sum is not None
+                        else 0.0
+                    )
+                    if current is not None:
+                        prev_sum = current
+                    state["energy_sum"] = round(state["energy_sum"] + kwh, 4)
+                    state["cost_sum"] = round(state["cost_sum"] + kwh * price_per_kwh, 4)
+                    energy_rows.append(
+                        {"start": hour, "state": round(kwh, 4), "sum": state["energy_sum"]}
+                    )
+                    cost_rows.append(
+                        {
+                            "start": hour,
+                            "state": round(kwh * price_per_kwh, 4),
+                            "sum": state["cost_sum"],
+                        }
+                    )
+                    hour += HOUR
+
+                async_add_external_statistics(self._hass, self._energy_meta, energy_rows)
+                async_add_external_statistics(self._hass, self._cost_meta, cost_rows)
+                cursor = last
+                state["last_hour"] = cursor.isoformat()
+                state["source_sum"] = prev_sum
+                imported += len(energy_rows)
+
+            if imported:
+                self.imported_hours += imported
+                _LOGGER.debug("%d Stunden als externe Statistik importiert (bis %s)", imported, cursor)
+            return imported
+
+
+def _sums_by_hour(stats: dict | None, sensor_id: str) -> dict[datetime.datetime, float]:
+    """Recorder-Zeilen → {UTC-Stundenbeginn: Summe} (float- und datetime-``start``)."""
+    sums: dict[datetime.datetime, float] = {}
+    for row in (stats or {}).get(sensor_id, []):
+        ts_raw = row.get("start") if isinstance(row, dict) else getattr(row, "start", None)
+        val = row.get("sum") if isinstance(row, dict) else getattr(row, "sum", None)
+        if ts_raw is None or val is None:
+            continue
+        if isinstance(ts_raw, (int, float)):
+            moment = datetime.datetime.fromtimestamp(float(ts_raw), tz=datetime.timezone.utc)
+        elif isinstance(ts_raw, datetime.datetime):
+            moment = ts_raw.replace(tzinfo=ts_raw.tzinfo or datetime.timezone.utc)
+            moment = moment.astimezone(datetime.timezone.utc)
+        else:
+            continue
+        sums[moment] = float(val)
+    return sums
@@ -0,0 +1,111 @@
+"""Weekday consumption profile for the billing-period cost forecast.
+
+Beim Abschluss eines Tages wird dessen Verbrauch (Zählerstand am Tagesende
+minus Tagesbeginn) in einen gleitenden Mittelwert je Wochentag eingerechnet –
+O(1), ohne Recorder-Abfrage und ohne die Historie erneut zu durchlaufen.
+Die Prognose summiert dann die erwarteten Werte der Resttage bis zum
+Abrechnungstermin. Der Zustand liegt im Store unter ``forecast``.
+"""
+from __future__ import annotations
+
+import datetime
+
+STORED_FORECAST_KEY = "forecast"
+
+# Gewicht des jüngsten Tages im gleitenden Mittel (~ letzte 4–8 gleiche Wochentage)
+ALPHA = 0.25
+# Längere Lücken (z. B. HA lange aus) nicht verteilen, nur neu ansetzen
+MAX_GAP_DAYS = 14
+
+
+class WeekdayProfile:
+    """Exponentially weighted mean of daily kWh per weekday.
+
+    ``state`` ist das Dict aus dem Store und wird direkt fortgeschrieben.
+    """
+
+    def __init__(self, state: dict) -> None:
+        self._state = state
+        state.setdefault("day", None)
+        state.setdefault("day_start", None)
+        state.setdefault("last_reading", None)
+        state.setdefault("means", [None] * 7)
+        state.setdefault("overall", None)
+        state.setdefault("days", 0)
+
+    @property
+    def days(self) -> int:
+        """Anzahl bisher eingerechneter Tage."""
+        return int(self._state["days"])
+
+    @property
+    def means(self) -> list[float | None]:
+        return self._state["means"]
+
+    def observe(self, reading: float, today: datetime.date) -> None:
+        """Verarbeitet einen (korrigierten) Zählerstand."""
+        self.roll(today)
+        state = self._state
+        if state["day"] is None or state["day_start"] is None:
+            state["day"] = today.isoformat()
+            state["day_start"] = reading
+        state["last_reading"] = reading
+
+    def roll(self, today: datetime.date) -> None:
+        """Schließt alle Tage vor ``today`` mit dem letzten bekannten Stand ab."""
+        state = self._state
+        if state["day"] is None or state["last_reading"] is None:
+            return
+        day = datetime.date.fromisoformat(state["day"])
+        gap = (today - day).days
+        if gap <= 0:
+            return
+        total = state["last_reading"] - state["day_start"]
+        if total >= 0 and gap <= MAX_GAP_DAYS:
+            # Ohne Updates dazwischen lässt sich der Verbrauch nur gleich verteilen
+            per_day = total / gap
+            for offset in range(gap):
+                self._learn((day + datetime.timedelta(days=offset)).weekday(), per_day)
+        state["day"] = today.isoformat()
+        state["day_start"] = state["last_reading"]
+
+    def expected(self, weekday: int) -> float | None:
+        """Erwarteter Tagesverbrauch; ohne Wert für den Wochentag das Gesamtmittel."""
+        mean = self.means[weekday]
+        return mean if mean is not None else self._state["overall"]
+
+    def today_so_far(self) -> float:
+        state = self._state
+        if state["day_start"] is None or state["last_reading"] is None:
+            return 0.0
+        return max(0.0, state["last_reading"] - state["day_start"])
+
+    def remaining(self, now: datetime.datetime, end: datetime.datetime) -> float | None:
+        """Erwarteter Verbrauch von ``now`` bis ``end`` in kWh (None ohne Daten)."""
+        if self._state["overall"] is None:
+            return None
+        if end <= now:
+            return 0.0
+        total = 0.0
+        day = now.date()
+        while day <= end.date():
+            expected = self.expected(day.weekday()) or 0.0
+            if day == end.date():
+                # Abrechnungstermin liegt im Tag: nur den Anteil bis zur Uhrzeit
+                expected *= (end - datetime.datetime.combine(day, datetime.time(), end.tzinfo)) / (
+                    datetime.timedelta(days=1)
+                )
+            if day == now.date():
+                expected = max(0.0, expected - self.today_so_far())
+            total += expected
+            day += datetime.timedelta(days=1)
+        return total
+
+    def _learn(self, weekday: int, kwh: float) -> None:
+        means = self.means
+        mean = means[weekday]
+        means[weekday] = kwh if mean is None else mean + ALPHA * (kwh - mean)
+        overall = self._state["overall"]
+        # Gesamtmittel mit 1/7 des Gewichts, damit es einer Woche folgt
+        self._state["overall"] = kwh if overall is None else overall + ALPHA / 7 * (kwh - overall)
+        self._state["days"] += 1
@@ -0,0 +1,54 @@
+"""Locale-aware number and date formatting for Wallbox Billing.
+
+Gemeinsame Formatregeln für PDF, E-Mail und Export. ``de`` nutzt Dezimalkomma
+und Punkt als Tausendertrenner (1.234,567), ``en`` umgekehrt (1,234.567).
+"""
+from __future__ import annotations
+
+import datetime
+
+LOCALE_DE = "de"
+LOCALE_EN = "en"
+
+_SEPARATORS = {
+    LOCALE_DE: (",", "."),
+    LOCALE_EN: (".", ","),
+}
+
+
+def normalize_locale(language: str | None) -> str:
+    """Map an HA language code ("de-CH", "en_GB", …) to a supported locale."""
+    if language and language.lower().startswith(LOCALE_DE):
+        return LOCALE_DE
+    return LOCALE_EN if language else LOCALE_DE
+
+
+def format_number(
+    value: float, decimals: int, locale: str = LOCALE_DE, grouping: bool = True
+) -> str:
+    """Format a number with the decimal/thousands separators of ``locale``."""
+    decimal_sep, thousands_sep = _SEPARATORS.get(locale, _SEPARATORS[LOCALE_DE])
+    raw = f"{value:,.{decimals}f}" if grouping else f"{value:.{decimals}f}"
+    return (
+        raw.replace(",", "\0").replace(".", decimal_sep).replace("\0", thousands_sep)
+    )
+
+
+def format_kwh(value: float, locale: str = LOCALE_DE) -> str:
+    return f"{format_number(value, 3, locale)} kWh"
+
+
+def format_eur(value: float, locale: str = LOCALE_DE) -> str:
+    # fpdf2's built-in fonts use latin-1; the € sign (U+20AC) is outside that
+    # range, so we use "EUR" which is universally accepted on German invoices.
+    return f"{format_number(value, 2, locale)} EUR"
+
+
+def format_date(day: datetime.date, locale: str = LOCALE_DE) -> str:
+    return day.strftime("%d.%m.%Y") if locale == LOCALE_DE else day.isoformat()
+
+
+def format_datetime(moment: datetime.datetime, locale: str = LOCALE_DE) -> str:
+    if locale == LOCALE_DE:
+        return moment.strftime("%d.%m.%Y %H:%M")
+    return moment.strftime("%Y-%m-%d %H:%M")
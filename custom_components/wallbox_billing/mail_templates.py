@@ -0,0 +1,338 @@
+"""Precompiled e-mail templates (subject, HTML, plaintext) for Wallbox Billing.
+
+Die Texte je Sprache werden einmal je Entry, Sprache und Absendername zu
+``string.Template``-Objekten zusammengesetzt (Layout, Beschriftungen,
+Gruß und Name bereits eingesetzt). Beim Versand werden nur noch die
+formatierten Werte eingefüllt. Monatsnamen kommen aus eigenen Tabellen statt
+aus ``strftime('%B')``, das von der Prozess-Locale abhängt.
+"""
+from __future__ import annotations
+
+import datetime
+import html
+from dataclasses import dataclass
+from string import Template
+
+from .formatting import LOCALE_DE, LOCALE_EN, format_date, format_number
+
+_MONTHS = {
+    LOCALE_DE: (
+        "Januar", "Februar", "März", "April", "Mai", "Juni",
+        "Juli", "August", "September", "Oktober", "November", "Dezember",
+    ),
+    LOCALE_EN: (
+        "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December",
+    ),
+}
+
+_TEXTS = {
+    LOCALE_DE: {
+        "greeting": "Guten Tag,",
+        "closing": "Mit freundlichen Grüßen,",
+        "period": "Zeitraum",
+        "meters": "Zähler",
+        "consumption": "Verbrauch",
+        "price": "Preis/kWh",
+        "total": "Gesamtbetrag",
+        "test_prefix": "TEST: ",
+        "test_notice": "[TEST-E-Mail – keine Werte wurden gespeichert]",
+        "invoice_subject": "${prefix}Wallbox Ladekosten ${month} – ${total}",
+        "invoice_intro": (
+            "anbei finden Sie die Erstattungsanforderung für die Ladekosten "
+            "des Dienstfahrzeuges an der privaten Wallbox."
+        ),
+        "invoice_outro": "Die Abrechnung ist als PDF-Anhang beigefügt.",
+        "sample_subject": "Wallbox Abrechnung – Beispiel-PDF (${month})",
+        "sample_notice": "[BEISPIEL-PDF – enthält keine echten Werte]",
+        "sample_intro": "Anbei finden Sie eine Beispiel-Abrechnung zur Ansicht der PDF-Vorlage.",
+        "sample_consumption": "Verbrauch (Beispiel)",
+        "sample_total": "Betrag (Beispiel)",
+        "annual_subject": "Wallbox Ladekosten Jahresübersicht ${year} – ${total}",
+        "annual_intro": (
+            "anbei finden Sie die Jahresübersicht der Ladekosten des "
+            "Dienstfahrzeuges an der privaten Wallbox für ${year}."
+        ),
+        "resend_subject": "Erneut: ${subject}",
+        "resend_intro": (
+            "anbei erneut die bereits versendete Abrechnung "
+            "(${filename}, erstellt am ${created})."
+        ),
+    },
+    LOCALE_EN: {
+        "greeting": "Hello,",
+        "closing": "Kind regards,",
+        "period": "Period",
+        "meters": "Meters",
+        "consumption": "Consumption",
+        "price": "Price/kWh",
+        "total": "Total",
+        "test_prefix": "TEST: ",
+        "test_notice": "[TEST e-mail – no values were saved]",
+        "invoice_subject": "${prefix}Wallbox charging costs ${month} – ${total}",
+        "invoice_intro": (
+            "please find attached the reimbursement request for charging "
+            "the company car at the private wallbox."
+        ),
+        "invoice_outro": "The invoice is attached as a PDF.",
+        "sample_subject": "Wallbox billing – sample PDF (${month})",
+        "sample_notice": "[SAMPLE PDF – contains no real values]",
+        "sample_intro": "Please find attached a sample invoice to preview the PDF layout.",
+        "sample_consumption": "Consumption (sample)",
+        "sample_total": "Amount (sample)",
+        "annual_subject": "Wallbox charging costs annual summary ${year} – ${total}",
+        "annual_intro": (
+            "please find attached the annual summary of charging costs for "
+            "the company car at the private wallbox for ${year}."
+        ),
+        "resend_subject": "Again: ${subject}",
+        "resend_intro": (
+            "please find attached the previously sent invoice "
+            "(${filename}, created on ${created})."
+        ),
+    },
+}
+
+KIND_INVOICE = "invoice"
+KIND_SAMPLE = "sample"
+KIND_ANNUAL = "annual"
+KIND_RESEND = "resend"
+
+# Art → (Betreff, Einleitung, Zeilen (Beschriftung, Platzhalter, fett), Schlusssatz).
+# Platzhalter mit ``?`` sind optionale Zeilen, die nur mit Wert erscheinen.
+_LAYOUTS: dict[str, tuple[str, str, tuple[tuple[str, str, bool], ...], str | None]] = {
+    KIND_INVOICE: (
+        "invoice_subject",
+        "invoice_intro",
+        (
+            ("period", "period", False),
+            ("meters", "?meters", False),
+            ("consumption", "consumption", False),
+            ("price", "price", False),
+            ("total", "total", True),
+        ),
+        "invoice_outro",
+    ),
+    KIND_SAMPLE: (
+        "sample_subject",
+        "sample_intro",
+        (
+            ("period", "period", False),
+            ("sample_consumption", "consumption", False),
+            ("sample_total", "total", True),
+        ),
+        None,
+    ),
+    KIND_ANNUAL: (
+        "annual_subject",
+        "annual_intro",
+        (
+            ("consumption", "consumption", False),
+            ("total", "total", True),
+        ),
+        None,
+    ),
+    KIND_RESEND: ("resend_subject", "resend_intro", (), None),
+}
+
+_CELL = "<td style='padding:4px 12px'>"
+
+
+@dataclass(frozen=True)
+class RenderedMail:
+    """Fertig gefüllte E-Mail."""
+
+    subject: str
+    html: str
+    text: str
+
+
+@dataclass(frozen=True)
+class _Compiled:
+    subject: Template
+    html: Template
+    text: Template
+    # Optionale Zeilen: Platzhalter → (HTML-, Text-Zeile)
+    optional_rows: dict[str, tuple[Template, Template]]
+
+
+def month_label(day: datetime.date, locale: str = LOCALE_DE) -> str:
+    """„Januar 2026“ bzw. "January 2026" unabhängig von der Prozess-Locale."""
+    return f"{_MONTHS.get(locale, _MONTHS[LOCALE_DE])[day.month - 1]} {day.year}"
+
+
+class MailTemplates:
+    """Compiled templates of one language and sender name.
+
+    Werte für das HTML werden beim Füllen escaped, Beschriftungen und Name
+    bereits beim Kompilieren.
+    """
+
+    def __init__(self, locale: str, owner_name: str) -> None:
+        self.locale = locale if locale in _TEXTS else LOCALE_DE
+        texts = _TEXTS[self.locale]
+        self._test_prefix = texts["test_prefix"]
+        self._notices = {
+            "test": texts["test_notice"],
+            "sample": texts["sample_notice"],
+        }
+        self._compiled = {
+            kind: _compile(texts, layout, owner_name) for kind, layout in _LAYOUTS.items()
+        }
+
+    def invoice(
+        self,
+        period_from: datetime.date,
+        period_to: datetime.date,
+        consumption: float,
+        price_per_kwh: float,
+        total_cost: float,
+        meters: list[tuple[str, float]] | None = None,
+        test_mode: bool = False,
+    ) -> RenderedMail:
+        """Rechnungs-Mail; ``meters`` = [(Zählernummer, kWh)] bei mehreren Zählern."""
+        return self._fill(
+            KIND_INVOICE,
+            notice=self._notices["test"] if test_mode else None,
+            prefix=self._test_prefix if test_mode else "",
+            month=month_label(period_from, self.locale),
+            period=self._period(period_from, period_to),
+            meters=", ".join(f"{number} ({self._kwh(kwh)})" for number, kwh in meters)
+            if meters
+            else None,
+            consumption=self._kwh(consumption),
+            price=f"{format_number(price_per_kwh, 4, self.locale)} €",
+            total=self._eur(total_cost),
+        )
+
+    def sample(
+        self,
+        period_from: datetime.date,
+        period_to: datetime.date,
+        consumption: float,
+        total_cost: float,
+    ) -> RenderedMail:
+        return self._fill(
+            KIND_SAMPLE,
+            notice=self._notices["sample"],
+            month=month_label(period_to, self.locale),
+            period=self._period(period_from, period_to),
+            consumption=self._kwh(consumption),
+            total=self._eur(total_cost),
+        )
+
+    def annual(self, year: int, consumption: float, total_cost: float) -> RenderedMail:
+        return self._fill(
+            KIND_ANNUAL,
+            year=str(year),
+            consumption=self._kwh(consumption),
+            total=self._eur(total_cost),
+        )
+
+    def resend(self, subject: str, filename: str, created: datetime.date) -> RenderedMail:
+        return self._fill(
+            KIND_RESEND,
+            subject=subject,
+            filename=filename,
+            created=format_date(created, self.locale),
+        )
+
+    def _fill(self, kind: str, notice: str | None = None, **values: str | None) -> RenderedMail:
+        compiled = self._compiled[kind]
+        html_values = {key: html.escape(value) for key, value in values.items() if value is not None}
+        text_values = {key: value for key, value in values.items() if value is not None}
+        html_values["notice"] = (
+            f"<p><strong style=\"color:#cc0000\">{html.escape(notice)}</strong></p>" if notice else ""
+        )
+        text_values["notice"] = f"{notice}\n\n" if notice else ""
+        for key, (html_row, text_row) in compiled.optional_rows.items():
+            value = values.get(key)
+            html_values[f"row_{key}"] = html_row.substitute(html_values) if value else ""
+            text_values[f"row_{key}"] = text_row.substitute(text_values) if value else ""
+        return RenderedMail(
+            subject=compiled.subject.substitute(text_values),
+            html=compiled.html.substitute(html_values),
+            text=compiled.text.substitute(text_values),
+        )
+
+    def _period(self, start: datetime.date, end: datetime.date) -> str:
+        return f"{format_date(start, self.locale)} – {format_date(end, self.locale)}"
+
+    def _kwh(self, value: float) -> str:
+        return f"{format_number(value, 3, self.locale)} kWh"
+
+    def _eur(self, value: float) -> str:
+        return f"{format_number(value, 2, self.locale)} €"
+
+
+def _compile(
+    texts: dict[str, str],
+    layout: tuple[str, str, tuple[tuple[str, str, bool], ...], str | None],
+    owner_name: str,
+) -> _Compiled:
+    """Setzt Layout und feste Texte zu Templates zusammen (einmal je Sprache)."""
+    subject_key, intro_key, rows, outro_key = layout
+    owner_html = html.escape(owner_name).replace("$", "$$")
+    owner_text = owner_name.replace("$", "$$")
+
+    html_rows: list[str] = []
+    text_rows: list[str] = []
+    optional_rows: dict[str, tuple[Template, Template]] = {}
+    for label_key, placeholder, bold in rows:
+        label = texts[label_key]
+        name = placeholder.lstrip("?")
+        if bold:
+            html_row = (
+                f"<tr>{_CELL}<strong>{html.escape(label)}:</strong></td>"
+                f"{_CELL}<strong>${{{name}}}</strong></td></tr>"
+            )
+        else:
+            html_row = f"<tr>{_CELL}{html.escape(label)}:</td>{_CELL}${{{name}}}</td></tr>"
+        text_row = f"{label}: ${{{name}}}\n"
+        if placeholder.startswith("?"):
+            optional_rows[name] = (Template(html_row), Template(text_row))
+            html_row = f"${{row_{name}}}"
+            text_row = f"${{row_{name}}}"
+        html_rows.append(html_row)
+        text_rows.append(text_row)
+
+    intro = texts[intro_key]
+    outro = texts[outro_key] if outro_key else None
+    html_body = (
+        f"<p>{html.escape(texts['greeting'])}</p>"
+        "${notice}"
+        f"<p>{html.escape(intro)}</p>"
+        + (
+            "<table style='border-collapse:collapse;font-family:sans-serif'>"
+            + "".join(html_rows)
+            + "</table>"
+            if html_rows
+            else ""
+        )
+        + (f"<p>{html.escape(outro)}</p>" if outro else "")
+        + f"<p>{html.escape(texts['closing'])}<br/>{owner_html}</p>"
+    )
+    text_body = (
+        f"{texts['greeting']}\n\n"
+        "${notice}"
+        f"{intro}\n\n"
+        + ("".join(text_rows) + "\n" if text_rows else "")
+        + (f"{outro}\n\n" if outro else "")
+        + f"{texts['closing']}\n{owner_text}\n"
+    )
+    return _Compiled(
+        subject=Template(texts[subject_key]),
+        html=Template(html_body),
+        text=Template(text_body),
+        optional_rows=optional_rows,
+    )
+
+
+def get_mail_templates(data: dict, locale: str, owner_name: str) -> MailTemplates:
+    """Kompilierte Templates eines Entries, gecacht je Sprache und Absender."""
+    cache: dict[tuple[str, str], MailTemplates] = data.setdefault("mail_templates", {})
+    key = (locale, owner_name)
+    templates = cache.get(key)
+    if templates is None:
+        templates = cache[key] = MailTemplates(locale, owner_name)
+    return templates
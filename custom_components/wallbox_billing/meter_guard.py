@@ -0,0 +1,142 @@
+"""Host-side plausibility check of the meter stream for Wallbox Billing.
+
+Die ESPHome-Firmware sichert die Impulse nur alle 50 Impulse im Flash. Nach
+einem Stromausfall springt der Zählerstand daher zurück (bis 0,05 kWh) und
+steht still, bis die verlorenen Impulse wieder aufgeholt sind; ein Reset des
+Zählers beginnt bei ~0. ``MeterGuard`` prüft jedes Update in O(1):
+
+- Rücksprung/Reset: der Fehlbetrag wird auf einen laufenden Korrektur-Offset
+  addiert, damit der korrigierte Stand monoton bleibt,
+- Ausfall: Zeiträume, in denen der Sensor nicht verfügbar war,
+- Sprung: unplausibel großer Anstieg (z. B. manuelle Korrektur).
+
+Alle Ereignisse werden mit Zeitraum gespeichert und auf der Rechnung
+ausgewiesen. Der Zustand liegt im Store unter ``meter_guard``.
+"""
+from __future__ import annotations
+
+import datetime
+
+STORED_GUARD_KEY = "meter_guard"
+
+EVENT_REGRESSION = "regression"
+EVENT_RESET = "reset"
+EVENT_OUTAGE = "outage"
+EVENT_JUMP = "jump"
+
+# Kleinere Rückgänge sind Rundungsrauschen (Sensor liefert 3 Nachkommastellen)
+TOLERANCE_KWH = 0.0005
+# Liegt der neue Stand darunter, wurde der Zähler zurückgesetzt
+RESET_BELOW_KWH = 1.0
+# Mehr als diese mittlere Leistung ist für eine Wallbox unplausibel
+MAX_POWER_KW = 50.0
+MIN_JUMP_KWH = 1.0
+# Kürzere Ausfälle (z. B. WLAN-Reconnect) werden nicht ausgewiesen
+OUTAGE_MIN_SECONDS = 60
+MAX_EVENTS = 200
+# Sekunden, über die Store-Schreibvorgänge für den laufenden Rohwert gebündelt werden.
+# Der Zähler meldet etwa alle 10 s; beim HA-Stopp und beim Entladen wird ein
+# ausstehender Stand ohnehin geschrieben, Ereignisse werden sofort gespeichert.
+SAVE_DELAY = 15 * 60
+
+
+class MeterGuard:
+    """Streaming validator with a running correction offset.
+
+    ``state`` ist das Dict aus dem Store und wird direkt fortgeschrieben.
+    """
+
+    def __init__(self, state: dict) -> None:
+        self._state = state
+        state.setdefault("last_raw", None)
+        state.setdefault("last_time", None)
+        state.setdefault("offset", 0.0)
+        state.setdefault("unavailable_since", None)
+        state.setdefault("events", [])
+
+    @property
+    def offset(self) -> float:
+        return float(self._state["offset"])
+
+    @property
+    def events(self) -> list[dict]:
+        return self._state["events"]
+
+    def corrected(self, raw: float) -> float:
+        """Korrigierter Zählerstand zu einem Rohwert."""
+        return round(raw + self.offset, 3)
+
+    def update(self, raw: float | None, when: datetime.datetime) -> list[dict]:
+        """Verarbeitet ein Sensor-Update (``None`` = nicht verfügbar).
+
+        Gibt die dabei neu erkannten Ereignisse zurück (meist leer).
+        """
+        state = self._state
+        if raw is None:
+            if state["unavailable_since"] is None:
+                state["unavailable_since"] = when.isoformat()
+            return []
+
+        new_events: list[dict] = []
+        if state["unavailable_since"] is not None:
+            since = datetime.datetime.fromisoformat(state["unavailable_since"])
+            state["unavailable_since"] = None
+            if (when - since).total_seconds() >= OUTAGE_MIN_SECONDS:
+                new_events.append(self._add_event(EVENT_OUTAGE, since, when, 0.0))
+
+        last_raw = state["last_raw"]
+        last_time = (
+            datetime.datetime.fromisoformat(state["last_time"]) if state["last_time"] else when
+        )
+        if last_raw is not None:
+            delta = raw - last_raw
+            if delta < -TOLERANCE_KWH:
+                kind = EVENT_RESET if raw < RESET_BELOW_KWH else EVENT_REGRESSION
+                state["offset"] = round(self.offset - delta, 3)
+                new_events.append(self._add_event(kind, last_time, when, -delta))
+            elif delta > MIN_JUMP_KWH:
+                hours = (when - last_time).total_seconds() / 3600
+                if hours <= 0 or delta / hours > MAX_POWER_KW:
+                    new_events.append(self._add_event(EVENT_JUMP, last_time, when, delta))
+
+        state["last_raw"] = raw
+        state["last_time"] = when.isoformat()
+        return new_events
+
+    def events_between(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> list[dict]:
+        """Ereignisse, die den Zeitraum [start, end] berühren."""
+        return [
+            event
+            for event in self.events
+            if datetime.datetime.fromisoformat(event["end"]) >= start
+            and datetime.datetime.fromisoformat(event["start"]) <= end
+        ]
+
+    def prune(self, before: datetime.datetime) -> None:
+        """Entfernt Ereignisse, die vor ``before`` endeten (bereits abgerechnet)."""
+        self._state["events"] = [
+            event
+            for event in self.events
+            if datetime.datetime.fromisoformat(event["end"]) >= before
+        ]
+
+    def _add_event(
+        self,
+        kind: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        kwh: float,
+    ) -> dict:
+        event = {
+            "kind": kind,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "kwh": round(kwh, 3),
+        }
+        events = self.events
+        events.append(event)
+        if len(events) > MAX_EVENTS:
+            del events[: len(events) - MAX_EVENTS]
+        return event
@@ -0,0 +1,42 @@
+"""Additional meters billed on the same invoice as the main energy sensor.
+
+Weitere Zähler werden in den Optionen zeilenweise eingetragen:
+
+    sensor.wallbox_garage; WB-4711; 1234,5
+
+(Energiesensor; Zählernummer; optional Startwert in kWh). Ihr Stand zur
+letzten Abrechnung liegt im Store unter ``meter_readings`` je Sensor.
+"""
+from __future__ import annotations
+
+import re
+
+STORED_METER_READINGS_KEY = "meter_readings"
+
+_ENTITY_ID = re.compile(r"^sensor\.[a-z0-9_]+$")
+
+
+def parse_additional_meters(text: str | None) -> list[dict]:
+    """Parst die Options-Zeilen zu [{sensor, meter_number, initial_reading}].
+
+    Leere Zeilen und ``#``-Kommentare werden übersprungen; ungültige Zeilen
+    lösen ``ValueError`` mit der Zeilennummer aus.
+    """
+    meters: list[dict] = []
+    seen: set[str] = set()
+    for number, line in enumerate((text or "").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = [part.strip() for part in line.split(";")]
+        if len(parts) not in (2, 3) or not _ENTITY_ID.match(parts[0]) or not parts[1]:
+            raise ValueError(f"Zeile {number}: erwartet 'sensor.id; Zählernummer[; Startwert]'")
+        if parts[0] in seen:
+            raise ValueError(f"Zeile {number}: {parts[0]} ist doppelt eingetragen")
+        try:
+            initial = float(parts[2].replace(",", ".")) if len(parts) == 3 and parts[2] else 0.0
+        except ValueError as exc:
+            raise ValueError(f"Zeile {number}: ungültiger Startwert '{parts[2]}'") from exc
+        seen.add(parts[0])
+        meters.append({"sensor": parts[0], "meter_number": parts[1], "initial_reading": initial})
+    return meters
@@ -1,25 +1,26 @@
 """PDF invoice generator for Wallbox Billing.
 
-fpdf2 is imported lazily inside generate_invoice_pdf() so that the integration
+fpdf2 is imported lazily inside _new_pdf() so that the integration
 package can be loaded by Home Assistant even before fpdf2 is installed.
 """
 from __future__ import annotations
 
 import datetime
 
+from .anomalies import FLAG_MISSING, FLAG_SPIKE, FLAG_ZERO, flag_days
+from .formatting import format_eur, format_kwh, format_number
+
 
 def _fmt_kwh(value: float) -> str:
-    return f"{value:,.3f} kWh".replace(",", "X").replace(".", ",").replace("X", ".")
+    return format_kwh(value)
 
 
 def _fmt_eur(value: float) -> str:
-    # fpdf2's built-in fonts use latin-1; the € sign (U+20AC) is outside that
-    # range, so we use "EUR" which is universally accepted on German invoices.
-    return f"{value:,.2f} EUR".replace(",", "X").replace(".", ",").replace("X", ".")
+    return format_eur(value)
 
 
 def _fmt_price(value: float) -> str:
-    return f"{value:.4f} EUR/kWh".replace(".", ",")
+    return f"{format_number(value, 4, grouping=False)} EUR/kWh"
 
 
 def _fmt_date(d: datetime.date) -> str:
@@ -30,31 +31,11 @@ def _fmt_datetime(dt: datetime.datetime) -> str:
     return dt.strftime("%d.%m.%Y %H:%M Uhr")
 
 
-def generate_invoice_pdf(
-    owner_name: str,
-    meter_number: str,
-    recipient_email: str,
-    period_from: datetime.date,
-    period_to: datetime.date,
-    reading_previous: float,
-    reading_current: float,
-    price_per_kwh: float,
-    start_datetime: datetime.datetime | None = None,
-    daily_data: list[tuple[datetime.date, float]] | None = None,
-) -> bytes:
-    """Generate a PDF invoice and return it as bytes.
+def _new_pdf(title: str, subtitle: str):
+    """Create an FPDF document with the common Wallbox header and footer.
 
     fpdf2 is imported here to avoid a top-level import error when the
     library is not yet installed (HA installs requirements on first boot).
-
-    Parameters
-    ----------
-    start_datetime:
-        Exakter Zeitstempel des letzten Abrechnungsstarts (wird auf Seite 1
-        angezeigt). Falls None, wird nur das Datum verwendet.
-    daily_data:
-        Liste von (date, kwh) für jeden Kalendertag im Abrechnungszeitraum.
-        Falls übergeben, wird eine zweite Seite mit Tagesübersicht erzeugt.
     """
     try:
         from fpdf import FPDF  # noqa: PLC0415
@@ -64,21 +45,16 @@ def generate_invoice_pdf(
             "Bitte Home Assistant neu starten, damit die Anforderung installiert wird."
         ) from exc
 
-    from io import BytesIO  # noqa: PLC0415
-
-    consumption = reading_current - reading_previous
-    total_cost = consumption * price_per_kwh
-    today_str = _fmt_date(period_to)
     now_str = datetime.datetime.now().strftime("%d.%m.%Y %H:%M Uhr")
 
     class _InvoicePDF(FPDF):
         def header(self) -> None:
             self.set_font("Helvetica", "B", 22)
             self.set_text_color(30, 60, 120)
-            self.cell(0, 12, "Erstattungsanforderung", ln=True, align="C")
+            self.cell(0, 12, title, ln=True, align="C")
             self.set_font("Helvetica", "", 13)
             self.set_text_color(60, 60, 60)
-            self.cell(0, 8, "Ladekosten Dienstfahrzeug (Wallbox)", ln=True, align="C")
+            self.cell(0, 8, subtitle, ln=True, align="C")
             self.ln(3)
             self.set_draw_color(30, 60, 120)
             self.set_line_width(0.8)
@@ -100,6 +76,62 @@ def generate_invoice_pdf(
 
     pdf = _InvoicePDF()
     pdf.set_auto_page_break(auto=True, margin=20)
+    return pdf
+
+
+def _section_title(pdf, text: str) -> None:
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_fill_color(30, 60, 120)
+    pdf.set_text_color(255, 255, 255)
+    pdf.cell(0, 8, f"  {text}", ln=True, fill=True)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Helvetica", "", 11)
+    pdf.ln(2)
+
+
+def generate_invoice_pdf(
+    owner_name: str,
+    meter_number: str,
+    recipient_email: str,
+    period_from: datetime.date,
+    period_to: datetime.date,
+    reading_previous: float,
+    reading_current: float,
+    price_per_kwh: float,
+    start_datetime: datetime.datetime | None = None,
+    daily_data: list[tuple[datetime.date, float]] | None = None,
+    meter_events: list[tuple[datetime.datetime, datetime.datetime, str, float]] | None = None,
+    additional_meters: list[tuple[str, float, float]] | None = None,
+    missing_days: list[datetime.date] | None = None,
+) -> bytes:
+    """Generate a PDF invoice and return it as bytes.
+
+    Parameters
+    ----------
+    start_datetime:
+        Exakter Zeitstempel des letzten Abrechnungsstarts (wird auf Seite 1
+        angezeigt). Falls None, wird nur das Datum verwendet.
+    daily_data:
+        Liste von (date, kwh) für jeden Kalendertag im Abrechnungszeitraum.
+        Falls übergeben, wird eine zweite Seite mit Tagesübersicht erzeugt.
+    meter_events:
+        Zählerereignisse im Zeitraum als (Beginn, Ende, Art, kWh); werden
+        unter der Unterschrift als Hinweis aufgelistet.
+    additional_meters:
+        Weitere Zähler derselben Rechnung als (Zählernummer, Stand Beginn,
+        Stand Ende). Jeder Zähler erhält einen eigenen Abschnitt im
+        Zählerstandsnachweis; Verbrauch und Betrag sind die Summe aller Zähler.
+        ``daily_data`` muss dann bereits über alle Zähler summiert sein.
+    missing_days:
+        Tage ohne Recorder-Daten (in ``daily_data`` als 0,0 kWh); werden auf
+        der Tagesübersicht zusammen mit Nulltagen und Spitzen markiert.
+    """
+    meters = [(meter_number, reading_previous, reading_current), *(additional_meters or [])]
+    consumption = sum(current - previous for _, previous, current in meters)
+    total_cost = consumption * price_per_kwh
+    today_str = _fmt_date(period_to)
+
+    pdf = _new_pdf("Erstattungsanforderung", "Ladekosten Dienstfahrzeug (Wallbox)")
     pdf.add_page()
 
     # ── Sender / Recipient block ─────────────────────────────────────────────
@@ -117,7 +149,10 @@ def generate_invoice_pdf(
     pdf.ln(4)
     pdf.set_font("Helvetica", "", 10)
     pdf.set_text_color(80, 80, 80)
-    pdf.cell(95, 6, f"Zahlernummer: {meter_number}", ln=False)
+    if len(meters) > 1:
+        pdf.cell(95, 6, f"Zahlernummern: {', '.join(number for number, _, _ in meters)}", ln=False)
+    else:
+        pdf.cell(95, 6, f"Zahlernummer: {meter_number}", ln=False)
     pdf.cell(5, 6, "", ln=False)
     pdf.cell(90, 6, f"Datum: {today_str}", ln=True)
     pdf.set_text_color(0, 0, 0)
@@ -165,12 +200,31 @@ def generate_invoice_pdf(
     pdf.cell(80, 7, "Wert", ln=True, fill=True, border=1, align="R")
 
     pdf.set_font("Helvetica", "", 11)
-    rows = [
-        (begin_label, _fmt_kwh(reading_previous)),
-        (end_label, _fmt_kwh(reading_current)),
-        ("Verbrauch", _fmt_kwh(consumption)),
-        ("Preis je kWh", _fmt_price(price_per_kwh)),
-    ]
+    if len(meters) > 1:
+        # Je Zähler ein Abschnitt mit Beginn, Ende und Verbrauch
+        for number, previous, current in meters:
+            pdf.set_font("Helvetica", "B", 10)
+            pdf.set_fill_color(235, 239, 248)
+            pdf.cell(190, 7, f"  Zaehler {number}", ln=True, fill=True, border=1)
+            pdf.set_font("Helvetica", "", 11)
+            for label, value in (
+                (begin_label, _fmt_kwh(previous)),
+                (end_label, _fmt_kwh(current)),
+                ("Verbrauch", _fmt_kwh(current - previous)),
+            ):
+                pdf.cell(110, 7, f"  {label}", ln=False, border=1)
+                pdf.cell(80, 7, value, ln=True, border=1, align="R")
+        rows = [
+            ("Verbrauch gesamt", _fmt_kwh(consumption)),
+            ("Preis je kWh", _fmt_price(price_per_kwh)),
+        ]
+    else:
+        rows = [
+            (begin_label, _fmt_kwh(reading_previous)),
+            (end_label, _fmt_kwh(reading_current)),
+            ("Verbrauch", _fmt_kwh(consumption)),
+            ("Preis je kWh", _fmt_price(price_per_kwh)),
+        ]
     for i, (label, value) in enumerate(rows):
         fill_color = (248, 250, 255) if i % 2 == 0 else (255, 255, 255)
         pdf.set_fill_color(*fill_color)
@@ -207,13 +261,63 @@ def generate_invoice_pdf(
     pdf.set_font("Helvetica", "B", 11)
     pdf.cell(0, 7, owner_name, ln=True)
 
+    if meter_events:
+        _add_meter_events(pdf, meter_events)
+
     # ── Seite 2: Tagesübersicht ───────────────────────────────────────────────
     if daily_data is not None:
-        _add_daily_page(pdf, daily_data, price_per_kwh, consumption, total_cost)
+        _add_daily_page(
+            pdf, daily_data, price_per_kwh, consumption, total_cost, set(missing_days or ())
+        )
 
-    buf = BytesIO()
-    buf.write(pdf.output())
-    return buf.getvalue()
+    return bytes(pdf.output())
+
+
+_METER_EVENT_LABELS = {
+    "regression": "Ruecksprung nach Neustart (korrigiert)",
+    "reset": "Zaehler-Reset (korrigiert)",
+    "outage": "Sensor nicht verfuegbar",
+    "jump": "Unplausibler Anstieg (nicht korrigiert)",
+}
+
+
+def _add_meter_events(
+    pdf,
+    meter_events: list[tuple[datetime.datetime, datetime.datetime, str, float]],
+) -> None:
+    """Listet Zählerereignisse des Abrechnungszeitraums auf Seite 1 auf."""
+    pdf.ln(8)
+    _section_title(pdf, "Hinweise zur Zaehlererfassung")
+    pdf.set_font("Helvetica", "", 9)
+    pdf.multi_cell(
+        0,
+        5,
+        "Im Abrechnungszeitraum wurden folgende Auffaelligkeiten im Zaehlerverlauf "
+        "erkannt. Rueckspruenge und Resets sind im Zaehlerstand Ende bereits "
+        "ausgeglichen; waehrend eines Ausfalls koennen Impulse fehlen.",
+    )
+    pdf.ln(2)
+    pdf.set_font("Helvetica", "B", 9)
+    pdf.set_fill_color(220, 228, 245)
+    pdf.cell(70, 6, "  Zeitraum", ln=False, fill=True, border=1)
+    pdf.cell(85, 6, "Ereignis", ln=False, fill=True, border=1)
+    pdf.cell(35, 6, "kWh", ln=True, fill=True, border=1, align="R")
+    pdf.set_font("Helvetica", "", 9)
+    for start, end, kind, kwh in meter_events:
+        if start.date() == end.date():
+            span = f"{start.strftime('%d.%m.%Y %H:%M')}-{end.strftime('%H:%M')}"
+        else:
+            span = f"{start.strftime('%d.%m. %H:%M')}-{end.strftime('%d.%m.%Y %H:%M')}"
+        pdf.cell(70, 6, f"  {span}", ln=False, border=1)
+        pdf.cell(85, 6, _METER_EVENT_LABELS.get(kind, kind), ln=False, border=1)
+        pdf.cell(35, 6, _fmt_kwh(kwh) if kwh else "-", ln=True, border=1, align="R")
+
+
+_ANOMALY_LABELS = {
+    FLAG_MISSING: "keine Recorder-Daten",
+    FLAG_ZERO: "0 kWh zw. Ladetagen",
+    FLAG_SPIKE: "ungewoehnlich hoch",
+}
 
 
 def _add_daily_page(
@@ -222,8 +326,13 @@ def _add_daily_page(
     price_per_kwh: float,
     billed_consumption: float,
     billed_total: float,
+    missing_days: set[datetime.date] | None = None,
 ) -> None:
-    """Fügt Seite 2 mit der Tagesübersicht an das PDF an."""
+    """Fügt Seite 2 mit der Tagesübersicht an das PDF an.
+
+    Auffällige Tage (siehe anomalies.py) werden farbig hinterlegt und in der
+    Spalte "Hinweis" benannt.
+    """
     pdf.add_page()
 
     # ── Seitenüberschrift ────────────────────────────────────────────────────
@@ -235,25 +344,37 @@ def _add_daily_page(
     pdf.ln(4)
 
     # ── Tabellen-Header ──────────────────────────────────────────────────────
-    col_date = 60
-    col_kwh = 70
-    col_eur = 60
+    col_date = 45
+    col_kwh = 45
+    col_eur = 40
+    col_note = 60
 
     pdf.set_font("Helvetica", "B", 10)
     pdf.set_fill_color(220, 228, 245)
     pdf.cell(col_date, 7, "  Datum", ln=False, fill=True, border=1)
     pdf.cell(col_kwh, 7, "Verbrauch (kWh)", ln=False, fill=True, border=1, align="R")
-    pdf.cell(col_eur, 7, "Kosten (EUR)", ln=True, fill=True, border=1, align="R")
+    pdf.cell(col_eur, 7, "Kosten (EUR)", ln=False, fill=True, border=1, align="R")
+    pdf.cell(col_note, 7, "  Hinweis", ln=True, fill=True, border=1)
 
     # ── Tageszeilen ──────────────────────────────────────────────────────────
     pdf.set_font("Helvetica", "", 10)
-    for i, (day, kwh) in enumerate(daily_data):
+    flagged = 0
+    for i, (day, kwh, flags) in enumerate(flag_days(daily_data, missing_days or ())):
         cost = kwh * price_per_kwh
-        fill_color = (248, 250, 255) if i % 2 == 0 else (255, 255, 255)
+        if flags:
+            flagged += 1
+            fill_color = (255, 235, 200)
+        else:
+            fill_color = (248, 250, 255) if i % 2 == 0 else (255, 255, 255)
         pdf.set_fill_color(*fill_color)
         pdf.cell(col_date, 6, f"  {_fmt_date(day)}", ln=False, fill=True, border=1)
         pdf.cell(col_kwh, 6, _fmt_kwh(kwh), ln=False, fill=True, border=1, align="R")
-        pdf.cell(col_eur, 6, _fmt_eur(cost), ln=True, fill=True, border=1, align="R")
+        pdf.cell(col_eur, 6, _fmt_eur(cost), ln=False, fill=True, border=1, align="R")
+        if flags:
+            pdf.set_text_color(180, 60, 0)
+        note = ", ".join(_ANOMALY_LABELS[flag] for flag in flags)
+        pdf.cell(col_note, 6, f"  {note}" if note else "", ln=True, fill=True, border=1)
+        pdf.set_text_color(0, 0, 0)
 
     # ── Summenzeile ──────────────────────────────────────────────────────────
     daily_sum_kwh = sum(kwh for _, kwh in daily_data)
@@ -263,7 +384,8 @@ def _add_daily_page(
     pdf.set_fill_color(200, 215, 240)
     pdf.cell(col_date, 7, "  Summe Tageswerte", ln=False, fill=True, border=1)
     pdf.cell(col_kwh, 7, _fmt_kwh(daily_sum_kwh), ln=False, fill=True, border=1, align="R")
-    pdf.cell(col_eur, 7, _fmt_eur(daily_sum_eur), ln=True, fill=True, border=1, align="R")
+    pdf.cell(col_eur, 7, _fmt_eur(daily_sum_eur), ln=False, fill=True, border=1, align="R")
+    pdf.cell(col_note, 7, "", ln=True, fill=True, border=1)
 
     pdf.ln(4)
 
@@ -272,7 +394,8 @@ def _add_daily_page(
     pdf.set_fill_color(240, 243, 250)
     pdf.cell(col_date, 7, "  Rechnungsbetrag (S. 1)", ln=False, fill=True, border=1)
     pdf.cell(col_kwh, 7, _fmt_kwh(billed_consumption), ln=False, fill=True, border=1, align="R")
-    pdf.cell(col_eur, 7, _fmt_eur(billed_total), ln=True, fill=True, border=1, align="R")
+    pdf.cell(col_eur, 7, _fmt_eur(billed_total), ln=False, fill=True, border=1, align="R")
+    pdf.cell(col_note, 7, "", ln=True, fill=True, border=1)
 
     diff_kwh = daily_sum_kwh - billed_consumption
     diff_eur = daily_sum_eur - billed_total
@@ -298,8 +421,9 @@ def _add_daily_page(
     pdf.cell(
         col_eur, 7,
         f"{sign}{_fmt_eur(diff_eur)}",
-        ln=True, fill=True, border=1, align="R",
+        ln=False, fill=True, border=1, align="R",
     )
+    pdf.cell(col_note, 7, "", ln=True, fill=True, border=1)
     pdf.set_text_color(0, 0, 0)
 
     # ── Hinweistext ──────────────────────────────────────────────────────────
@@ -314,5 +438,92 @@ def _add_daily_page(
         "(z. B. wenn eine Abrechnung tagsüber ausgelöst wird). "
         "Fehlende Recorder-Daten werden als 0,000 kWh dargestellt."
     )
-    pdf.multi_cell(col_date + col_kwh + col_eur, 5, hint)
+    if flagged:
+        hint += (
+            f" {flagged} Tag(e) sind markiert: fehlende Recorder-Daten, Tage ohne "
+            "Verbrauch zwischen Ladetagen oder Tage deutlich ueber dem "
+            "90-%-Perzentil der vorangegangenen Ladetage."
+        )
+    pdf.multi_cell(col_date + col_kwh + col_eur + col_note, 5, hint)
+    pdf.set_text_color(0, 0, 0)
+
+
+def generate_annual_summary_pdf(
+    owner_name: str,
+    meter_number: str,
+    year: int,
+    months: list[tuple[datetime.date, float, float]],
+    additional_meter_numbers: list[str] | None = None,
+) -> bytes:
+    """Generate a 12-month summary PDF from monthly rollups.
+
+    Parameters
+    ----------
+    months:
+        Liste von (Monatserster, kWh, EUR) – typischerweise aus
+        ``rollups.yearly_summary``. Fehlende Monate werden mit 0 dargestellt.
+    additional_meter_numbers:
+        Nummern der weiteren Zähler, deren Verbrauch in den Monatswerten
+        enthalten ist (siehe meters.py).
+    """
+    by_month = {first.month: (kwh, cost) for first, kwh, cost in months}
+
+    pdf = _new_pdf("Jahresuebersicht", f"Ladekosten Dienstfahrzeug (Wallbox) {year}")
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(95, 7, owner_name, ln=False)
+    pdf.cell(5, 7, "", ln=False)
+    numbers = [meter_number, *(additional_meter_numbers or [])]
+    if len(numbers) > 1:
+        pdf.cell(90, 7, f"Zahlernummern: {', '.join(numbers)}", ln=True)
+    else:
+        pdf.cell(90, 7, f"Zahlernummer: {meter_number}", ln=True)
+    pdf.ln(6)
+
+    _section_title(pdf, f"Monatswerte {year}")
+
+    col_month = 60
+    col_kwh = 70
+    col_eur = 60
+
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.set_fill_color(220, 228, 245)
+    pdf.cell(col_month, 7, "  Monat", ln=False, fill=True, border=1)
+    pdf.cell(col_kwh, 7, "Verbrauch (kWh)", ln=False, fill=True, border=1, align="R")
+    pdf.cell(col_eur, 7, "Kosten (EUR)", ln=True, fill=True, border=1, align="R")
+
+    pdf.set_font("Helvetica", "", 10)
+    sum_kwh = 0.0
+    sum_eur = 0.0
+    for month in range(1, 13):
+        kwh, cost = by_month.get(month, (0.0, 0.0))
+        sum_kwh += kwh
+        sum_eur += cost
+        fill_color = (248, 250, 255) if month % 2 else (255, 255, 255)
+        pdf.set_fill_color(*fill_color)
+        label = datetime.date(year, month, 1).strftime("%m/%Y")
+        pdf.cell(col_month, 6, f"  {label}", ln=False, fill=True, border=1)
+        pdf.cell(col_kwh, 6, _fmt_kwh(kwh), ln=False, fill=True, border=1, align="R")
+        pdf.cell(col_eur, 6, _fmt_eur(cost), ln=True, fill=True, border=1, align="R")
+
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.set_fill_color(30, 60, 120)
+    pdf.set_text_color(255, 255, 255)
+    pdf.cell(col_month, 8, "  SUMME", ln=False, fill=True, border=1)
+    pdf.cell(col_kwh, 8, _fmt_kwh(sum_kwh), ln=False, fill=True, border=1, align="R")
+    pdf.cell(col_eur, 8, _fmt_eur(sum_eur), ln=True, fill=True, border=1, align="R")
+    pdf.set_text_color(0, 0, 0)
+
+    pdf.ln(6)
+    pdf.set_font("Helvetica", "I", 9)
+    pdf.set_text_color(100, 100, 100)
+    pdf.multi_cell(
+        col_month + col_kwh + col_eur,
+        5,
+        "Hinweis: Die Monatswerte werden aus den Tagesstatistiken des Home Assistant "
+        "Recorders gebildet und mit dem jeweils gueltigen Strompreis bewertet.",
+    )
     pdf.set_text_color(0, 0, 0)
+
+    return bytes(pdf.output())
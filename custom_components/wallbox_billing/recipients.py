@@ -0,0 +1,74 @@
+"""Recipient lists (To/CC/BCC) for Wallbox Billing mails.
+
+Empfänger, Kopie und Blindkopie werden in den Optionen als Liste mit Komma,
+Semikolon oder Zeilenumbruch getrennt eingetragen. Versendet wird in einer
+SMTP-Transaktion: ein ``MAIL FROM``, ein ``RCPT TO`` je Adresse, ein
+``DATA`` – das PDF wird also nur einmal kodiert und übertragen. BCC-Adressen
+stehen nur im Umschlag, nicht im Header.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from .const import CONF_BCC_EMAIL, CONF_CC_EMAIL, CONF_RECIPIENT_EMAIL
+
+_SEPARATORS = re.compile(r"[,;\n]+")
+_ADDRESS = re.compile(r"^[^@\s<>,;]+@[^@\s<>,;]+\.[^@\s<>,;]+$")
+
+
+def parse_addresses(text: str | None) -> list[str]:
+    """Zerlegt eine Adressliste; ungültige Adressen lösen ``ValueError`` aus."""
+    addresses: list[str] = []
+    for part in _SEPARATORS.split(text or ""):
+        address = part.strip()
+        if not address:
+            continue
+        if not _ADDRESS.match(address):
+            raise ValueError(f"Ungültige E-Mail-Adresse: '{address}'")
+        if address.lower() not in (known.lower() for known in addresses):
+            addresses.append(address)
+    return addresses
+
+
+@dataclass(frozen=True)
+class Recipients:
+    """Empfänger einer E-Mail."""
+
+    to: list[str]
+    cc: list[str] = field(default_factory=list)
+    bcc: list[str] = field(default_factory=list)
+
+    @property
+    def envelope(self) -> list[str]:
+        """Alle Adressen für ``RCPT TO`` (ohne Doppelte, Reihenfolge To, CC, BCC)."""
+        seen: set[str] = set()
+        result: list[str] = []
+        for address in (*self.to, *self.cc, *self.bcc):
+            if address.lower() not in seen:
+                seen.add(address.lower())
+                result.append(address)
+        return result
+
+    def __str__(self) -> str:
+        return ", ".join(self.envelope)
+
+
+def recipients_from_config(cfg: dict) -> Recipients:
+    """Empfänger aus der Entry-Konfiguration; prüft die Adressen nicht erneut streng.
+
+    Ungültige Einträge wurden bereits im Options-Dialog abgelehnt; ältere
+    Konfigurationen mit nur einer Adresse bleiben gültig.
+    """
+    return Recipients(
+        to=_lenient(cfg.get(CONF_RECIPIENT_EMAIL)),
+        cc=_lenient(cfg.get(CONF_CC_EMAIL)),
+        bcc=_lenient(cfg.get(CONF_BCC_EMAIL)),
+    )
+
+
+def _lenient(text: str | None) -> list[str]:
+    try:
+        return parse_addresses(text)
+    except ValueError:
+        return [part.strip() for part in _SEPARATORS.split(text or "") if part.strip()]
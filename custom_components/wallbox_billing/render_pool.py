@@ -0,0 +1,107 @@
+"""Dedicated, bounded worker pool for PDF rendering.
+
+Das Rendern läuft nicht im allgemeinen HA-Executor, sondern in einem eigenen
+Pool pro Config-Entry – wahlweise Threads oder Prozesse (fpdf2 läuft dann im
+Kindprozess). Höchstens ``max_workers`` Aufträge sind gleichzeitig im Pool;
+weitere warten auf dem Event-Loop und werden als Warteschlangentiefe gezählt.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+MODE_THREAD = "thread"
+MODE_PROCESS = "process"
+
+
+class RenderPool:
+    """Bounded thread/process pool with queue-depth metrics."""
+
+    def __init__(self, mode: str = MODE_THREAD, max_workers: int = 1) -> None:
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.waiting = 0
+        self.running = 0
+        self.peak_waiting = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == MODE_PROCESS:
+                import multiprocessing  # noqa: PLC0415
+
+                # "spawn" statt fork: der HA-Prozess hat viele Threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="wallbox_render"
+                )
+        return self._executor
+
+    async def async_run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` in the pool, waiting for a free worker if necessary."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self.submitted += 1
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        queued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self.total_wait_seconds += started - queued_at
+        self.running += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), func, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self.total_run_seconds += time.perf_counter() - started
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def metrics(self) -> dict[str, Any]:
+        """Snapshot der Pool-Kennzahlen (für Diagnose und Sensor-Attribute)."""
+        finished = self.completed + self.failed
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 1) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 1) if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Beendet den Pool; laufende Aufträge werden nicht abgewartet."""
+        if self._executor is not None:
+            _LOGGER.debug("Render-Pool (%s) wird beendet", self.mode)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
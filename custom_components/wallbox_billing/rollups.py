@@ -0,0 +1,130 @@
+"""Monthly/yearly consumption rollups for Wallbox Billing.
+
+Die Rollups werden beim Rechnungsversand und nächtlich aus den Tageswerten
+des Recorders materialisiert und im Store unter ``monthly_rollups`` abgelegt:
+
+    {"2026-02": {"kwh": 123.456, "cost": 41.97, "days": 28,
+                 "first": "2026-02-01", "last": "2026-02-28", "updated": "..."}}
+
+Ein Jahresbericht braucht damit nur noch O(Monate) gespeicherte Aggregate;
+der Recorder wird ausschließlich für fehlende Monate abgefragt.
+"""
+from __future__ import annotations
+
+import calendar
+import datetime
+
+STORED_ROLLUPS_KEY = "monthly_rollups"
+
+
+def month_key(day: datetime.date) -> str:
+    """Return the rollup key ("YYYY-MM") for a date."""
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_bounds(year: int, month: int) -> tuple[datetime.date, datetime.date]:
+    """Return first and last calendar day of a month."""
+    last_day = calendar.monthrange(year, month)[1]
+    return datetime.date(year, month, 1), datetime.date(year, month, last_day)
+
+
+def is_complete(rollup: dict | None, year: int, month: int) -> bool:
+    """True, wenn der Rollup alle Kalendertage des Monats abdeckt."""
+    if not rollup:
+        return False
+    return int(rollup.get("days", 0)) >= calendar.monthrange(year, month)[1]
+
+
+def merge_daily_into_rollups(
+    rollups: dict[str, dict],
+    daily_data: list[tuple[datetime.date, float]],
+    price_per_kwh: float,
+    now: datetime.datetime | None = None,
+) -> list[str]:
+    """Aggregiert Tageswerte je Monat und übernimmt sie in ``rollups``.
+
+    Je Monat merkt sich der Rollup den ersten und letzten enthaltenen Tag:
+
+    - neue Tageswerte, die den bisherigen Bereich umfassen, ersetzen ihn,
+    - Tageswerte ganz außerhalb des bisherigen Bereichs werden addiert
+      (z. B. zweite Monatshälfte aus einer Rechnung zur ersten aus dem
+      nächtlichen Lauf),
+    - bei teilweiser Überschneidung gewinnt der Bereich mit mehr Tagen – so
+      überschreibt der angeschnittene Randmonat einer Rechnung keinen
+      bereits vollständigeren Monatswert.
+
+    Gibt die Liste der geänderten Monats-Keys zurück.
+    """
+    stamp = (now or datetime.datetime.now()).isoformat()
+    grouped: dict[str, list[tuple[datetime.date, float]]] = {}
+    for day, kwh in daily_data:
+        grouped.setdefault(month_key(day), []).append((day, kwh))
+
+    changed: list[str] = []
+    for key, values in grouped.items():
+        first = min(day for day, _ in values).isoformat()
+        last = max(day for day, _ in values).isoformat()
+        kwh = sum(value for _, value in values)
+        days = len(values)
+        existing = rollups.get(key)
+        # Ältere Rollups ohne Bereich: nur die Zahl der Tage vergleichen
+        known = existing is not None and "first" in existing
+        if known and (last < existing["first"] or first > existing["last"]):
+            kwh += float(existing["kwh"])
+            days += int(existing["days"])
+            first = min(first, existing["first"])
+            last = max(last, existing["last"])
+        elif existing is not None and not (
+            known and first <= existing["first"] and last >= existing["last"]
+        ):
+            if int(existing.get("days", 0)) > days:
+                continue
+        kwh = round(kwh, 3)
+        rollups[key] = {
+            "kwh": kwh,
+            "cost": round(kwh * price_per_kwh, 2),
+            "days": days,
+            "first": first,
+            "last": last,
+            "updated": stamp,
+        }
+        changed.append(key)
+    return changed
+
+
+def missing_months(
+    rollups: dict[str, dict],
+    year: int,
+    today: datetime.date,
+) -> list[tuple[int, int]]:
+    """Monate eines Jahres (bis ``today``), die noch nicht vollständig vorliegen."""
+    result: list[tuple[int, int]] = []
+    for month in range(1, 13):
+        first, last = month_bounds(year, month)
+        if first > today:
+            break
+        if last >= today:
+            # Laufender Monat: vollständig ist er erst nach Monatsende
+            if month_key(first) not in rollups:
+                result.append((year, month))
+            continue
+        if not is_complete(rollups.get(month_key(first)), year, month):
+            result.append((year, month))
+    return result
+
+
+def yearly_summary(
+    rollups: dict[str, dict],
+    year: int,
+) -> list[tuple[datetime.date, float, float]]:
+    """Liste (Monatserster, kWh, EUR) für alle vorhandenen Monate eines Jahres."""
+    result: list[tuple[datetime.date, float, float]] = []
+    for month in range(1, 13):
+        rollup = rollups.get(f"{year:04d}-{month:02d}")
+        if rollup is None:
+            continue
+        result.append(
+            (datetime.date(year, month, 1), float(rollup["kwh"]), float(rollup["cost"]))
+        )
+    return result
+
@@ -0,0 +1,200 @@
+"""Built-in monthly billing scheduler for Wallbox Billing.
+
+Ablauf je Abrechnungstermin (Tag + Uhrzeit aus den Optionen):
+
+1. ``PRERENDER_LEAD`` vor dem Termin: Recorder-Statistiken holen und PDF
+   rendern (Entwurf wird im Speicher gehalten).
+2. Zum Termin: nur den aktuellen Zählerstand prüfen. Ist er unverändert,
+   wird der fertige Entwurf versendet; sonst wird mit den bereits geholten
+   Tageswerten neu gerendert – ohne erneute Recorder-Abfrage.
+3. Nach einem Neustart wird ein verpasster Termin nachgeholt.
+
+Der zuletzt erledigte Termin steht im Store unter ``schedule_last_deadline``.
+"""
+from __future__ import annotations
+
+import calendar
+import datetime
+import logging
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+STORED_LAST_DEADLINE_KEY = "schedule_last_deadline"
+
+PRERENDER_LEAD = datetime.timedelta(minutes=30)
+CATCH_UP_DELAY = 300        # Sekunden nach dem Start, damit der ESPHome-Sensor verfügbar ist
+RETRY_DELAY = 600           # Sekunden bis zum nächsten Versuch nach einem Fehler
+MAX_RETRIES = 6
+
+
+def deadline_in_month(
+    year: int, month: int, day: int, at: datetime.time, tz: datetime.tzinfo
+) -> datetime.datetime:
+    """Abrechnungstermin in einem Monat (Tag wird auf die Monatslänge begrenzt)."""
+    day = min(day, calendar.monthrange(year, month)[1])
+    return datetime.datetime.combine(datetime.date(year, month, day), at, tzinfo=tz)
+
+
+def previous_deadline(
+    now: datetime.datetime, day: int, at: datetime.time
+) -> datetime.datetime:
+    """Letzter Termin, der nicht nach ``now`` liegt."""
+    this_month = deadline_in_month(now.year, now.month, day, at, now.tzinfo)
+    if this_month <= now:
+        return this_month
+    year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+    return deadline_in_month(year, month, day, at, now.tzinfo)
+
+
+def next_deadline(now: datetime.datetime, day: int, at: datetime.time) -> datetime.datetime:
+    """Nächster Termin echt nach ``now``."""
+    this_month = deadline_in_month(now.year, now.month, day, at, now.tzinfo)
+    if this_month > now:
+        return this_month
+    year, month = (now.year, now.month + 1) if now.month < 12 else (now.year + 1, 1)
+    return deadline_in_month(year, month, day, at, now.tzinfo)
+
+
+class BillingScheduler:
+    """Schedules pre-rendering and sending of the monthly invoice.
+
+    ``prepare`` liefert einen gerenderten Entwurf (oder None), ``finalize``
+    prüft den Zählerstand, rendert ggf. neu, versendet und gibt True bei
+    Erfolg zurück.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        data: dict,
+        day: int,
+        at: datetime.time,
+        prepare: Callable[[], Awaitable[Any]],
+        finalize: Callable[[Any], Awaitable[bool]],
+    ) -> None:
+        self._hass = hass
+        self._data = data
+        self._day = day
+        self._at = at
+        self._prepare = prepare
+        self._finalize = finalize
+        self._draft: Any = None
+        self._draft_deadline: datetime.datetime | None = None
+        self._retries = 0
+        # Je eine ausstehende Planung; abgelaufene Handles werden im Callback verworfen
+        self._unsub_prerender: CALLBACK_TYPE | None = None
+        self._unsub_run: CALLBACK_TYPE | None = None
+        # Nachholversuch nach dem Start oder Wiederholung nach einem Fehler
+        self._unsub_retry: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Plant den nächsten Termin und ggf. einen Nachholversuch."""
+        now = dt_util.now()
+        stored = self._data["stored"]
+        last_due = previous_deadline(now, self._day, self._at)
+        marker = stored.get(STORED_LAST_DEADLINE_KEY)
+
+        if marker is None:
+            # Erstmals aktiviert: zurückliegende Termine nicht nachholen
+            stored[STORED_LAST_DEADLINE_KEY] = last_due.isoformat()
+            self._data["store"].async_schedule_save()
+        elif datetime.datetime.fromisoformat(marker) < last_due and not self._billed_since(
+            last_due
+        ):
+            _LOGGER.info(
+                "Abrechnungstermin %s verpasst – wird in %d s nachgeholt", last_due, CATCH_UP_DELAY
+            )
+            self._schedule_retry(last_due, CATCH_UP_DELAY)
+
+        self._schedule_next(now)
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in (self._unsub_prerender, self._unsub_run, self._unsub_retry):
+            if unsub is not None:
+                unsub()
+        self._unsub_prerender = self._unsub_run = self._unsub_retry = None
+        self._draft = None
+
+    @property
+    def next_run(self) -> datetime.datetime:
+        return next_deadline(dt_util.now(), self._day, self._at)
+
+    def _billed_since(self, deadline: datetime.datetime) -> bool:
+        """True, wenn seit dem Termin bereits (manuell) abgerechnet wurde."""
+        last_date = self._data["stored"].get("last_date")
+        return bool(last_date) and datetime.date.fromisoformat(last_date) >= deadline.date()
+
+    @callback
+    def _schedule_next(self, now: datetime.datetime) -> None:
+        deadline = next_deadline(now, self._day, self._at)
+        prerender_at = deadline - PRERENDER_LEAD
+        if prerender_at > now:
+            self._unsub_prerender = async_track_point_in_time(
+                self._hass, self._make_prerender(deadline), prerender_at
+            )
+        self._unsub_run = async_track_point_in_time(
+            self._hass, self._make_runner(deadline, True), deadline
+        )
+        _LOGGER.debug("Nächste automatische Abrechnung: %s", deadline)
+
+    @callback
+    def _schedule_retry(self, deadline: datetime.datetime, delay: int) -> None:
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+        self._unsub_retry = async_call_later(
+            self._hass, delay, self._make_runner(deadline, False)
+        )
+
+    def _make_prerender(self, deadline: datetime.datetime):
+        async def _prerender(_now: datetime.datetime) -> None:
+            self._unsub_prerender = None
+            _LOGGER.debug("Bereite Abrechnung für %s vor", deadline)
+            self._draft = await self._prepare()
+            self._draft_deadline = deadline
+
+        return _prerender
+
+    def _make_runner(self, deadline: datetime.datetime, regular: bool):
+        async def _run(_now: datetime.datetime) -> None:
+            if regular:
+                self._unsub_run = None
+                # Folgetermin sofort planen – unabhängig vom Ergebnis dieses Laufs
+                self._schedule_next(deadline)
+            else:
+                self._unsub_retry = None
+            await self._async_run(deadline)
+
+        return _run
+
+    async def _async_run(self, deadline: datetime.datetime) -> None:
+        draft = self._draft if self._draft_deadline == deadline else None
+        self._draft = None
+        if draft is None:
+            draft = await self._prepare()
+
+        sent = draft is not None and await self._finalize(draft)
+        if sent:
+            self._retries = 0
+            await self._data["store"].async_commit(
+                {STORED_LAST_DEADLINE_KEY: deadline.isoformat()}
+            )
+        elif self._retries < MAX_RETRIES:
+            self._retries += 1
+            _LOGGER.warning(
+                "Automatische Abrechnung fehlgeschlagen – Versuch %d/%d in %d s",
+                self._retries,
+                MAX_RETRIES,
+                RETRY_DELAY,
+            )
+            self._schedule_retry(deadline, RETRY_DELAY)
+        else:
+            _LOGGER.error("Automatische Abrechnung für %s endgültig fehlgeschlagen", deadline)
+            self._retries = 0
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import datetime
 import logging
+from array import array
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -10,23 +11,50 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_BILLING_DAY,
+    CONF_BILLING_TIME,
     CONF_ENERGY_SENSOR,
     CONF_PRICE_PER_KWH,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_BILLING_TIME,
     DOMAIN,
+    ENTITY_AVERAGE_POWER_7D,
+    ENTITY_AVERAGE_POWER_24H,
     ENTITY_CONSUMPTION,
     ENTITY_COST,
+    ENTITY_COST_FORECAST,
     ENTITY_LAST_BILLING_DATE,
     ENTITY_LAST_BILLING_READING,
+    ENTITY_PIPELINE_DURATION,
+    ENTITY_POWER,
+    SIGNAL_POWER_UPDATED,
+    SIGNAL_READING_UPDATED,
+    SIGNAL_STORED_LOADED,
+    SIGNAL_TIMINGS_UPDATED,
 )
 
+from .meter_guard import MAX_POWER_KW
+from .meters import STORED_METER_READINGS_KEY
+
 _LOGGER = logging.getLogger(__name__)
 
+# Ringpuffer für Leistung/Mittelwerte: 7 Tage in 5-Minuten-Fächern (2016 × 8 Byte)
+BUCKET_SECONDS = 300
+SLOTS_24H = 24 * 3600 // BUCKET_SECONDS
+SLOTS_7D = 7 * SLOTS_24H
+# Auflösung des Zählerstands (3 Nachkommastellen = 1 Impuls)
+RESOLUTION_KWH = 0.001
+# Ohne neuen Impuls fällt die Leistung auf die damit noch vereinbare Obergrenze
+POWER_REFRESH = datetime.timedelta(seconds=60)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -39,11 +67,159 @@ async def async_setup_entry(
     entities = [
         WallboxConsumptionSensor(hass, entry, domain_data),
         WallboxCostSensor(hass, entry, domain_data),
+        WallboxCostForecastSensor(hass, entry, domain_data),
         WallboxLastBillingDateSensor(hass, entry, domain_data),
         WallboxLastBillingReadingSensor(hass, entry, domain_data),
+        WallboxPipelineDurationSensor(hass, entry, domain_data),
     ]
     async_add_entities(entities, update_before_add=True)
 
+    # Leistung und Mittelwerte laufen inkrementell aus den Zählerdeltas mit –
+    # ohne Recorder-Abfrage und mit konstantem Speicher
+    ring = EnergyRing()
+    reading = _corrected_reading(hass, domain_data)
+    if reading is not None:
+        ring.add(reading, dt_util.utcnow().timestamp())
+    signal = SIGNAL_POWER_UPDATED.format(entry_id=entry.entry_id)
+
+    @callback
+    def _handle_reading() -> None:
+        value = _corrected_reading(hass, domain_data)
+        if value is not None:
+            ring.add(value, dt_util.utcnow().timestamp())
+            async_dispatcher_send(hass, signal)
+
+    @callback
+    def _handle_refresh(now: datetime.datetime) -> None:
+        ring.advance(now.timestamp())
+        async_dispatcher_send(hass, signal)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_READING_UPDATED.format(entry_id=entry.entry_id), _handle_reading
+        )
+    )
+    entry.async_on_unload(async_track_time_interval(hass, _handle_refresh, POWER_REFRESH))
+    async_add_entities(
+        [
+            WallboxPowerSensor(hass, entry, domain_data, ring),
+            WallboxAveragePowerSensor(hass, entry, domain_data, ring, SLOTS_24H),
+            WallboxAveragePowerSensor(hass, entry, domain_data, ring, SLOTS_7D),
+        ]
+    )
+
+
+def _corrected_reading(hass: HomeAssistant, domain_data: dict) -> float | None:
+    """Aktueller Zählerstand, um den Korrektur-Offset des MeterGuard bereinigt."""
+    state = hass.states.get(domain_data["config"][CONF_ENERGY_SENSOR])
+    if state is None or state.state in ("unknown", "unavailable"):
+        return None
+    try:
+        raw = float(state.state)
+    except ValueError:
+        return None
+    guard = domain_data.get("meter_guard")
+    return guard.corrected(raw) if guard is not None else raw
+
+
+class EnergyRing:
+    """Energy per fixed time bucket in a preallocated ring of ``SLOTS_7D`` floats.
+
+    Die Summen für 24 h und 7 Tage werden beim Weiterrücken um die
+    herausfallenden Fächer verringert, ein Update kostet also O(1)
+    (O(übersprungene Fächer) nach einer Pause, höchstens eine Runde).
+    """
+
+    def __init__(self) -> None:
+        self._buckets = array("d", bytes(8 * SLOTS_7D))
+        self._head: int | None = None
+        self._sums = {SLOTS_24H: 0.0, SLOTS_7D: 0.0}
+        self._started: float | None = None
+        self._last_reading: float | None = None
+        self._last_time: float | None = None
+        self._power = 0.0
+
+    def advance(self, now: float) -> None:
+        """Rückt den Ring bis zum Fach von ``now`` vor."""
+        bucket = int(now // BUCKET_SECONDS)
+        if self._head is None:
+            self._head = bucket
+            return
+        if bucket - self._head >= SLOTS_7D:
+            self._buckets = array("d", bytes(8 * SLOTS_7D))
+            self._sums = dict.fromkeys(self._sums, 0.0)
+        else:
+            buckets = self._buckets
+            for step in range(self._head + 1, bucket + 1):
+                # Fach, das gerade aus dem 24-h-Fenster fällt, liegt noch im Ring
+                self._sums[SLOTS_24H] -= buckets[(step - SLOTS_24H) % SLOTS_7D]
+                index = step % SLOTS_7D
+                self._sums[SLOTS_7D] -= buckets[index]
+                buckets[index] = 0.0
+                if index == 0:
+                    # Einmal je Umlauf neu summieren, damit sich kein Rundungsfehler aufbaut
+                    self._resum(step)
+        self._head = max(self._head, bucket)
+
+    def add(self, reading: float, now: float) -> None:
+        """Verbucht das Delta zum vorigen Zählerstand im aktuellen Fach."""
+        self.advance(now)
+        if self._started is None:
+            self._started = now
+        if reading == self._last_reading:
+            # Update eines weiteren Zählers – Hauptzähler unverändert
+            return
+        last_reading, last_time = self._last_reading, self._last_time
+        self._last_reading, self._last_time = reading, now
+        if last_reading is None or last_time is None or now <= last_time:
+            return
+        delta = reading - last_reading
+        power = delta * 3600 / (now - last_time)
+        if delta < 0 or power > MAX_POWER_KW:
+            # Vom MeterGuard als Sprung gemeldet – nicht als Ladeleistung werten
+            return
+        self._buckets[self._head % SLOTS_7D] += delta
+        for window in self._sums:
+            self._sums[window] += delta
+        self._power = power
+
+    def power(self, now: float) -> float | None:
+        """Leistung aus dem letzten Delta in kW.
+
+        Ohne weiteren Impuls kann sie höchstens ``RESOLUTION_KWH`` je
+        verstrichener Zeit betragen; so fällt sie nach dem Laden gegen 0.
+        """
+        if self._last_time is None:
+            return None
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return self._power
+        return min(self._power, RESOLUTION_KWH * 3600 / elapsed)
+
+    def energy(self, window: int) -> float:
+        """Energie in kWh in den letzten ``window`` Fächern."""
+        return max(0.0, self._sums[window])
+
+    def coverage(self, window: int, now: float) -> float:
+        """Vom Ring abgedeckte Sekunden des Fensters (nach einem Neustart weniger)."""
+        if self._started is None:
+            return 0.0
+        return min(window * BUCKET_SECONDS, now - self._started)
+
+    def average(self, window: int, now: float) -> float | None:
+        """Mittlere Leistung über das Fenster in kW."""
+        covered = self.coverage(window, now)
+        if covered < BUCKET_SECONDS:
+            return None
+        return self.energy(window) * 3600 / covered
+
+    def _resum(self, head: int) -> None:
+        buckets = self._buckets
+        self._sums[SLOTS_7D] = sum(buckets)
+        self._sums[SLOTS_24H] = sum(
+            buckets[(head - offset) % SLOTS_7D] for offset in range(SLOTS_24H)
+        )
+
 
 class _WallboxBaseSensor(SensorEntity):
     """Base class for Wallbox Billing sensors."""
@@ -69,6 +245,11 @@ class _WallboxBaseSensor(SensorEntity):
     def _stored(self) -> dict:
         return self._domain_data["stored"]
 
+    @property
+    def available(self) -> bool:
+        # Bis der Store geladen ist, wären die Werte vom Startwert abgeleitet
+        return self._domain_data.get("stored_loaded", True)
+
     @property
     def device_info(self):
         return {
@@ -80,10 +261,12 @@ class _WallboxBaseSensor(SensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Subscribe to updates."""
-        sensor_id = self._cfg[CONF_ENERGY_SENSOR]
+        # Zählerupdates kommen erst nach der Plausibilitätsprüfung (MeterGuard)
         self.async_on_remove(
-            async_track_state_change_event(
-                self._hass, [sensor_id], self._handle_sensor_update
+            async_dispatcher_connect(
+                self._hass,
+                SIGNAL_READING_UPDATED.format(entry_id=self._entry.entry_id),
+                self.async_write_ha_state,
             )
         )
         self.async_on_remove(
@@ -91,10 +274,13 @@ class _WallboxBaseSensor(SensorEntity):
                 f"{DOMAIN}_invoice_sent", self._handle_invoice_sent
             )
         )
-
-    @callback
-    def _handle_sensor_update(self, event) -> None:
-        self.async_write_ha_state()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self._hass,
+                SIGNAL_STORED_LOADED.format(entry_id=self._entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
 
     @callback
     def _handle_invoice_sent(self, event) -> None:
@@ -102,13 +288,22 @@ class _WallboxBaseSensor(SensorEntity):
             self.async_write_ha_state()
 
     def _current_reading(self) -> float | None:
-        state = self._hass.states.get(self._cfg[CONF_ENERGY_SENSOR])
-        if state is None or state.state in ("unknown", "unavailable"):
-            return None
-        try:
-            return float(state.state)
-        except ValueError:
-            return None
+        return _corrected_reading(self._hass, self._domain_data)
+
+    def _additional_consumption(self) -> float | None:
+        """Verbrauch der weiteren Zähler seit letzter Abrechnung (None, falls einer fehlt)."""
+        last_readings = self._stored.get(STORED_METER_READINGS_KEY, {})
+        total = 0.0
+        for meter in self._domain_data.get("additional_meters", []):
+            state = self._hass.states.get(meter["sensor"])
+            try:
+                current = float(state.state) if state is not None else None
+            except ValueError:
+                current = None
+            if current is None:
+                return None
+            total += current - float(last_readings.get(meter["sensor"], meter["initial_reading"]))
+        return total
 
     def _last_reading(self) -> float | None:
         val = self._stored.get("last_reading")
@@ -126,6 +321,8 @@ class WallboxConsumptionSensor(_WallboxBaseSensor):
     _attr_state_class = SensorStateClass.TOTAL
     _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
     _attr_icon = "mdi:lightning-bolt"
+    # Tagesliste ändert sich mit jedem Update – nicht in jedem State im Recorder ablegen
+    _unrecorded_attributes = frozenset({"daily_kwh"})
 
     @property
     def unique_id(self) -> str:
@@ -135,9 +332,15 @@ class WallboxConsumptionSensor(_WallboxBaseSensor):
     def native_value(self) -> float | None:
         current = self._current_reading()
         last = self._last_reading()
-        if current is None or last is None:
+        additional = self._additional_consumption()
+        if current is None or last is None or additional is None:
             return None
-        return round(current - last, 3)
+        return round(current - last + additional, 3)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        ledger = self._domain_data.get("daily_ledger")
+        return {"daily_kwh": ledger.as_attribute() if ledger is not None else {}}
 
 
 class WallboxCostSensor(_WallboxBaseSensor):
@@ -157,10 +360,66 @@ class WallboxCostSensor(_WallboxBaseSensor):
     def native_value(self) -> float | None:
         current = self._current_reading()
         last = self._last_reading()
+        additional = self._additional_consumption()
         price = float(self._cfg.get(CONF_PRICE_PER_KWH, 0.30))
-        if current is None or last is None:
+        if current is None or last is None or additional is None:
+            return None
+        return round((current - last + additional) * price, 2)
+
+
+class WallboxCostForecastSensor(WallboxCostSensor):
+    """Projected cost at the next billing date from the weekday profile."""
+
+    _attr_name = "Prognose Kosten Abrechnungszeitraum"
+    _attr_state_class = None
+    _attr_icon = "mdi:chart-timeline-variant-shimmer"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{self._entry.entry_id}_{ENTITY_COST_FORECAST}"
+
+    def _projection(self) -> tuple[datetime.datetime, float, float | None]:
+        """(Abrechnungstermin, Verbrauch bisher, erwarteter Restverbrauch)."""
+        # Wie in __init__.py lazy, damit der Scheduler nicht beim Start geladen wird
+        from .scheduler import next_deadline  # noqa: PLC0415
+
+        now = dt_util.now()
+        period_end = next_deadline(
+            now,
+            int(self._cfg.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)),
+            datetime.time.fromisoformat(self._cfg.get(CONF_BILLING_TIME, DEFAULT_BILLING_TIME)),
+        )
+        current = self._current_reading()
+        last = self._last_reading()
+        additional = self._additional_consumption() or 0.0
+        consumed = current - last + additional if current is not None and last is not None else 0.0
+        profile = self._domain_data.get("forecast")
+        remaining = profile.remaining(now, period_end) if profile is not None else None
+        return period_end, consumed, remaining
+
+    @property
+    def native_value(self) -> float | None:
+        _, consumed, remaining = self._projection()
+        if remaining is None:
+            # Noch kein abgeschlossener Tag im Profil
             return None
-        return round((current - last) * price, 2)
+        price = float(self._cfg.get(CONF_PRICE_PER_KWH, 0.30))
+        return round((consumed + remaining) * price, 2)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        period_end, consumed, remaining = self._projection()
+        profile = self._domain_data.get("forecast")
+        return {
+            "period_end": period_end.isoformat(),
+            "consumption_kwh": round(consumed, 3),
+            "remaining_kwh": round(remaining, 3) if remaining is not None else None,
+            "weekday_profile_kwh": [
+                round(mean, 3) if mean is not None else None
+                for mean in (profile.means if profile is not None else [None] * 7)
+            ],
+            "profile_days": profile.days if profile is not None else 0,
+        }
 
 
 class WallboxLastBillingDateSensor(_WallboxBaseSensor):
@@ -203,3 +462,131 @@ class WallboxLastBillingReadingSensor(_WallboxBaseSensor):
     @property
     def native_value(self) -> float | None:
         return self._last_reading()
+
+
+class WallboxPipelineDurationSensor(_WallboxBaseSensor):
+    """Duration of the last invoice run; per-stage histogram as attributes."""
+
+    _attr_name = "Dauer letzte Abrechnung"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:timer-outline"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{self._entry.entry_id}_{ENTITY_PIPELINE_DURATION}"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        # Nur nach einem Abrechnungslauf aktualisieren, nicht bei jeder Zählerstandsänderung
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self._hass,
+                SIGNAL_TIMINGS_UPDATED.format(entry_id=self._entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        last_run = self._domain_data["timings"].last_run
+        if not last_run:
+            return None
+        return round(sum(last_run.values()) * 1000, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return {
+            "stages": self._domain_data["timings"].summary(),
+            "render_pool": self._domain_data["render_pool"].metrics(),
+        }
+
+
+class _WallboxPowerBaseSensor(_WallboxBaseSensor):
+    """Base for sensors fed from the ``EnergyRing``."""
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_suggested_display_precision = 2
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        domain_data: dict,
+        ring: EnergyRing,
+    ) -> None:
+        super().__init__(hass, entry, domain_data)
+        self._ring = ring
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self._hass,
+                SIGNAL_POWER_UPDATED.format(entry_id=self._entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+
+class WallboxPowerSensor(_WallboxPowerBaseSensor):
+    """Current charging power derived from the last meter delta."""
+
+    _attr_name = "Ladeleistung"
+    _attr_icon = "mdi:ev-station"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{self._entry.entry_id}_{ENTITY_POWER}"
+
+    @property
+    def native_value(self) -> float | None:
+        power = self._ring.power(dt_util.utcnow().timestamp())
+        return round(power, 3) if power is not None else None
+
+
+class WallboxAveragePowerSensor(_WallboxPowerBaseSensor):
+    """Average power over the last 24 hours or 7 days."""
+
+    _attr_icon = "mdi:chart-line"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        domain_data: dict,
+        ring: EnergyRing,
+        window: int,
+    ) -> None:
+        super().__init__(hass, entry, domain_data, ring)
+        self._window = window
+        if window == SLOTS_24H:
+            self._attr_name = "Mittlere Leistung 24 h"
+            self._attr_unique_id = f"{entry.entry_id}_{ENTITY_AVERAGE_POWER_24H}"
+        else:
+            self._attr_name = "Mittlere Leistung 7 Tage"
+            self._attr_unique_id = f"{entry.entry_id}_{ENTITY_AVERAGE_POWER_7D}"
+
+    @property
+    def native_value(self) -> float | None:
+        average = self._ring.average(self._window, dt_util.utcnow().timestamp())
+        return round(average, 3) if average is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        now = dt_util.utcnow().timestamp()
+        return {
+            "energy_kwh": round(self._ring.energy(self._window), 3),
+            # Seit dem HA-Start abgedeckter Teil des Fensters
+            "coverage_hours": round(self._ring.coverage(self._window, now) / 3600, 2),
+        }
@@ -0,0 +1,102 @@
+"""Coalesced recorder statistics queries for Wallbox Billing.
+
+``statistics_during_period`` nimmt beliebig viele Statistik-IDs entgegen.
+Anfragen, die innerhalb von ``BATCH_WINDOW`` für denselben Zeitraum und
+dieselbe Periode eintreffen – über Zähler und Entries hinweg, z. B. wenn
+alle Entries zum selben Termin abrechnen –, werden zu einer Abfrage
+zusammengefasst; die Zeilen werden anschließend je Sensor verteilt.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+from dataclasses import dataclass, field
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+DATA_KEY = f"{DOMAIN}_stats_batcher"
+
+# Sammelfenster in Sekunden (gleichzeitig gestartete Abrechnungen erreichen
+# den Abruf erst nach dem Lesen der Zählerstände)
+BATCH_WINDOW = 0.05
+
+_BatchKey = tuple[datetime.datetime, datetime.datetime, str]
+
+
+@dataclass
+class _Batch:
+    future: asyncio.Future
+    sensor_ids: set[str] = field(default_factory=set)
+
+
+class StatisticsBatcher:
+    """Shares one recorder round trip between concurrent requests."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._pending: dict[_BatchKey, _Batch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def async_fetch(
+        self,
+        sensor_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        period: str = "day",
+    ) -> tuple[list, bool]:
+        """Zeilen für ``sensor_id`` und ob diese Anfrage die Abfrage ausgelöst hat.
+
+        Fehler der gemeinsamen Abfrage werden an alle Beteiligten weitergereicht.
+        """
+        key = (start, end, period)
+        batch = self._pending.get(key)
+        owner = batch is None
+        if batch is None:
+            loop = asyncio.get_running_loop()
+            batch = self._pending[key] = _Batch(loop.create_future())
+            # Nicht abgeholte Fehler (alle Anfragenden abgebrochen) nicht melden
+            batch.future.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+            loop.call_later(BATCH_WINDOW, self._flush, key)
+        batch.sensor_ids.add(sensor_id)
+        stats = await asyncio.shield(batch.future)
+        return stats.get(sensor_id, []), owner
+
+    def _flush(self, key: _BatchKey) -> None:
+        batch = self._pending.pop(key)
+        task = asyncio.get_running_loop().create_task(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: _BatchKey, batch: _Batch) -> None:
+        start, end, period = key
+        try:
+            from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+            from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+                statistics_during_period,
+            )
+
+            stats = await get_instance(self._hass).async_add_executor_job(
+                statistics_during_period,
+                self._hass,
+                start,
+                end,
+                set(batch.sensor_ids),
+                period,
+                None,   # keine Einheitenumrechnung – Sensoren liefern bereits kWh
+                {"sum"},
+            )
+        except Exception as exc:  # noqa: BLE001
+            # Auch ImportError/KeyError (Recorder fehlt) – sonst warten alle ewig
+            batch.future.set_exception(exc)
+        else:
+            batch.future.set_result(stats or {})
+
+
+def get_batcher(hass: HomeAssistant) -> StatisticsBatcher:
+    """Gemeinsamer Batcher aller Entries einer HA-Instanz."""
+    batcher = hass.data.get(DATA_KEY)
+    if batcher is None:
+        batcher = hass.data[DATA_KEY] = StatisticsBatcher(hass)
+    return batcher
@@ -0,0 +1,122 @@
+"""Coalesced persistence of the entry state with a journal for billing commits.
+
+Der gesamte Zustand (Abrechnungsstand, MeterGuard, Profile, Rollups,
+Wasserstände …) liegt in einem Dict und wird über ``async_delay_save``
+gebündelt geschrieben: Die erste Änderung plant den Schreibvorgang, weitere
+Änderungen bis dahin fahren mit – anders als bei direkten
+``async_delay_save``-Aufrufen verschiebt ein stetiger Strom von Updates den
+Termin nicht immer weiter. Das schont die SD-Karte.
+
+Abrechnungsrelevante Änderungen (neuer Abrechnungsstand, erledigter Termin)
+werden zusätzlich sofort in eine kleine Journal-Datei geschrieben. Beim
+Start werden Journal-Einträge, die neuer als der gespeicherte Zustand sind,
+wieder eingespielt – ein Absturz vor dem gebündelten Schreiben verliert
+also keine versendete Rechnung.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_KEY, STORAGE_VERSION
+from .timing import PerfCounters
+
+_LOGGER = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+# Sekunden, über die gewöhnliche Änderungen gebündelt werden
+SAVE_DELAY = 120
+# Journal-Einträge, die behalten werden (mehr als Abrechnungen zwischen zwei Schreibvorgängen)
+MAX_JOURNAL_ENTRIES = 12
+# Eintrag im Zustand: Nummer des zuletzt enthaltenen Journal-Eintrags
+JOURNAL_SEQ_KEY = "journal_seq"
+
+
+class BillingStore:
+    """Entry state with delayed, coalesced saves and a commit journal.
+
+    ``data`` ist das Zustands-Dict; es bleibt dasselbe Objekt, damit
+    MeterGuard, Profile usw. ihre Unter-Dicts direkt fortschreiben können.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, counters: PerfCounters | None = None
+    ) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry_id}")
+        self._journal: Store = Store(hass, JOURNAL_VERSION, f"{STORAGE_KEY}_{entry_id}_journal")
+        self._counters = counters or PerfCounters()
+        self.data: dict = {}
+        self._entries: list[dict] = []
+        self._seq = 0
+        # Monotoner Zeitpunkt des geplanten Schreibvorgangs (None = nichts geplant)
+        self._due: float | None = None
+
+    async def async_load(self) -> dict:
+        """Lädt Zustand und Journal und spielt neuere Journal-Einträge ein."""
+        stored, journal = await asyncio.gather(
+            self._store.async_load(), self._journal.async_load()
+        )
+        self.data.update(stored or {})
+        self._entries = list((journal or {}).get("entries", []))
+        applied = int(self.data.get(JOURNAL_SEQ_KEY, 0))
+        replayed = 0
+        for entry in self._entries:
+            if entry["seq"] > applied:
+                self.data.update(copy.deepcopy(entry["changes"]))
+                replayed += 1
+        self._seq = max([applied, *(entry["seq"] for entry in self._entries)])
+        self.data[JOURNAL_SEQ_KEY] = self._seq
+        if replayed:
+            _LOGGER.warning(
+                "%d Abrechnungsänderung(en) aus dem Journal wiederhergestellt", replayed
+            )
+            self.async_schedule_save(0)
+        return self.data
+
+    @callback
+    def async_schedule_save(self, delay: float = SAVE_DELAY) -> None:
+        """Plant das Schreiben des Zustands; bündelt mit bereits geplanten Schreibvorgängen.
+
+        Ein kürzerer ``delay`` zieht einen geplanten Termin vor, ein längerer
+        verschiebt ihn nicht.
+        """
+        due = time.monotonic() + delay
+        if self._due is not None and self._due <= due:
+            self._counters.increment("store_saves_coalesced")
+            return
+        self._due = due
+        self._store.async_delay_save(self._data_to_save, delay)
+
+    async def async_commit(self, changes: dict) -> None:
+        """Schreibt abrechnungsrelevante Top-Level-Einträge sofort ins Journal.
+
+        ``changes`` wird in den Zustand übernommen; der Zustand selbst wird
+        gebündelt gespeichert.
+        """
+        self._seq += 1
+        self.data.update(changes)
+        self.data[JOURNAL_SEQ_KEY] = self._seq
+        self._entries.append({"seq": self._seq, "changes": copy.deepcopy(changes)})
+        del self._entries[:-MAX_JOURNAL_ENTRIES]
+        await self._journal.async_save({"entries": self._entries})
+        self._counters.increment("journal_writes")
+        self.async_schedule_save()
+
+    async def async_flush(self) -> None:
+        """Schreibt einen geplanten Zustand sofort (beim Entladen des Entries)."""
+        if self._due is None:
+            return
+        self._due = None
+        await self._store.async_save(self.data)
+        self._counters.increment("store_writes")
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._due = None
+        self._counters.increment("store_writes")
+        return self.data
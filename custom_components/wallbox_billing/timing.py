@@ -0,0 +1,166 @@
+"""Stage timings for the invoice pipeline.
+
+Jede Stufe einer Abrechnung (Sensor lesen, Recorder-Abfrage, Rendern,
+MIME-Aufbau, SMTP-Verbindung/-Login/-Versand, Store speichern) wird gemessen
+und in einem rollierenden Fenster der letzten ``WINDOW`` Läufe gehalten.
+Daraus entstehen Median/p95/Max und ein grobes Histogramm je Stufe.
+
+``PerfCounters`` sammelt zusätzlich Zähler (Recorder-Zeilen, PDF-Größen,
+SMTP-Verbindungen) und Cache-Trefferquoten für die Diagnose.
+"""
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+STAGE_STATE_READ = "state_read"
+STAGE_STATS_FETCH = "stats_fetch"
+STAGE_RENDER = "render"
+STAGE_MIME_BUILD = "mime_build"
+STAGE_SMTP_CONNECT = "smtp_connect"
+STAGE_SMTP_AUTH = "smtp_auth"
+STAGE_SMTP_SEND = "smtp_send"
+STAGE_STORE_SAVE = "store_save"
+
+STAGES = (
+    STAGE_STATE_READ,
+    STAGE_STATS_FETCH,
+    STAGE_RENDER,
+    STAGE_MIME_BUILD,
+    STAGE_SMTP_CONNECT,
+    STAGE_SMTP_AUTH,
+    STAGE_SMTP_SEND,
+    STAGE_STORE_SAVE,
+)
+
+WINDOW = 50
+# Obergrenzen der Histogramm-Klassen in ms; alles darüber landet in "inf"
+BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class StageTimings:
+    """Rolling per-stage duration window (thread-safe, executor jobs record too)."""
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+        self.last_run: dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float, run: dict[str, float] | None = None) -> None:
+        """Speichert eine Messung; ``run`` sammelt zusätzlich die Werte eines Laufs."""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self._window)
+            samples.append(seconds)
+        if run is not None:
+            run[stage] = run.get(stage, 0.0) + seconds
+
+    def record_many(
+        self, durations: dict[str, float], run: dict[str, float] | None = None
+    ) -> None:
+        for stage, seconds in durations.items():
+            self.record(stage, seconds, run)
+
+    @contextmanager
+    def span(self, stage: str, run: dict[str, float] | None = None) -> Iterator[None]:
+        """Misst die Dauer des ``with``-Blocks (auch über ``await`` hinweg)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, run)
+
+    def finish_run(self, run: dict[str, float]) -> str:
+        """Merkt sich den Lauf als letzten und liefert eine Log-Zeile dazu."""
+        self.last_run = dict(run)
+        return ", ".join(f"{stage}={seconds * 1000:.1f} ms" for stage, seconds in run.items())
+
+    def summary(self) -> dict[str, dict]:
+        """Median/p95/Max und Histogramm (ms) je Stufe, in Pipeline-Reihenfolge."""
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+
+        result: dict[str, dict] = {}
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        for stage in sorted(snapshot, key=lambda s: order.get(s, len(STAGES))):
+            values = [seconds * 1000 for seconds in snapshot[stage]]
+            ordered = sorted(values)
+            histogram = dict.fromkeys([f"le_{bound}" for bound in BUCKETS_MS] + ["inf"], 0)
+            for value in values:
+                bound = next((b for b in BUCKETS_MS if value <= b), None)
+                histogram[f"le_{bound}" if bound is not None else "inf"] += 1
+            result[stage] = {
+                "count": len(values),
+                "last_ms": round(values[-1], 1),
+                "median_ms": round(statistics.median(ordered), 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1),
+                "max_ms": round(ordered[-1], 1),
+                "histogram": histogram,
+            }
+        return result
+
+
+class PerfCounters:
+    """Counters, rolling samples and cache hit/miss counts for diagnostics.
+
+    ``sample`` hält je Kennzahl (z. B. Recorder-Zeilen je Abfrage, PDF-Größe)
+    die letzten ``WINDOW`` Werte, ``hit`` zählt Treffer/Fehlschläge je Cache.
+    """
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+        self._samples: dict[str, deque[float]] = {}
+        self._caches: dict[str, list[int]] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def sample(self, name: str, value: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(value)
+
+    def hit(self, cache: str, hit: bool, count: int = 1) -> None:
+        """Zählt ``count`` Treffer (``hit=True``) oder Fehlschläge für ``cache``."""
+        with self._lock:
+            counts = self._caches.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += count
+
+    def as_dict(self) -> dict[str, dict]:
+        with self._lock:
+            counts = dict(self._counts)
+            samples = {name: list(values) for name, values in self._samples.items()}
+            caches = {name: tuple(values) for name, values in self._caches.items()}
+
+        return {
+            "counts": counts,
+            "samples": {
+                name: {
+                    "count": len(values),
+                    "last": values[-1],
+                    "min": min(values),
+                    "max": max(values),
+                    "mean": round(statistics.fmean(values), 1),
+                }
+                for name, values in samples.items()
+            },
+            "caches": {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                }
+                for name, (hits, misses) in caches.items()
+            },
+        }
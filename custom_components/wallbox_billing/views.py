@@ -0,0 +1,117 @@
+"""HTTP view serving archived invoice PDFs for Wallbox Billing.
+
+    GET /api/wallbox_billing/<entry_id>/<period>.pdf
+    GET /api/wallbox_billing/<entry_id>/latest.pdf
+
+Die Antwort kommt ausschließlich aus dem PDF-Archiv – ein Dashboard-Link
+löst nie ein Rendering aus. Da das Archiv inhaltsadressiert ist, dient der
+SHA-256 direkt als starkes ETag; ``If-None-Match`` und ``Range`` werden
+unterstützt, die Datei wird in Blöcken von der Platte gestreamt.
+"""
+from __future__ import annotations
+
+import logging
+from http import HTTPStatus
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+
+try:
+    from homeassistant.components.http import KEY_HASS
+except ImportError:
+    # Ältere HA-Versionen (hacs.json: ab 2024.1) legen hass unter dem String-Key ab
+    KEY_HASS = "hass"
+
+from .archive import InvoiceArchive
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+LATEST_ALIAS = "latest"
+
+
+class WallboxInvoiceView(HomeAssistantView):
+    """Serve archived invoices with ETag and range support."""
+
+    url = "/api/wallbox_billing/{entry_id}/{period}.pdf"
+    name = "api:wallbox_billing:invoice"
+    requires_auth = True
+
+    async def get(
+        self, request: web.Request, entry_id: str, period: str
+    ) -> web.StreamResponse:
+        """Stream an archived PDF."""
+        hass = request.app[KEY_HASS]
+        data = hass.data.get(DOMAIN, {}).get(entry_id)
+        if data is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        archive: InvoiceArchive = data["archive"]
+        if period == LATEST_ALIAS:
+            record = await hass.async_add_executor_job(archive.latest)
+        else:
+            record = await hass.async_add_executor_job(archive.get, period)
+        if record is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        etag = f'"{record["sha256"]}"'
+        size = int(record["size"])
+        headers = {
+            hdrs.ETAG: etag,
+            hdrs.ACCEPT_RANGES: "bytes",
+            hdrs.CACHE_CONTROL: "private, max-age=0, must-revalidate",
+        }
+
+        if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in (tag.strip() for tag in if_none_match.split(","))
+        ):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        start, end = 0, size
+        status = HTTPStatus.OK
+        if_range = request.headers.get(hdrs.IF_RANGE)
+        if hdrs.RANGE in request.headers and (if_range is None or if_range == etag):
+            try:
+                http_range = request.http_range
+            except ValueError:
+                http_range = None
+            if http_range is not None:
+                # aiohttp liefert "bytes=-N" als slice(-N, None) – indices() löst das auf
+                start, end, _ = http_range.indices(size)
+                if start >= end:
+                    headers[hdrs.CONTENT_RANGE] = f"bytes */{size}"
+                    return web.Response(
+                        status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers
+                    )
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers[hdrs.CONTENT_RANGE] = f"bytes {start}-{end - 1}/{size}"
+
+        headers[hdrs.CONTENT_TYPE] = "application/pdf"
+        headers[hdrs.CONTENT_DISPOSITION] = f'inline; filename="{record["filename"]}"'
+        headers[hdrs.CONTENT_LENGTH] = str(end - start)
+
+        try:
+            fp = await hass.async_add_executor_job(open, archive.file_path(record), "rb")
+        except OSError as exc:
+            _LOGGER.warning("Archivierte Rechnung %s nicht lesbar: %s", period, exc)
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        response = web.StreamResponse(status=status, headers=headers)
+        try:
+            await response.prepare(request)
+            await hass.async_add_executor_job(fp.seek, start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = await hass.async_add_executor_job(fp.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                await response.write(chunk)
+                remaining -= len(chunk)
+            await response.write_eof()
+        finally:
+            await hass.async_add_executor_job(fp.close)
+        return response